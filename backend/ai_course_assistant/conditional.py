@@ -0,0 +1,123 @@
+"""
+只读目录接口的 HTTP 条件请求支持（ETag / Last-Modified / 304）
+校验值由相关表的最大 updated_at（走 updated_at 索引，只读一行）与删除计数（DeletionCounter）计算，
+不对整表计数；客户端缓存仍然有效时直接返回 304，不执行查询也不做序列化。
+"""
+import hashlib
+
+from django.apps import apps
+from django.conf import settings
+from django.db.models import F, Max
+from django.db.models.signals import post_delete
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+from courses.models import DeletionCounter
+
+
+# 可作为 conditional_models 的模型：删除时累加 DeletionCounter（在 courses 应用的 ready 中注册）
+VERSIONED_MODELS = ('courses.Course', 'courses.Chapter', 'courses.ChapterContent', 'knowledge.Knowledge', 'exercises.Exercise')
+
+
+def count_deletion(sender, **kwargs):
+    counter, _ = DeletionCounter.objects.get_or_create(label=sender._meta.label)
+    DeletionCounter.objects.filter(pk=counter.pk).update(count=F('count') + 1)
+
+
+def connect_deletion_counters() -> None:
+    for label in VERSIONED_MODELS:
+        post_delete.connect(count_deletion, sender=apps.get_model(label), dispatch_uid=f'count-deletion-{label}')
+
+
+def model_validators(models) -> tuple[list[str], float | None]:
+    """各模型的 "label:删除计数:最大 updated_at"，以及其中最新的修改时间戳"""
+    parts = []
+    last_modified = None
+    labels = [model._meta.label for model in models]
+    deletions = dict(DeletionCounter.objects.filter(label__in=labels).values_list('label', 'count'))
+    for model, label in zip(models, labels):
+        last = model.objects.order_by().aggregate(last=Max('updated_at'))['last']
+        parts.append(f"{label}:{deletions.get(label, 0)}:{last.isoformat() if last else ''}")
+        if last and (last_modified is None or last.timestamp() > last_modified):
+            last_modified = last.timestamp()
+    return parts, last_modified
+
+
+def _digest(parts: list[str]) -> str:
+    return hashlib.sha1('|'.join(parts).encode('utf-8')).hexdigest()
+
+
+def data_version(models) -> str:
+    """
+    这些模型当前数据的版本号：任一模型增删改后即变化。
+    校验值存在数据库中，所有进程读到的版本一致，可用作跨进程缓存键的一部分
+    """
+    return _digest(model_validators(models)[0])
+
+
+class NotModified(Exception):
+    """客户端缓存仍然有效，由 ConditionalGetMixin.handle_exception 转为 304 响应"""
+
+    def __init__(self, response):
+        self.response = response
+
+
+class ConditionalGetMixin:
+    """
+    为 ViewSet 的只读动作加上条件请求支持
+    - conditional_models：响应内容依赖的模型（需有带索引的 updated_at 字段并列入 VERSIONED_MODELS），任一模型增删改都会改变校验值
+    - conditional_actions：启用条件请求的动作
+    Cache-Control 按接口配置，见 settings.HTTP_CACHE_CONTROL
+    """
+    conditional_models = ()
+    conditional_actions = ('list', 'retrieve')
+
+    def get_validators(self, request) -> tuple[str, int | None]:
+        """返回 (ETag, Last-Modified 时间戳)，同时记下数据版本供 data_version 使用"""
+        parts, last_modified = model_validators(self.conditional_models)
+        self._data_version = _digest(parts)
+        digest = _digest([request.get_full_path()] + parts)
+        # HTTP 日期精确到秒
+        return f'W/"{digest}"', int(last_modified) if last_modified is not None else None
+
+    def data_version(self) -> str:
+        """conditional_models 的数据版本，与 ETag 使用同一组校验值；本次请求已计算过时不再查询"""
+        if getattr(self, '_data_version', None) is None:
+            self._data_version = data_version(self.conditional_models)
+        return self._data_version
+
+    def get_cache_control(self) -> dict:
+        """按 "视图类名.动作"、"视图类名"、"default" 的顺序查找 Cache-Control 配置"""
+        config = getattr(settings, 'HTTP_CACHE_CONTROL', {})
+        name = type(self).__name__
+        for key in (f"{name}.{self.action}", name, 'default'):
+            if key in config:
+                return config[key]
+        return {}
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self._validators = None
+        self._data_version = None
+        if request.method in ('GET', 'HEAD') and self.action in self.conditional_actions and self.conditional_models:
+            self._validators = self.get_validators(request)
+            etag, last_modified = self._validators
+            not_modified = get_conditional_response(request._request, etag=etag, last_modified=last_modified)
+            if not_modified is not None:
+                raise NotModified(not_modified)
+
+    def handle_exception(self, exc):
+        if isinstance(exc, NotModified):
+            return exc.response
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        validators = getattr(self, '_validators', None)
+        if validators is not None and (200 <= response.status_code < 300 or response.status_code == 304):
+            etag, last_modified = validators
+            response['ETag'] = etag
+            if last_modified is not None:
+                response['Last-Modified'] = http_date(last_modified)
+            patch_cache_control(response, **self.get_cache_control())
+        return response
@@ -45,6 +45,7 @@ INSTALLED_APPS = [
     'knowledge',
     'exercises',
     'users',
+    'search',
 ]
 
 MIDDLEWARE = [
@@ -135,6 +136,22 @@ MEDIA_ROOT = BASE_DIR / 'media'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# 缓存：default 用于搜索结果、近似计数等；catalog 存放课程/章节树的序列化结果（见 courses/cache.py），
+# 缓存键带数据库中的数据版本号，任一进程修改数据后所有进程都不再读到旧内容；旧版本的键一天后过期。
+# 多进程部署时可改用文件缓存，使各进程共享同一份缓存（也才能用 warm_course_cache 预热），例如：
+# CATALOG_CACHE_BACKEND=django.core.cache.backends.filebased.FileBasedCache CATALOG_CACHE_LOCATION=/var/tmp/ai_course_catalog
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'catalog': {
+        'BACKEND': os.getenv('CATALOG_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CATALOG_CACHE_LOCATION', 'catalog'),
+        'TIMEOUT': 24 * 3600,
+    },
+}
+COURSE_CACHE_ALIAS = 'catalog'
+
 # Django REST Framework
 REST_FRAMEWORK = {
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
@@ -181,3 +198,57 @@ CORS_ALLOW_HEADERS = [
     'x-csrftoken',
     'x-requested-with',
 ]
+
+# 判题结果缓存：进程内 LRU 容量与过期时间（秒），数据库层过期时间（None 表示不过期）
+VERDICT_CACHE_MAX_ENTRIES = 2048
+VERDICT_CACHE_TTL = 60 * 60
+VERDICT_CACHE_DB_TTL = None
+
+# 异步判题任务：running 状态超过多少秒视为 worker 已退出并重新排队；最多尝试次数
+GRADING_JOB_STALE_AFTER = 120
+GRADING_JOB_MAX_ATTEMPTS = 3
+# 判题任务重试的退避（秒）：第 k 次失败后等待 BASE * 2^(k-1)，最长 MAX；worker 每隔多少秒检查一次遗留的 running 任务
+GRADING_JOB_RETRY_BASE = 5
+GRADING_JOB_RETRY_MAX = 120
+GRADING_JOB_REQUEUE_INTERVAL = 30
+
+# 批量判题时同时调用 DeepSeek 的最大并发数
+GRADING_BATCH_CONCURRENCY = 4
+
+# 合并相同的并发判题请求：跨 worker 租约有效期、等待其他 worker 结果的最长时间（秒）
+GRADING_LEASE_TTL = 60
+GRADING_COALESCE_WAIT = 45
+
+# 易错报告防抖刷新：最后一次标注后静默多少秒再生成；距第一次请求最多推迟多少秒
+ERROR_REPORT_DEBOUNCE = 30
+ERROR_REPORT_MAX_DELAY = 300
+# 新增错因不超过该数量时增量修订原报告；连续增量修订达到上限后做一次完整生成
+ERROR_REPORT_INCREMENTAL_MAX_NEW = 5
+ERROR_REPORT_MAX_INCREMENTAL = 5
+# 报告生成失败后的重试退避（秒）：第 k 次失败后等待 BASE * 2^(k-1)，最长 MAX
+ERROR_REPORT_RETRY_BASE = 60
+ERROR_REPORT_RETRY_MAX = 3600
+
+# 练习题游标分页 ?count=approx 时总数的缓存时间（秒）
+EXERCISE_APPROX_COUNT_TTL = 60
+
+# 全文搜索：服务端结果缓存时间、响应 Cache-Control 的 max-age（秒）
+SEARCH_RESULT_CACHE_TTL = 300
+SEARCH_CACHE_MAX_AGE = 60
+
+# 导入练习题时判定近似重复的 MinHash 相似度阈值（估计的 Jaccard 相似度）
+EXERCISE_DEDUP_THRESHOLD = 0.85
+
+# 相似题索引的存放目录；追加与去掉的列数超过上次全量重建题数的该比例时全量重建（重新计算 IDF）
+SIMILARITY_INDEX_DIR = BASE_DIR / 'similarity_index'
+SIMILARITY_REBUILD_RATIO = 0.2
+# 保存、删除题目后在进程内的后台线程中刷新相似题索引；设为 False 时在提交事务的线程中同步刷新
+SIMILARITY_REFRESH_IN_BACKGROUND = True
+
+# 只读目录接口的 Cache-Control，按 "视图类名.动作"、"视图类名"、"default" 依次查找，
+# 值为 django.utils.cache.patch_cache_control 的参数；所有接口都带 ETag / Last-Modified，可用条件请求重新验证
+HTTP_CACHE_CONTROL = {
+    'default': {'public': True, 'max_age': 0, 'must_revalidate': True},
+    'CourseViewSet': {'public': True, 'max_age': 300},
+    'ChapterViewSet': {'public': True, 'max_age': 300},
+}
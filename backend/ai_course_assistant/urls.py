@@ -25,6 +25,7 @@ urlpatterns = [
     path('api/course/', include('courses.urls')),
     path('api/exercise/', include('exercises.urls')),
     path('api/users/', include('users.urls')),
+    path('api/search/', include('search.urls')),
 ]
 
 if settings.DEBUG:
@@ -13,6 +13,7 @@ class CourseAdmin(admin.ModelAdmin):
 class ChapterAdmin(admin.ModelAdmin):
     list_display = ['title', 'course', 'order']
     list_filter = ['course']
+    list_select_related = ['course']
     search_fields = ['title', 'description']
     ordering = ['course', 'order']
 
@@ -21,5 +22,7 @@ class ChapterAdmin(admin.ModelAdmin):
 class ChapterContentAdmin(admin.ModelAdmin):
     list_display = ['title', 'chapter', 'content_type', 'order']
     list_filter = ['content_type', 'chapter__course']
+    # __str__ 中会访问章节和课程
+    list_select_related = ['chapter__course']
     search_fields = ['title']
     ordering = ['chapter', 'order']
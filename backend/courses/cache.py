@@ -0,0 +1,100 @@
+"""
+课程/章节树的响应缓存
+缓存序列化后的数据（不含分页），缓存键带数据版本号（ai_course_assistant.conditional.data_version，
+与 ETag 使用同一组数据库中的校验值）。任一进程增删改 Course、Chapter、ChapterContent 后版本号随之变化，
+所有进程都不再读到旧键，无需逐进程删除；旧键由缓存后端按 TIMEOUT / MAX_ENTRIES 淘汰。
+缓存后端为 settings.CACHES 中的 COURSE_CACHE_ALIAS（默认 catalog）。
+"""
+from django.conf import settings
+from django.core.cache import caches
+
+from ai_course_assistant.conditional import data_version
+
+from .models import Chapter, ChapterContent, Course
+from .serializers import ChapterSerializer, CourseSerializer
+
+COURSE_LIST_KEY = 'course:list'
+CHAPTER_LIST_KEY = 'chapter:list'
+# 课程树（课程接口）与章节树（章节接口）的内容依赖的模型，也是两类接口的 conditional_models
+COURSE_TREE_MODELS = (Course, Chapter, ChapterContent)
+CHAPTER_TREE_MODELS = (Chapter, ChapterContent)
+
+
+def course_key(course_id: int) -> str:
+    return f'course:{course_id}'
+
+
+def course_chapters_key(course_id: int) -> str:
+    return f'course:{course_id}:chapters'
+
+
+def chapter_key(chapter_id: int) -> str:
+    return f'chapter:{chapter_id}'
+
+
+def get_cache():
+    return caches[getattr(settings, 'COURSE_CACHE_ALIAS', 'catalog')]
+
+
+def versioned(key: str, version: str) -> str:
+    return f'{key}@{version}'
+
+
+def cached(key: str, version: str, build):
+    """命中则返回缓存数据，否则调用 build() 生成并写入缓存；version 为先于 build 读取的数据版本号"""
+    cache = get_cache()
+    key = versioned(key, version)
+    data = cache.get(key)
+    if data is None:
+        data = build()
+        cache.set(key, data)
+    return data
+
+
+def course_queryset():
+    return Course.objects.prefetch_related('chapters__contents')
+
+
+def chapter_queryset():
+    return Chapter.objects.prefetch_related('contents')
+
+
+def build_course_list():
+    return list(CourseSerializer(course_queryset(), many=True).data)
+
+
+def build_course(course: Course):
+    return dict(CourseSerializer(course).data)
+
+
+def build_course_chapters(course: Course):
+    # course 来自 CourseViewSet.get_object，章节与内容已预取
+    return list(ChapterSerializer(course.chapters.all(), many=True).data)
+
+
+def build_chapter_list():
+    return list(ChapterSerializer(chapter_queryset(), many=True).data)
+
+
+def build_chapter(chapter: Chapter):
+    return dict(ChapterSerializer(chapter).data)
+
+
+def warm() -> int:
+    """预先生成全部课程与章节的缓存，返回写入的键数"""
+    # 先取版本号再查询数据，与接口的顺序一致：期间有写入时只会让缓存内容比版本号更新
+    course_version = data_version(COURSE_TREE_MODELS)
+    chapter_version = data_version(CHAPTER_TREE_MODELS)
+    courses = list(course_queryset())
+    chapters = list(chapter_queryset())
+    data = {
+        versioned(COURSE_LIST_KEY, course_version): list(CourseSerializer(courses, many=True).data),
+        versioned(CHAPTER_LIST_KEY, chapter_version): list(ChapterSerializer(chapters, many=True).data),
+    }
+    for course in courses:
+        data[versioned(course_key(course.pk), course_version)] = build_course(course)
+        data[versioned(course_chapters_key(course.pk), course_version)] = build_course_chapters(course)
+    for chapter in chapters:
+        data[versioned(chapter_key(chapter.pk), chapter_version)] = build_chapter(chapter)
+    get_cache().set_many(data)
+    return len(data)
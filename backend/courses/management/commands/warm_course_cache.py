@@ -0,0 +1,23 @@
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management.base import BaseCommand, CommandError
+from courses.cache import get_cache, warm
+
+
+class Command(BaseCommand):
+    help = "预先生成课程/章节树的响应缓存（部署或启动时运行，仅适用于文件缓存等多进程共享的缓存后端）"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--clear',
+            action='store_true',
+            help='先清空课程缓存再生成'
+        )
+
+    def handle(self, *args, **options):
+        if isinstance(get_cache(), LocMemCache):
+            # 本地内存缓存只属于当前命令进程，命令结束即丢弃，预热对服务进程没有作用
+            raise CommandError("课程缓存为本地内存缓存，无法预热；请通过 CATALOG_CACHE_BACKEND 配置共享的缓存后端")
+        if options['clear']:
+            get_cache().clear()
+        count = warm()
+        self.stdout.write(self.style.SUCCESS(f"已写入 {count} 条课程缓存"))
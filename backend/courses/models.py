@@ -5,6 +5,7 @@ class Course(models.Model):
     title = models.CharField(max_length=200, verbose_name="课程标题")
     description = models.TextField(verbose_name="课程描述")
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="创建时间")
+    updated_at = models.DateTimeField(auto_now=True, db_index=True, verbose_name="更新时间")
 
     class Meta:
         verbose_name = "课程"
@@ -27,6 +28,7 @@ class Chapter(models.Model):
     title = models.CharField(max_length=200, verbose_name="章节标题")
     description = models.TextField(blank=True, verbose_name="章节描述")
     order = models.PositiveIntegerField(default=0, verbose_name="排序")
+    updated_at = models.DateTimeField(auto_now=True, db_index=True, verbose_name="更新时间")
 
     class Meta:
         verbose_name = "章节"
@@ -50,6 +52,7 @@ class ChapterContent(models.Model):
     content_type = models.CharField(max_length=20, choices=CONTENT_TYPE_CHOICES, verbose_name="内容类型")
     url = models.URLField(verbose_name="内容链接")
     order = models.PositiveIntegerField(default=0, verbose_name="排序")
+    updated_at = models.DateTimeField(auto_now=True, db_index=True, verbose_name="更新时间")
 
     class Meta:
         verbose_name = "章节内容"
@@ -58,3 +61,20 @@ class ChapterContent(models.Model):
 
     def __str__(self):
         return f"{self.chapter.title} - {self.title}"
+
+
+class DeletionCounter(models.Model):
+    """
+    各目录表累计删除的行数
+    条件请求的校验值由 “最大 updated_at + 删除次数” 组成（见 ai_course_assistant/conditional.py），
+    新增与修改会刷新 updated_at，只有删除需要单独计数
+    """
+    label = models.CharField(max_length=100, unique=True, verbose_name="模型")
+    count = models.PositiveBigIntegerField(default=0, verbose_name="删除次数")
+
+    class Meta:
+        verbose_name = "删除计数"
+        verbose_name_plural = "删除计数"
+
+    def __str__(self):
+        return f"{self.label}: {self.count}"
@@ -1,29 +1,61 @@
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from ai_course_assistant.conditional import ConditionalGetMixin
+from . import cache
 from .models import Course, Chapter
 from .serializers import CourseSerializer, ChapterSerializer
 
 
-class CourseViewSet(viewsets.ReadOnlyModelViewSet):
-    queryset = Course.objects.all()
+class CachedResponseMixin:
+    """从课程缓存中取序列化结果（键带 conditional_models 的数据版本号）；列表取完整结果后在内存中分页"""
+
+    def cached_list_response(self, key, build):
+        data = cache.cached(key, self.data_version(), build)
+        page = self.paginate_queryset(data)
+        if page is not None:
+            return self.get_paginated_response(page)
+        return Response(data)
+
+    def cached_detail_response(self, key_func, build):
+        pk = str(self.kwargs['pk'])
+        if not pk.isdigit():
+            # 非法 id 交给 get_object 返回 404，不写缓存
+            return Response(build(self.get_object()))
+        return Response(cache.cached(key_func(int(pk)), self.data_version(), lambda: build(self.get_object())))
+
+
+class CourseViewSet(ConditionalGetMixin, CachedResponseMixin, viewsets.ReadOnlyModelViewSet):
+    queryset = Course.objects.prefetch_related('chapters__contents')
     serializer_class = CourseSerializer
+    conditional_models = cache.COURSE_TREE_MODELS
+    conditional_actions = ('list', 'retrieve', 'chapters')
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_list_response(cache.COURSE_LIST_KEY, cache.build_course_list)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_detail_response(cache.course_key, cache.build_course)
 
     @action(detail=True, methods=['get'])
     def chapters(self, request, pk=None):
         """获取课程的章节列表"""
-        course = self.get_object()
-        chapters = course.chapters.all()
-        serializer = ChapterSerializer(chapters, many=True)
-        return Response(serializer.data)
+        return self.cached_detail_response(cache.course_chapters_key, cache.build_course_chapters)
 
 
-class ChapterViewSet(viewsets.ReadOnlyModelViewSet):
-    queryset = Chapter.objects.all()
+class ChapterViewSet(ConditionalGetMixin, CachedResponseMixin, viewsets.ReadOnlyModelViewSet):
+    queryset = Chapter.objects.prefetch_related('contents')
     serializer_class = ChapterSerializer
+    conditional_models = cache.CHAPTER_TREE_MODELS
+    conditional_actions = ('list', 'retrieve', 'content')
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_list_response(cache.CHAPTER_LIST_KEY, cache.build_chapter_list)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_detail_response(cache.chapter_key, cache.build_chapter)
 
     @action(detail=True, methods=['get'])
     def content(self, request, pk=None):
         """获取章节的详细内容"""
-        chapter = self.get_object()
-        return Response(ChapterSerializer(chapter).data)
+        return self.cached_detail_response(cache.chapter_key, cache.build_chapter)
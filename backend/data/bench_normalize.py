@@ -0,0 +1,104 @@
+"""
+对比 clean.py / trans.py 旧的 pandas 写法与 exercises.latex.normalize_csv 的耗时和峰值内存
+用 batch_process/quiz_data 中的题目重复生成测试 CSV，
+用法：python bench_normalize.py --rows 20000
+"""
+import argparse
+import csv
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+BACKEND = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND))
+from exercises.latex import normalize_csv  # noqa: E402
+from exercises.quiz_markdown import parse_file  # noqa: E402
+
+try:
+    import pandas as pd
+except ImportError:
+    pd = None
+
+
+def build_csv(path: Path, rows: int) -> None:
+    problems = [p for f in sorted((BACKEND.parent / 'batch_process' / 'quiz_data').glob('*.md'))
+                for p in parse_file(f)[1]]
+    if not problems:
+        raise SystemExit("quiz_data 中没有题目")
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['question', 'answer', 'difficulty', 'topic', 'hint'])
+        for i in range(rows):
+            p = problems[i % len(problems)]
+            writer.writerow([p.question, p.answer, 'medium', 'probability', f'提示：注意 \\({i}\\) 与 \\[x_{i}\\]'])
+
+
+def pandas_clean(src, dst):
+    """data/clean.py 原实现"""
+    df = pd.read_csv(src)
+    for column in ('question', 'answer'):
+        df[column] = df[column].str.replace(r'\\\[', '$$', regex=True)
+        df[column] = df[column].str.replace(r'\\\]', '$$', regex=True)
+        df[column] = df[column].str.replace(r'\\\(', '$', regex=True)
+        df[column] = df[column].str.replace(r'\\\)', '$', regex=True)
+    df.to_csv(dst, index=False)
+
+
+def pandas_trans(src, dst):
+    """batch_process/trans.py 原实现"""
+    df = pd.read_csv(src)
+    for column in ('question', 'answer', 'hint'):
+        df[column] = df[column].str.replace(r'\\\[', '\\n\\n\\[', regex=True)
+        df[column] = df[column].str.replace(r'\\\]', '\\]\\n\\n', regex=True)
+    df.to_csv(dst, index=False)
+
+
+def measure(func, *args, **kwargs) -> tuple[float, float]:
+    """返回 (秒, 峰值内存 MB)；tracemalloc 会明显拖慢纯 Python 代码，计时与测内存分两次运行"""
+    started = time.perf_counter()
+    func(*args, **kwargs)
+    elapsed = time.perf_counter() - started
+    tracemalloc.start()
+    func(*args, **kwargs)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / 2 ** 20
+
+
+def differing_rows(a: Path, b: Path) -> int:
+    with open(a, newline='', encoding='utf-8') as fa, open(b, newline='', encoding='utf-8') as fb:
+        return sum(ra != rb for ra, rb in zip(csv.reader(fa), csv.reader(fb)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='LaTeX 定界符转换的基准测试')
+    parser.add_argument('--rows', type=int, default=20000, help='测试 CSV 的行数')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        src = tmp / 'labeled_quiz.csv'
+        build_csv(src, args.rows)
+        print(f"测试文件：{args.rows} 行，{src.stat().st_size / 2 ** 20:.1f} MB")
+
+        cases = [
+            ('clean', pandas_clean, {'columns': ['question', 'answer']}),
+            ('trans', pandas_trans, {'columns': ['question', 'answer', 'hint'], 'dollars': False, 'display_spacing': True}),
+        ]
+        for name, old, options in cases:
+            new_out, old_out = tmp / f'{name}_new.csv', tmp / f'{name}_old.csv'
+            seconds, peak = measure(normalize_csv, src, new_out, **options)
+            print(f"{name}  normalize_csv：{seconds:.2f} 秒，峰值内存 {peak:.1f} MB")
+            if pd is None:
+                print(f"{name}  pandas：未安装 pandas，跳过")
+                continue
+            seconds, peak = measure(old, src, old_out)
+            print(f"{name}  pandas     ：{seconds:.2f} 秒，峰值内存 {peak:.1f} MB")
+            # 旧写法会把 \\[2pt] 等转义的反斜杠也当成定界符，这类行会不同
+            print(f"{name}  输出不同的行数：{differing_rows(old_out, new_out)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,14 +1,10 @@
-import pandas as pd
+import sys
+from pathlib import Path
 
-df = pd.read_csv('labeled_quiz.csv')
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from exercises.latex import normalize_csv  # noqa: E402
 
 # 读取所有question列和answer列，识别\[ 和 \]，更换为$$; 识别\( 和 \)，更换为$
-df['question'] = df['question'].str.replace(r'\\\[', '$$', regex=True)
-df['question'] = df['question'].str.replace(r'\\\]', '$$', regex=True)
-df['question'] = df['question'].str.replace(r'\\\(', '$', regex=True)
-df['question'] = df['question'].str.replace(r'\\\)', '$', regex=True)
-df['answer'] = df['answer'].str.replace(r'\\\[', '$$', regex=True)
-df['answer'] = df['answer'].str.replace(r'\\\]', '$$', regex=True)
-df['answer'] = df['answer'].str.replace(r'\\\(', '$', regex=True)
-df['answer'] = df['answer'].str.replace(r'\\\)', '$', regex=True)
-df.to_csv('cleaned_quiz.csv', index=False)
\ No newline at end of file
+# 逐行流式处理，每个单元格只扫描一遍
+count = normalize_csv('labeled_quiz.csv', 'cleaned_quiz.csv', ['question', 'answer'])
+print(f"已写入 {count} 行到 cleaned_quiz.csv")
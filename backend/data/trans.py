@@ -1,10 +1,10 @@
-import pandas as pd
+import sys
+from pathlib import Path
 
-df = pd.read_csv('labeled_quiz.csv')
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from exercises.latex import normalize_csv  # noqa: E402
 
 # 读取所有question列和answer列，识别\[ 和 \]，前者在其之前额外附加一个空行，后者在其之后额外附加一个空行
-df['question'] = df['question'].str.replace(r'\\\[', '\\n\\n\\[', regex=True)
-df['question'] = df['question'].str.replace(r'\\\]', '\\]\\n\\n', regex=True)
-df['answer'] = df['answer'].str.replace(r'\\\[', '\\n\\n\\[', regex=True)
-df['answer'] = df['answer'].str.replace(r'\\\]', '\\]\\n\\n', regex=True)
-df.to_csv('trans_quiz.csv', index=False)
\ No newline at end of file
+# 逐行流式处理，每个单元格只扫描一遍
+count = normalize_csv('labeled_quiz.csv', 'trans_quiz.csv', ['question', 'answer'], dollars=False, display_spacing=True)
+print(f"已写入 {count} 行到 trans_quiz.csv")
@@ -1,10 +1,44 @@
 from django.contrib import admin
-from .models import Exercise
+from .models import Exercise, ExerciseFacet, VerdictCacheEntry, GradingJob, QuizSourceFile
 
 
 @admin.register(Exercise)
 class ExerciseAdmin(admin.ModelAdmin):
     list_display = ['category', 'difficulty', 'chapter', 'created_at']
     list_filter = ['category', 'difficulty', 'chapter', 'created_at']
+    list_select_related = ['chapter__course']
     search_fields = ['question', 'answer', 'explanation']
     ordering = ['-created_at']
+
+
+@admin.register(VerdictCacheEntry)
+class VerdictCacheEntryAdmin(admin.ModelAdmin):
+    list_display = ['exercise', 'user_answer', 'is_correct', 'hits', 'created_at']
+    list_filter = ['is_correct', 'created_at']
+    list_select_related = ['exercise']
+    search_fields = ['user_answer']
+    ordering = ['-created_at']
+
+
+@admin.register(GradingJob)
+class GradingJobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'exercise', 'status', 'is_correct', 'attempts', 'available_at', 'created_at', 'finished_at']
+    list_filter = ['status', 'created_at']
+    list_select_related = ['exercise']
+    ordering = ['-created_at']
+
+
+@admin.register(ExerciseFacet)
+class ExerciseFacetAdmin(admin.ModelAdmin):
+    list_display = ['chapter', 'category', 'difficulty', 'count']
+    list_filter = ['difficulty', 'chapter']
+    list_select_related = ['chapter__course']
+    ordering = ['chapter', 'category', 'difficulty']
+
+
+@admin.register(QuizSourceFile)
+class QuizSourceFileAdmin(admin.ModelAdmin):
+    list_display = ['path', 'size', 'content_hash', 'imported_at']
+    search_fields = ['path']
+    readonly_fields = ['problems']
+    ordering = ['path']
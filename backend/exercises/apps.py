@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class ExercisesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'exercises'
+
+    def ready(self):
+        # 注册信号
+        from . import signals  # noqa: F401
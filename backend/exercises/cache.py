@@ -0,0 +1,137 @@
+import hashlib
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import DatabaseError
+from django.db.models import F
+
+from .models import Exercise, VerdictCacheEntry
+
+
+def normalize_answer(text: str) -> str:
+    """归一化用户答案，用作缓存键：全角转半角、合并空白、去掉首尾空白"""
+    text = unicodedata.normalize('NFKC', text or '')
+    return ' '.join(text.split())
+
+
+def answer_revision(exercise: Exercise) -> str:
+    """题目标准答案的版本号（取答案文本摘要），答案一改版本即变化"""
+    return hashlib.sha1((exercise.answer or '').encode('utf-8')).hexdigest()[:16]
+
+
+def answer_key(normalized_answer: str) -> str:
+    return hashlib.sha256(normalized_answer.encode('utf-8')).hexdigest()
+
+
+class VerdictCache:
+    """
+    判题结果两级缓存
+    - 进程内 LRU（带 TTL），命中时不访问数据库
+    - 数据库表 VerdictCacheEntry，所有 worker 共享
+    键为 (题目 id, 答案版本, 归一化后的用户答案)
+    """
+
+    def __init__(self, max_entries: int = 2048, ttl: float = 3600, db_ttl: float | None = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.db_ttl = db_ttl
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[tuple, tuple[float, bool, str]] = OrderedDict()
+        self._stats = {'memory_hits': 0, 'db_hits': 0, 'misses': 0, 'stores': 0, 'invalidations': 0}
+
+    def _key(self, exercise: Exercise, user_answer: str) -> tuple:
+        return (exercise.pk, answer_revision(exercise), answer_key(normalize_answer(user_answer)))
+
+    def flight_key(self, exercise: Exercise, user_answer: str) -> str:
+        """用于合并并发判题请求的字符串键，与缓存键一致"""
+        return ':'.join(str(part) for part in self._key(exercise, user_answer))
+
+    def _incr(self, name: str) -> None:
+        with self._lock:
+            self._stats[name] += 1
+
+    def _remember(self, key: tuple, is_correct: bool, explanation: str) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, is_correct, explanation)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get(self, exercise: Exercise, user_answer: str, count_miss: bool = True) -> tuple[bool, str] | None:
+        key = self._key(exercise, user_answer)
+        with self._lock:
+            item = self._entries.get(key)
+            if item is not None:
+                expires_at, is_correct, explanation = item
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self._stats['memory_hits'] += 1
+                    return is_correct, explanation
+                del self._entries[key]
+
+        qs = VerdictCacheEntry.objects.filter(exercise_id=key[0], answer_revision=key[1], answer_key=key[2])
+        entry = qs.only('pk', 'is_correct', 'explanation', 'created_at').first()
+        if entry is not None and self.db_ttl is not None and entry.is_expired(self.db_ttl):
+            entry.delete()
+            entry = None
+        if entry is None:
+            if count_miss:
+                self._incr('misses')
+            return None
+
+        try:
+            VerdictCacheEntry.objects.filter(pk=entry.pk).update(hits=F('hits') + 1)
+        except DatabaseError:
+            pass
+        self._remember(key, entry.is_correct, entry.explanation)
+        self._incr('db_hits')
+        return entry.is_correct, entry.explanation
+
+    def set(self, exercise: Exercise, user_answer: str, is_correct: bool, explanation: str) -> None:
+        key = self._key(exercise, user_answer)
+        self._remember(key, is_correct, explanation)
+        try:
+            # 单条 INSERT OR IGNORE：并发写入同一键时保留先到的结果，也避免 SQLite 读后写升级锁
+            VerdictCacheEntry.objects.bulk_create([VerdictCacheEntry(
+                exercise_id=key[0],
+                answer_revision=key[1],
+                answer_key=key[2],
+                user_answer=normalize_answer(user_answer),
+                is_correct=is_correct,
+                explanation=explanation,
+            )], ignore_conflicts=True)
+        except DatabaseError as e:
+            # 共享缓存写入失败不影响本次判题
+            print(f"[VerdictCache Error] {e}")
+        self._incr('stores')
+
+    def invalidate(self, exercise_id: int) -> None:
+        """丢弃某道题的全部缓存（题目答案变更时调用）"""
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == exercise_id]:
+                del self._entries[key]
+            self._stats['invalidations'] += 1
+        VerdictCacheEntry.objects.filter(exercise_id=exercise_id).delete()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            data = dict(self._stats)
+            data['memory_entries'] = len(self._entries)
+        lookups = data['memory_hits'] + data['db_hits'] + data['misses']
+        data['hit_rate'] = round((data['memory_hits'] + data['db_hits']) / lookups, 4) if lookups else 0.0
+        data['db_entries'] = VerdictCacheEntry.objects.count()
+        return data
+
+
+verdict_cache = VerdictCache(
+    max_entries=getattr(settings, 'VERDICT_CACHE_MAX_ENTRIES', 2048),
+    ttl=getattr(settings, 'VERDICT_CACHE_TTL', 3600),
+    db_ttl=getattr(settings, 'VERDICT_CACHE_DB_TTL', None),
+)
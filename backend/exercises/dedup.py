@@ -0,0 +1,194 @@
+"""
+导入练习题时的去重
+- 完全重复：题面归一化后取 SHA-256（Exercise.content_hash），相同即视为同一道题，导入时更新而不是新增
+- 近似重复：题面的 3 字符 shingle 计算 MinHash 签名，LSH 分桶找候选，估计的 Jaccard 相似度
+  不低于阈值、且题面中的数字依次相同，才视为同一道题的不同写法，不导入，归入以先出现的题为代表的重复簇并在报告中列出；
+  只有数字不同的题（如 25% 与 15%）是不同的题，照常导入
+逐行判定，只需对输入读一遍；候选查找只比较同一 LSH 桶内的签名。
+"""
+import hashlib
+import re
+from collections import defaultdict
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from .equivalence import normalize_latex
+from .models import Exercise
+
+NUM_PERM = 128
+# 16 个带 × 每带 8 行：相似度约 0.7 以上的两题大概率落入同一个桶
+BANDS = 16
+SHINGLE_SIZE = 3
+# 代表题在报告中保留的题面长度
+QUESTION_PREVIEW = 80
+_PRIME = (1 << 31) - 1
+_rng = np.random.default_rng(20240601)
+_A = _rng.integers(1, _PRIME, NUM_PERM, dtype=np.uint64)
+_B = _rng.integers(0, _PRIME, NUM_PERM, dtype=np.uint64)
+
+# 只保留文字、数字与数学符号，去掉空白和中英文标点
+_IGNORED_RE = re.compile(r'[\s，。、；：？！,.;:?!“”"\'‘’（）()【】\[\]《》<>…·]+')
+_NUMBER_RE = re.compile(r'\d+(?:\.\d+)?')
+
+
+def normalize_question(text: str) -> str:
+    return _IGNORED_RE.sub('', normalize_latex(text).lower())
+
+
+def numbers(text: str) -> tuple[str, ...]:
+    """题面中依次出现的数字（在去掉标点之前提取，保留小数点）"""
+    return tuple(_NUMBER_RE.findall(normalize_latex(text)))
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(normalize_question(text).encode('utf-8')).hexdigest()
+
+
+def minhash(normalized: str) -> np.ndarray:
+    # 每个字符的码位不超过 21 位，连续 3 个码位拼成一个整数即为 shingle 的编号，全部向量化计算
+    codes = np.frombuffer(normalized.encode('utf-32-le'), dtype=np.uint32).astype(np.uint64)
+    if len(codes) < SHINGLE_SIZE:
+        codes = np.pad(codes, (0, SHINGLE_SIZE - len(codes)))
+    n = len(codes) - SHINGLE_SIZE + 1
+    shingles = np.zeros(n, dtype=np.uint64)
+    for i in range(SHINGLE_SIZE):
+        shingles = (shingles << np.uint64(21)) | codes[i:i + n]
+    x = np.unique(shingles) % _PRIME
+    return ((np.outer(x, _A) + _B) % _PRIME).min(axis=0).astype(np.uint32)
+
+
+def fingerprint(question: str, near_duplicates: bool = True) -> tuple[str, np.ndarray | None, tuple]:
+    """(content_hash, MinHash 签名, 数字)；不做近似重复检测时签名为 None。只做计算，可在子进程中执行"""
+    normalized = normalize_question(question)
+    digest = hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+    if not near_duplicates:
+        return digest, None, ()
+    return digest, minhash(normalized), numbers(question)
+
+
+def backfill_content_hashes(batch_size: int = 1000) -> int:
+    """为尚未计算摘要的旧数据补上 content_hash，返回更新的行数"""
+    updated = 0
+    while True:
+        batch = list(Exercise.objects.filter(content_hash='').only('pk', 'question')[:batch_size])
+        if not batch:
+            return updated
+        for exercise in batch:
+            exercise.content_hash = content_hash(exercise.question)
+        Exercise.objects.bulk_update(batch, ['content_hash'])
+        updated += len(batch)
+
+
+@dataclass
+class Cluster:
+    """一个近似重复簇：代表题（已有题目的 id 或输入中的行号）与被跳过的成员"""
+    representative: str
+    question: str
+    members: list = field(default_factory=list)  # [(行号, 相似度, 题面)]
+
+
+@dataclass
+class Verdict:
+    kind: str  # new / existing / duplicate
+    content_hash: str
+    exercise_id: int | None = None  # kind == existing 时为已有题目 id
+    similarity: float = 1.0
+
+
+class Deduplicator:
+    """
+    逐行判定导入的题目：
+    - existing：与已有题目完全重复，应更新该题
+    - duplicate：与已有题目或前面的行完全/近似重复，不导入
+    - new：新题
+    """
+
+    def __init__(self, threshold: float = 0.85, near_duplicates: bool = True):
+        self.threshold = threshold
+        self.near_duplicates = near_duplicates
+        self.hashes: dict[str, str] = {}  # content_hash -> 代表
+        self.existing: dict[str, int] = {}  # content_hash -> 已有题目 id
+        self.updated: set[str] = set()
+        self.questions: dict[str, str] = {}  # 代表 -> 题面开头（只用于报告，限制内存占用）
+        self.signatures: dict[str, np.ndarray] = {}
+        self.numbers: dict[str, tuple] = {}
+        self.buckets = defaultdict(list)
+        self.clusters: dict[str, Cluster] = {}
+
+    def load_existing(self, chunk_size: int = 2000) -> int:
+        """读入已有题目的摘要与签名，返回题目数；重复的旧数据以 id 最小的为准"""
+        count = 0
+        rows = Exercise.objects.order_by('pk').values_list('pk', 'question', 'content_hash')
+        for pk, question, digest in rows.iterator(chunk_size=chunk_size):
+            digest = digest or content_hash(question)
+            if digest not in self.existing:
+                self.existing[digest] = pk
+                _, signature, nums = fingerprint(question, self.near_duplicates)
+                self._remember(f'#{pk}', digest, question, signature, nums)
+            count += 1
+        return count
+
+    def _remember(self, key: str, digest: str, question: str, signature: np.ndarray | None, nums: tuple = ()) -> None:
+        self.hashes[digest] = key
+        self.questions[key] = question[:QUESTION_PREVIEW]
+        if signature is not None:
+            self.signatures[key] = signature
+            self.numbers[key] = nums
+            for band in self._bands(signature):
+                self.buckets[band].append(key)
+
+    def _bands(self, signature: np.ndarray):
+        for b, band in enumerate(signature.reshape(BANDS, -1)):
+            yield b, band.tobytes()
+
+    def _nearest(self, signature: np.ndarray, nums: tuple) -> tuple[str | None, float]:
+        """数字相同的候选中相似度最高的一个"""
+        best, best_score = None, 0.0
+        seen = set()
+        for band in self._bands(signature):
+            for key in self.buckets.get(band, ()):
+                if key in seen:
+                    continue
+                seen.add(key)
+                if self.numbers[key] != nums:
+                    continue
+                score = np.count_nonzero(self.signatures[key] == signature) / NUM_PERM
+                if score > best_score:
+                    best, best_score = key, score
+        return best, best_score
+
+    def _report(self, representative: str, line: int, similarity: float, question: str) -> None:
+        cluster = self.clusters.get(representative)
+        if cluster is None:
+            cluster = self.clusters[representative] = Cluster(representative, self.questions[representative])
+        cluster.members.append((line, round(similarity, 3), question))
+
+    def check(self, question: str, line: int, precomputed: tuple | None = None) -> Verdict:
+        """precomputed 为 fingerprint() 的结果（可由子进程预先算好）"""
+        digest, signature, nums = precomputed or fingerprint(question, self.near_duplicates)
+        if digest in self.existing and digest not in self.updated:
+            # 已有题目只更新一次，同一文件中再次出现的按重复处理
+            self.updated.add(digest)
+            return Verdict('existing', digest, exercise_id=self.existing[digest])
+        if digest in self.hashes:
+            self._report(self.hashes[digest], line, 1.0, question)
+            return Verdict('duplicate', digest)
+        if signature is not None:
+            key, score = self._nearest(signature, nums)
+            if key is not None and score >= self.threshold:
+                self._report(key, line, score, question)
+                return Verdict('duplicate', digest, similarity=score)
+        self._remember(f'L{line}', digest, question, signature, nums)
+        return Verdict('new', digest)
+
+    def report(self) -> list[dict]:
+        """重复簇列表，代表为 “#id”（已有题目）或 “L行号”（本次导入的行）"""
+        return [
+            {
+                'representative': c.representative,
+                'question': c.question,
+                'members': [{'line': line, 'similarity': s, 'question': q} for line, s, q in c.members],
+            }
+            for c in self.clusters.values()
+        ]
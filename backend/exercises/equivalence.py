@@ -0,0 +1,330 @@
+"""
+本地确定性判题：对数字、分数、小数、百分数、集合/元组以及 “(1)…；(2)…” 多小问答案
+做归一化后直接比较，能确定结论时无需调用大模型；无法确定时返回 None，交给 DeepSeek 判定。
+"""
+import re
+from fractions import Fraction
+
+from .latex import normalize_for_grading
+
+# 判定结果：True 等价 / False 不等价 / None 无法确定
+UNDECIDED = None
+
+_WRAPPER_RE = re.compile(r'\\(?:text|mathrm|mathbf|mathit|operatorname)\s*\{([^{}]*)\}')
+_PART_LABEL_RE = re.compile(r'(?:^|(?<=[;,.\n]))\s*\((\d+)\)')
+_NUMBER_RE = re.compile(r'[+-]?(?:\d+\.?\d*|\.\d+)')
+_FRAC_RE = re.compile(r'([+-]?)\\frac(?:\{([^{}]+)\}|(\d))(?:\{([^{}]+)\}|(\d))')
+_SLASH_RE = re.compile(r'([+-]?\d+)/(\d+)')
+
+# 不收录 t、f 这类单个字母：标准答案可能就是变量名或函数名
+_TRUE_WORDS = {'对', '正确', '是', '√', '✓', 'true', 'yes'}
+_FALSE_WORDS = {'错', '错误', '不对', '否', '×', r'\times', '✗', 'false', 'no'}
+
+
+class Approx:
+    """带精度的近似小数，例如 0.7772 表示 [0.77715, 0.77725]"""
+
+    def __init__(self, value: Fraction, places: int):
+        self.value = value
+        self.places = places
+
+    def covers(self, exact: Fraction) -> bool:
+        return abs(exact - self.value) <= Fraction(1, 2 * 10 ** self.places)
+
+
+def normalize_latex(text: str) -> str:
+    """统一全角字符、LaTeX 定界符与常见命令写法，并去除空白"""
+    text = normalize_for_grading(text)
+    while True:
+        unwrapped = _WRAPPER_RE.sub(r'\1', text)
+        if unwrapped == text:
+            break
+        text = unwrapped
+    return text.strip().rstrip('.。').strip()
+
+
+def split_parts(text: str) -> list[tuple[str | None, str]] | None:
+    """
+    拆分 “(1)…；(2)…” 多小问答案，返回 [(小问编号, 内容)]；没有小问编号时返回 [(None, 全文)]
+    编号重复或编号前还有其他文字（如 “无放回抽样：”）时返回 None
+    """
+    matches = list(_PART_LABEL_RE.finditer(text))
+    if not matches:
+        return [(None, text)]
+    if text[:matches[0].start()].strip(' \n;,.'):
+        return None
+    labels = [m.group(1) for m in matches]
+    if len(set(labels)) != len(labels):
+        return None
+    parts = []
+    for i, m in enumerate(matches):
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(text)
+        parts.append((m.group(1), text[m.end():end].strip(' \n;,.')))
+    return parts
+
+
+def _split_top_level(text: str, separators: tuple[str, ...]) -> list[str]:
+    """按不在括号内的分隔符拆分"""
+    items, depth, start, i = [], 0, 0, 0
+    while i < len(text):
+        ch = text[i]
+        if ch in '{([':
+            depth += 1
+        elif ch in '})]':
+            depth -= 1
+        elif depth == 0:
+            for sep in separators:
+                if text.startswith(sep, i):
+                    items.append(text[start:i])
+                    i += len(sep)
+                    start = i
+                    break
+            else:
+                i += 1
+                continue
+            continue
+        i += 1
+    items.append(text[start:])
+    return [item for item in (s.strip() for s in items)]
+
+
+def _compact(text: str) -> str:
+    return re.sub(r'\s+', '', text)
+
+
+def parse_value(text: str):
+    """
+    解析单个取值，返回：
+    - Fraction（精确数）/ Approx（近似小数）
+    - frozenset（集合）/ tuple（元组）
+    - str（无法解析的符号表达式，已去空白）
+    """
+    s = _compact(text)
+    if not s:
+        return ''
+    if s.startswith(r'\{') and s.endswith(r'\}') and _balanced(s[2:-2]):
+        return frozenset(parse_value(e) for e in _split_top_level(s[2:-2], (',',)) if e)
+    if s.startswith('{') and s.endswith('}') and ',' in s and _balanced(s[1:-1]):
+        # 用户手写的集合常省略反斜杠
+        return frozenset(parse_value(e) for e in _split_top_level(s[1:-1], (',',)) if e)
+    if s.startswith('(') and s.endswith(')') and _balanced(s[1:-1]):
+        elements = _split_top_level(s[1:-1], (',',))
+        if len(elements) > 1:
+            return tuple(parse_value(e) for e in elements)
+    number = _parse_number(s)
+    return number if number is not None else s
+
+
+def _balanced(s: str) -> bool:
+    depth = 0
+    for ch in s:
+        if ch in '{([':
+            depth += 1
+        elif ch in '})]':
+            depth -= 1
+            if depth < 0:
+                return False
+    return depth == 0
+
+
+def _parse_number(s: str):
+    percent = s.endswith('%')
+    if percent:
+        s = s[:-2] if s.endswith(r'\%') else s[:-1]
+    if r'\frac' not in s:
+        s = s.replace('{', '').replace('}', '')
+    m = _FRAC_RE.fullmatch(s)
+    if m:
+        num = _parse_number(m.group(2) or m.group(3))
+        den = _parse_number(m.group(4) or m.group(5))
+        if isinstance(num, Fraction) and isinstance(den, Fraction) and den != 0:
+            value = num / den
+            return -value if m.group(1) == '-' else value
+        return None
+    m = _SLASH_RE.fullmatch(s)
+    if m and int(m.group(2)) != 0:
+        value = Fraction(int(m.group(1)), int(m.group(2)))
+    elif _NUMBER_RE.fullmatch(s):
+        value = Fraction(s)
+        if '.' in s and not percent:
+            places = len(s.split('.', 1)[1])
+            return Approx(value, places) if places >= 2 else value
+    else:
+        return None
+    return value / 100 if percent else value
+
+
+def parse_item(text: str) -> tuple[str | None, list]:
+    """
+    解析 “名称 = 取值 ≈ 近似值” 形式的条目，返回 (名称, [取值...])
+    """
+    segments = _split_top_level(text, ('=',))
+    name = None
+    if len(segments) > 1 and isinstance(parse_value(segments[0]), str):
+        name = _compact(segments[0])
+        segments = segments[1:]
+    values = []
+    for segment in segments:
+        for piece in _split_top_level(segment, (r'\approx',)):
+            if piece:
+                values.append(parse_value(piece))
+    return name, values
+
+
+def _exact(value):
+    return value.value if isinstance(value, Approx) else value
+
+
+def compare_values(user, correct):
+    """比较两个已解析取值，返回 True / False / None"""
+    if isinstance(user, (Fraction, Approx)) and isinstance(correct, (Fraction, Approx)):
+        if _exact(user) == _exact(correct):
+            return True
+        if isinstance(user, Approx) and isinstance(correct, Fraction):
+            return user.covers(correct)
+        if isinstance(correct, Approx) and isinstance(user, Fraction):
+            return correct.covers(user)
+        if isinstance(user, Approx) and isinstance(correct, Approx):
+            coarse, fine = sorted((user, correct), key=lambda a: a.places)
+            return coarse.covers(fine.value)
+        return False
+    if isinstance(user, frozenset) and isinstance(correct, frozenset):
+        user_keys, correct_keys = {_key(e) for e in user}, {_key(e) for e in correct}
+        if user_keys == correct_keys:
+            return True
+        return False if _is_concrete(user) and _is_concrete(correct) else UNDECIDED
+    if isinstance(user, tuple) and isinstance(correct, tuple):
+        if len(user) != len(correct):
+            return UNDECIDED
+        return _combine(compare_values(u, c) for u, c in zip(user, correct))
+    if isinstance(user, str) and isinstance(correct, str):
+        if user == correct:
+            return True
+        user_bool, correct_bool = _as_bool(user), _as_bool(correct)
+        if user_bool is not None and correct_bool is not None:
+            return user_bool == correct_bool
+        return UNDECIDED
+    return UNDECIDED
+
+
+def _key(value):
+    if isinstance(value, Approx):
+        return value.value
+    if isinstance(value, tuple):
+        return tuple(_key(v) for v in value)
+    if isinstance(value, frozenset):
+        return frozenset(_key(v) for v in value)
+    return value
+
+
+def _is_concrete(value) -> bool:
+    """集合元素全部为数字（或由数字组成的元组/集合）时，集合不相等即可判错"""
+    if isinstance(value, (Fraction, Approx)):
+        return True
+    if isinstance(value, (tuple, frozenset)):
+        return all(_is_concrete(v) for v in value)
+    return False
+
+
+def _as_bool(text: str):
+    lowered = text.lower()
+    if lowered in _TRUE_WORDS:
+        return True
+    if lowered in _FALSE_WORDS:
+        return False
+    return None
+
+
+def _combine(results) -> bool | None:
+    """任一为 False 则 False；否则任一无法确定则 None；全部为 True 才 True"""
+    results = list(results)
+    if any(r is False for r in results):
+        return False
+    if any(r is None for r in results):
+        return UNDECIDED
+    return True
+
+
+def compare_items(user_text: str, correct_text: str):
+    user_name, user_values = parse_item(user_text)
+    correct_name, correct_values = parse_item(correct_text)
+    if not user_values or not correct_values:
+        return UNDECIDED
+    if user_name and correct_name and user_name != correct_name:
+        return UNDECIDED
+    if len(user_values) > 1:
+        # “3/8 ≈ 0.375” 这类连等式每个值都与标准答案相符才算对；否则（如 “1=2”）可能是写错的推导，交给大模型
+        matched = all(any(compare_values(u, c) is True for c in correct_values) for u in user_values)
+        return True if matched else UNDECIDED
+    results = [compare_values(user_values[0], value) for value in correct_values]
+    if any(r is True for r in results):
+        return True
+    return False if all(r is False for r in results) else UNDECIDED
+
+
+def compare_part(user_text: str, correct_text: str):
+    user_items = [i for i in _split_top_level(user_text, (',', ';')) if i]
+    correct_items = [i for i in _split_top_level(correct_text, (',', ';')) if i]
+    if not correct_items:
+        return UNDECIDED
+    if len(user_items) != len(correct_items):
+        # 单个取值里可能含有顶层逗号（如 “i = 1,2,…”），整体再比较一次
+        if _compact(user_text) == _compact(correct_text):
+            return True
+        return UNDECIDED
+    verdict = _combine(compare_items(u, c) for u, c in zip(user_items, correct_items))
+    if verdict is False and len(correct_items) > 1 and _is_permutation(user_items, correct_items):
+        # 只是顺序不同：题目是否要求顺序无法在本地判断，交给大模型
+        return UNDECIDED
+    return verdict
+
+
+def _is_permutation(user_items: list[str], correct_items: list[str]) -> bool:
+    """用户的各项能否与标准答案的各项一一对应（忽略顺序）"""
+    remaining = list(correct_items)
+    for item in user_items:
+        for i, candidate in enumerate(remaining):
+            if compare_items(item, candidate) is True:
+                del remaining[i]
+                break
+        else:
+            return False
+    return True
+
+
+def judge_locally(user_answer: str, correct_answer: str) -> tuple[bool, str] | None:
+    """
+    本地判定用户答案，返回 (is_correct, explanation)；无法确定时返回 None
+    """
+    user = normalize_latex(user_answer)
+    correct = normalize_latex(correct_answer)
+    if not user or not correct:
+        return None
+
+    user_parts = split_parts(user)
+    correct_parts = split_parts(correct)
+    if user_parts is None or correct_parts is None:
+        return None
+    if len(correct_parts) > 1 and user_parts[0][0] is None:
+        # 用户未写小问编号时，按分号顺序对应各小问
+        pieces = [p for p in _split_top_level(user_parts[0][1], (';',)) if p]
+        user_parts = [(label, piece) for (label, _), piece in zip(correct_parts, pieces)] if len(pieces) == len(correct_parts) else user_parts
+    if len(user_parts) != len(correct_parts):
+        return None
+    if correct_parts[0][0] is not None and user_parts[0][0] is not None:
+        if [p[0] for p in user_parts] != [p[0] for p in correct_parts]:
+            return None
+
+    results = []
+    for (label, user_text), (_, correct_text) in zip(user_parts, correct_parts):
+        results.append((label, compare_part(user_text, correct_text)))
+    verdict = _combine(r for _, r in results)
+    if verdict is None:
+        return None
+    if verdict:
+        return True, "给出的答案与标准答案数值/结构一致，判定为正确。"
+    wrong = [label for label, r in results if r is False]
+    if wrong and wrong[0] is not None:
+        which = '、'.join(f"第({label})问" for label in wrong)
+        return False, f"{which}的答案与标准答案不一致，标准答案为：{correct_answer.strip()}"
+    return False, f"给出的答案与标准答案不一致，标准答案为：{correct_answer.strip()}"
@@ -0,0 +1,99 @@
+from collections import Counter
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+
+from .models import Exercise, ExerciseFacet
+
+
+def facet_key(exercise: Exercise) -> tuple:
+    return (exercise.chapter_id, exercise.category, exercise.difficulty)
+
+
+def _adjust(key: tuple, delta: int) -> None:
+    chapter_id, category, difficulty = key
+    rows = ExerciseFacet.objects.filter(chapter_id=chapter_id, category=category, difficulty=difficulty)
+    # 先做原子的 count = count + delta，行不存在时再插入；并发插入冲突则回到更新
+    for _ in range(2):
+        if rows.update(count=F('count') + delta):
+            return
+        if delta < 0:
+            return
+        try:
+            with transaction.atomic():
+                ExerciseFacet.objects.create(chapter_id=chapter_id, category=category, difficulty=difficulty, count=delta)
+            return
+        except IntegrityError:
+            continue
+
+
+def apply_deltas(deltas: Counter) -> None:
+    """按 {(chapter_id, category, difficulty): 增量} 批量调整计数"""
+    for key, delta in deltas.items():
+        if delta:
+            _adjust(key, delta)
+
+
+def record_added(exercises) -> None:
+    apply_deltas(Counter(facet_key(e) for e in exercises))
+
+
+def record_removed(exercises) -> None:
+    apply_deltas(Counter({key: -n for key, n in Counter(facet_key(e) for e in exercises).items()}))
+
+
+def record_changed(old_key: tuple, new_key: tuple) -> None:
+    if old_key != new_key:
+        apply_deltas(Counter({old_key: -1, new_key: 1}))
+
+
+def fold_chapter(chapter_id: int) -> None:
+    """章节删除前，把该章节的计数并入 “未归属章节”（练习题的 chapter 会被置空）"""
+    deltas = Counter()
+    for facet in ExerciseFacet.objects.filter(chapter_id=chapter_id):
+        deltas[(None, facet.category, facet.difficulty)] += facet.count
+    apply_deltas(deltas)
+
+
+def rebuild_facets() -> int:
+    """按练习题表重新统计全部计数（数据被绕过信号批量修改后使用），返回计数行数"""
+    rows = (Exercise.objects.order_by()
+            .values('chapter_id', 'category', 'difficulty')
+            .annotate(n=Count('id')))
+    with transaction.atomic():
+        ExerciseFacet.objects.all().delete()
+        ExerciseFacet.objects.bulk_create([
+            ExerciseFacet(chapter_id=row['chapter_id'], category=row['category'],
+                          difficulty=row['difficulty'], count=row['n'])
+            for row in rows
+        ])
+    return len(rows)
+
+
+def facet_counts(chapter_id: int | None = None) -> dict:
+    """
+    汇总计数，只读计数表
+    返回 {"total", "difficulties": {难度: 数量}, "categories": [{"category", "count", "difficulties"}]}
+    """
+    qs = ExerciseFacet.objects.filter(count__gt=0)
+    if chapter_id is not None:
+        qs = qs.filter(chapter_id=chapter_id)
+    rows = qs.values('category', 'difficulty').annotate(n=Sum('count')).order_by('category', 'difficulty')
+
+    difficulties = {value: 0 for value, _ in Exercise.DIFFICULTY_CHOICES}
+    categories: dict[str, dict] = {}
+    for row in rows:
+        item = categories.setdefault(row['category'], {
+            'category': row['category'],
+            'count': 0,
+            'difficulties': {value: 0 for value, _ in Exercise.DIFFICULTY_CHOICES},
+        })
+        item['count'] += row['n']
+        item['difficulties'][row['difficulty']] = item['difficulties'].get(row['difficulty'], 0) + row['n']
+        difficulties[row['difficulty']] = difficulties.get(row['difficulty'], 0) + row['n']
+    return {
+        'chapter': chapter_id,
+        'total': sum(difficulties.values()),
+        'difficulties': difficulties,
+        'categories': list(categories.values()),
+    }
@@ -0,0 +1,109 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connection
+
+from .cache import verdict_cache
+from .equivalence import judge_locally
+from .models import Exercise
+from .singleflight import SingleFlight, coalesce_across_workers
+from .utils import call_deepseek_api, stream_deepseek_api
+
+
+def quick_grade(exercise: Exercise, user_answer: str) -> tuple[bool, str] | None:
+    """
+    不调用大模型的快速判定：本地确定性比较（数字、分数、集合等），再查判题缓存
+    均无法确定时返回 None
+    """
+    local = judge_locally(user_answer, exercise.answer)
+    if local is not None:
+        return local
+    return verdict_cache.get(exercise, user_answer)
+
+
+def grade_exercise(exercise: Exercise, user_answer: str) -> tuple[bool, str]:
+    """
+    判定用户答案，先走 quick_grade，无法确定时再调用 DeepSeek
+    返回 (is_correct, explanation)
+    """
+    quick = quick_grade(exercise, user_answer)
+    if quick is not None:
+        return quick
+    return llm_grade(exercise, user_answer)
+
+
+grading_flight = SingleFlight()
+
+
+def llm_grade(exercise: Exercise, user_answer: str) -> tuple[bool, str]:
+    """
+    调用 DeepSeek 判题并写入缓存；调用失败时返回空解释，此类结果不缓存
+    相同 (题目, 归一化答案) 的并发请求只调用一次：进程内共享结果，跨 worker 通过租约等待缓存
+    """
+    key = verdict_cache.flight_key(exercise, user_answer)
+
+    def call():
+        is_correct, explanation = call_deepseek_api(exercise.question, user_answer, exercise.answer)
+        if explanation:
+            verdict_cache.set(exercise, user_answer, is_correct, explanation)
+        return is_correct, explanation
+
+    return grading_flight.do(key, lambda: coalesce_across_workers(
+        key,
+        call,
+        lambda: verdict_cache.get(exercise, user_answer, count_miss=False),
+        ttl=getattr(settings, 'GRADING_LEASE_TTL', 60),
+        wait_timeout=getattr(settings, 'GRADING_COALESCE_WAIT', 45),
+    ))
+
+
+def _llm_grade_in_thread(exercise: Exercise, user_answer: str) -> tuple[bool, str]:
+    try:
+        return llm_grade(exercise, user_answer)
+    finally:
+        # 每个线程持有独立的数据库连接，判题结束后释放
+        connection.close()
+
+
+def grade_batch(pairs: list[tuple[Exercise, str]], concurrency: int = 4) -> list:
+    """
+    批量判题，按输入顺序返回结果列表，每项为 (is_correct, explanation) 或判题时抛出的异常
+    quick_grade 能确定的直接返回，其余以至多 concurrency 个并发调用 DeepSeek
+    """
+    results: list = [None] * len(pairs)
+    pending = []
+    for i, (exercise, user_answer) in enumerate(pairs):
+        try:
+            results[i] = quick_grade(exercise, user_answer)
+        except Exception as e:
+            results[i] = e
+        if results[i] is None:
+            pending.append(i)
+
+    if pending:
+        with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(pending)))) as pool:
+            futures = {i: pool.submit(_llm_grade_in_thread, *pairs[i]) for i in pending}
+            for i, future in futures.items():
+                try:
+                    results[i] = future.result()
+                except Exception as e:
+                    results[i] = e
+    return results
+
+
+def stream_grade(exercise: Exercise, user_answer: str):
+    """
+    grade_exercise 的流式版本，产出 ('delta', 文本) 与最终的 ('verdict', (is_correct, explanation))
+    quick_grade 能确定时整段解释一次性产出
+    """
+    quick = quick_grade(exercise, user_answer)
+    if quick is not None:
+        yield 'delta', quick[1]
+        yield 'verdict', quick
+        return
+
+    for kind, payload in stream_deepseek_api(exercise.question, user_answer, exercise.answer):
+        # 解释为空表示回复未能解析，不缓存
+        if kind == 'verdict' and payload[1]:
+            verdict_cache.set(exercise, user_answer, *payload)
+        yield kind, payload
@@ -0,0 +1,150 @@
+"""
+练习题流式导入的公共部分
+- read_chunks：逐条读取 CSV 记录，按 batch_size 条分块，内存占用与文件大小无关
+- parse_chunk：校验并解析一块数据，同时计算题面摘要与 MinHash 签名；不访问数据库，可在子进程中执行
+- map_ordered：在进程池中处理各块，最多同时提交 workers * 2 块，按输入顺序返回结果
+- Checkpoint：每块提交后记录已处理到的行号（记录的起始行），中断后可用 --resume 继续
+"""
+import csv
+import json
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import django
+
+from .dedup import fingerprint
+from .latex import to_markdown
+from .models import Exercise
+
+DIFFICULTIES = ('easy', 'medium', 'hard')
+# 超长的分类在部分数据库上会让整块写入失败，解析时就拒绝
+CATEGORY_MAX_LENGTH = Exercise._meta.get_field('category').max_length
+
+
+@dataclass
+class ParsedRow:
+    line: int  # 记录在文件中的起始行
+    question: str
+    fields: dict
+    fingerprint: tuple
+
+
+@dataclass
+class ParsedChunk:
+    first_line: int
+    last_line: int
+    rows: list[ParsedRow] = field(default_factory=list)
+    errors: list[tuple[int, str]] = field(default_factory=list)  # [(行号, 原因)]
+
+
+def read_chunks(path: str, batch_size: int, start_line: int = 0):
+    """
+    逐块产出 [(行号, 列)]，行号为该条记录在文件中的起始行（第 1 行为标题）；引号内含换行的题目占多行，
+    之后记录的行号仍与文件一致。跳过起始行号不超过 start_line 的记录
+    """
+    with open(path, newline='', encoding='utf-8') as csvfile:
+        reader = csv.reader(csvfile)
+        next(reader, None)  # 第一行是标题 ['question','answer','difficulty','topic','hint']
+        chunk = []
+        # reader.line_num 是已读取的物理行数，下一条记录从其后一行开始
+        line = reader.line_num + 1
+        for row in reader:
+            if line > start_line:
+                chunk.append((line, row))
+                if len(chunk) >= batch_size:
+                    yield chunk
+                    chunk = []
+            line = reader.line_num + 1
+        if chunk:
+            yield chunk
+
+
+def parse_row(row: list[str], latex_to_markdown: bool = False) -> tuple[str, dict]:
+    """解析一行，数据不合法时抛出 ValueError；latex_to_markdown 时把题目、答案与提示中的 \\( \\[ 定界符换成 $ / $$"""
+    # 确保至少有五列
+    if len(row) < 5:
+        raise ValueError(f"列数不足（{len(row)} 列）")
+    question = row[0].strip()
+    if not question:
+        raise ValueError("题目为空")
+    fields = {
+        'answer': row[1].strip(),
+        'difficulty': row[2].strip() if row[2].strip() in DIFFICULTIES else 'medium',
+        'category': row[3].strip() if row[3].strip() else '未分类',
+        'hint': row[4].strip() if row[4].strip() else '无提示内容',
+    }
+    if not fields['answer']:
+        raise ValueError("答案为空")
+    if len(fields['category']) > CATEGORY_MAX_LENGTH:
+        raise ValueError(f"分类超过 {CATEGORY_MAX_LENGTH} 个字符")
+    if latex_to_markdown:
+        question = to_markdown(question)
+        fields.update({name: to_markdown(fields[name]) for name in ('answer', 'hint')})
+    return question, fields
+
+
+def parse_chunk(chunk: list[tuple[int, list[str]]], near_duplicates: bool = True,
+                latex_to_markdown: bool = False) -> ParsedChunk:
+    parsed = ParsedChunk(first_line=chunk[0][0], last_line=chunk[-1][0])
+    for line, row in chunk:
+        try:
+            question, fields = parse_row(row, latex_to_markdown)
+        except ValueError as e:
+            parsed.errors.append((line, str(e)))
+            continue
+        parsed.rows.append(ParsedRow(line, question, fields, fingerprint(question, near_duplicates)))
+    return parsed
+
+
+def map_ordered(func, items, workers: int = 1, *args):
+    """对 items 逐个调用 func(item, *args) 并按顺序产出结果；workers > 1 时在进程池中执行"""
+    if workers <= 1:
+        for item in items:
+            yield func(item, *args)
+        return
+    # 子进程需要初始化 Django（spawn 启动方式下不会继承父进程的状态）
+    with ProcessPoolExecutor(max_workers=workers, initializer=django.setup) as pool:
+        pending = deque()
+        for item in items:
+            pending.append(pool.submit(func, item, *args))
+            # 限制已提交未取走的块数，避免读取速度快于写入时占满内存
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+class Checkpoint:
+    """
+    导入进度文件（JSON），默认与 CSV 同目录：<文件名>.checkpoint.json
+    记录文件大小与修改时间，文件变化后不能继续
+    """
+
+    def __init__(self, source: str, path: str | None = None):
+        self.source = Path(source)
+        self.path = Path(path) if path else self.source.with_name(self.source.name + '.checkpoint.json')
+
+    def _signature(self) -> dict:
+        stat = self.source.stat()
+        return {'source': str(self.source.resolve()), 'size': stat.st_size, 'mtime': stat.st_mtime}
+
+    def load(self) -> dict | None:
+        """读取进度，不存在时返回 None；CSV 已变化时抛出 ValueError"""
+        try:
+            data = json.loads(self.path.read_text(encoding='utf-8'))
+        except FileNotFoundError:
+            return None
+        if {k: data.get(k) for k in ('source', 'size', 'mtime')} != self._signature():
+            raise ValueError(f"{self.source} 在上次导入后已修改，无法继续，请去掉 --resume 重新导入")
+        return data
+
+    def save(self, line: int, totals: dict) -> None:
+        tmp = self.path.with_name(self.path.name + '.tmp')
+        tmp.write_text(json.dumps({**self._signature(), 'line': line, 'totals': totals}), encoding='utf-8')
+        os.replace(tmp, self.path)
+
+    def clear(self) -> None:
+        self.path.unlink(missing_ok=True)
@@ -0,0 +1,135 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, connection
+from django.utils import timezone
+
+from .grading import grade_exercise, quick_grade
+from .models import Exercise, GradingJob
+
+
+def submit_job(exercise: Exercise, user_answer: str) -> GradingJob:
+    """
+    创建判题任务；本地比较或缓存能直接给出结论时，任务创建即完成，无需排队
+    """
+    quick = quick_grade(exercise, user_answer)
+    if quick is None:
+        return GradingJob.objects.create(exercise=exercise, user_answer=user_answer)
+    now = timezone.now()
+    return GradingJob.objects.create(
+        exercise=exercise,
+        user_answer=user_answer,
+        status=GradingJob.STATUS_DONE,
+        is_correct=quick[0],
+        explanation=quick[1],
+        started_at=now,
+        finished_at=now,
+    )
+
+
+def requeue_stale_jobs() -> int:
+    """worker 异常退出时遗留的 running 任务，超时后重新排队"""
+    stale_after = getattr(settings, 'GRADING_JOB_STALE_AFTER', 120)
+    cutoff = timezone.now() - timedelta(seconds=stale_after)
+    return GradingJob.objects.filter(
+        status=GradingJob.STATUS_RUNNING, started_at__lt=cutoff
+    ).update(status=GradingJob.STATUS_PENDING, started_at=None)
+
+
+def claim_jobs(limit: int) -> list[GradingJob]:
+    """
+    领取至多 limit 个排队任务
+    以 “status=pending 时才更新为 running” 的条件更新实现抢占，多个 worker 进程并存时不会重复领取；
+    等待退避的任务（available_at 在未来）不领取
+    """
+    claimed = []
+    candidates = GradingJob.objects.filter(
+        status=GradingJob.STATUS_PENDING, available_at__lte=timezone.now()
+    ).values_list('pk', flat=True)[:limit * 2]
+    for pk in candidates:
+        updated = GradingJob.objects.filter(pk=pk, status=GradingJob.STATUS_PENDING).update(
+            status=GradingJob.STATUS_RUNNING, started_at=timezone.now()
+        )
+        if updated:
+            claimed.append(pk)
+        if len(claimed) >= limit:
+            break
+    return list(GradingJob.objects.filter(pk__in=claimed).select_related('exercise'))
+
+
+def retry_delay(attempts: int) -> float:
+    """第 attempts 次失败后的等待秒数"""
+    base = getattr(settings, 'GRADING_JOB_RETRY_BASE', 5)
+    return min(getattr(settings, 'GRADING_JOB_RETRY_MAX', 120), base * 2 ** min(attempts - 1, 20))
+
+
+def process_job(job: GradingJob) -> GradingJob:
+    max_attempts = getattr(settings, 'GRADING_JOB_MAX_ATTEMPTS', 3)
+    job.attempts += 1
+    try:
+        is_correct, explanation = grade_exercise(job.exercise, job.user_answer)
+    except Exception as e:
+        is_correct, explanation, job.error = False, '', str(e)
+
+    if explanation:
+        job.status = GradingJob.STATUS_DONE
+        job.is_correct = is_correct
+        job.explanation = explanation
+        job.error = ''
+        job.finished_at = timezone.now()
+    elif job.attempts < max_attempts:
+        # 判题服务暂时不可用，放回队列并按指数退避推后可领取时间，避免熔断期间几秒内耗尽重试次数
+        job.status = GradingJob.STATUS_PENDING
+        job.started_at = None
+        job.available_at = timezone.now() + timedelta(seconds=retry_delay(job.attempts))
+    else:
+        job.status = GradingJob.STATUS_FAILED
+        job.error = job.error or '判题服务暂不可用'
+        job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'is_correct', 'explanation', 'error', 'attempts', 'started_at', 'finished_at', 'available_at'])
+    return job
+
+
+def _run_in_thread(job: GradingJob) -> GradingJob:
+    try:
+        return process_job(job)
+    finally:
+        # 每个线程持有独立的数据库连接，任务结束后释放
+        connection.close()
+
+
+def run_worker_pool(workers: int = 4, poll_interval: float = 0.5, once: bool = False, log=None) -> int:
+    """
+    轮询任务表并交给线程池处理，返回处理的任务数
+    once=True 时处理完当前积压后退出
+    遗留的 running 任务按 GRADING_JOB_REQUEUE_INTERVAL 定时检查，队列持续繁忙时也不会被饿死
+    """
+    processed = 0
+    in_flight = set()
+    requeue_interval = getattr(settings, 'GRADING_JOB_REQUEUE_INTERVAL', 30)
+    last_requeue = time.monotonic()
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='grading') as pool:
+        while True:
+            close_old_connections()
+            if time.monotonic() - last_requeue >= requeue_interval:
+                last_requeue = time.monotonic()
+                requeue_stale_jobs()
+            in_flight = {f for f in in_flight if not f.done()}
+            free = workers - len(in_flight)
+            jobs = claim_jobs(free) if free > 0 else []
+            for job in jobs:
+                in_flight.add(pool.submit(_run_in_thread, job))
+            processed += len(jobs)
+            if jobs and log:
+                log(f"领取 {len(jobs)} 个判题任务，累计 {processed} 个")
+
+            if not jobs:
+                if once and not in_flight:
+                    # 退出前把遗留任务放回队列，等待退避的任务留给常驻 worker
+                    if requeue_stale_jobs():
+                        continue
+                    break
+                time.sleep(poll_interval)
+    return processed
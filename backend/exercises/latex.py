@@ -0,0 +1,97 @@
+"""
+LaTeX 文本的单遍规范化
+每种用途的替换规则合并成一个预编译的多选分支正则，匹配到的片段查表替换，文本只扫描一遍：
+- to_markdown：\\( \\) 换成 $，\\[ \\] 换成 $$，可选在行间公式前后各加一个空行
+  （取代 data/clean.py、data/trans.py、batch_process/trans.py 中按列多次 str.replace 的写法）
+- normalize_for_grading：判题前统一全角字符、间距与尺寸命令、定界符和常见命令别名（见 equivalence.py）
+normalize_csv 逐行读写 CSV，内存占用与文件大小无关。本模块不依赖 Django，batch_process 下的脚本也可直接导入。
+"""
+import csv
+import re
+import unicodedata
+
+# 转义的反斜杠（LaTeX 换行 \\）整体匹配并原样保留，避免把 \\[2pt]、\\( 误当成定界符
+# 带捕获组，split 后奇数位置是匹配到的片段，逐个查表后拼接，比每次匹配调用一次回调更快
+_MARKDOWN_RE = re.compile(r'(\\\\|\\[()\[\]])')
+
+
+def _markdown_table(dollars: bool, display_spacing: bool) -> dict[str, str]:
+    inline_open, inline_close = ('$', '$') if dollars else (r'\(', r'\)')
+    display_open, display_close = ('$$', '$$') if dollars else (r'\[', r'\]')
+    if display_spacing:
+        display_open, display_close = '\n\n' + display_open, display_close + '\n\n'
+    return {'\\\\': '\\\\', r'\(': inline_open, r'\)': inline_close, r'\[': display_open, r'\]': display_close}
+
+
+_MARKDOWN_TABLES = {
+    (dollars, spacing): _markdown_table(dollars, spacing)
+    for dollars in (True, False) for spacing in (True, False)
+}
+
+
+def to_markdown(text: str, *, dollars: bool = True, display_spacing: bool = False) -> str:
+    """
+    转换数学定界符
+    - dollars：\\( \\) → $，\\[ \\] → $$
+    - display_spacing：行间公式前后各加一个空行，便于 Markdown 渲染为独立段落
+    """
+    if not text or '\\' not in text:
+        return text
+    parts = _MARKDOWN_RE.split(text)
+    parts[1::2] = map(_MARKDOWN_TABLES[(dollars, display_spacing)].__getitem__, parts[1::2])
+    return ''.join(parts)
+
+
+_UNICODE_SYMBOLS = {
+    '∪': r'\cup', '∩': r'\cap', '≈': r'\approx', '≤': r'\leq', '≥': r'\geq',
+    '×': r'\times', '·': r'\cdot', '∅': r'\emptyset', '∞': r'\infty', '∣': '|', '−': '-',
+}
+_COMMAND_ALIASES = {
+    r'\dfrac': r'\frac', r'\tfrac': r'\frac', r'\leqslant': r'\leq', r'\geqslant': r'\geq',
+    r'\le': r'\leq', r'\ge': r'\geq', r'\bar': r'\overline', r'\varnothing': r'\emptyset',
+    r'\mid': '|', r'\lbrace': r'\{', r'\rbrace': r'\}',
+}
+_GRADING_TABLE = {
+    **{symbol: f' {command} ' for symbol, command in _UNICODE_SYMBOLS.items()},
+    # 间距命令与不换行空格
+    **{f'\\{c}': ' ' for c in ',;:!> '}, '~': ' ', r'\quad': ' ', r'\qquad': ' ',
+    # 尺寸命令
+    **{f'\\{name}': '' for name in ('left', 'right', 'big', 'Big', 'bigg', 'Bigg')},
+    # 数学定界符
+    r'\(': ' ', r'\)': ' ', r'\[': ' ', r'\]': ' ', '$': ' ',
+    **_COMMAND_ALIASES,
+}
+_GRADING_RE = re.compile(r'\\[a-zA-Z]+|\\[,;:!> ()\[\]]|[~$' + ''.join(_UNICODE_SYMBOLS) + ']')
+
+
+def _grading_token(m: re.Match) -> str:
+    token = m.group()
+    return _GRADING_TABLE.get(token, token)
+
+
+def normalize_for_grading(text: str) -> str:
+    """NFKC 后一遍扫描完成符号、间距、尺寸命令、定界符与命令别名的统一（不去除首尾空白）"""
+    return _GRADING_RE.sub(_grading_token, unicodedata.normalize('NFKC', text or ''))
+
+
+def normalize_csv(src, dst, columns, *, dollars: bool = True, display_spacing: bool = False) -> int:
+    """
+    逐行转换 CSV 中指定列的数学定界符，其他列原样写出，返回行数
+    输入可带 BOM（labeling.py 以 utf-8-sig 写出），输出为 UTF-8
+    """
+    count = 0
+    with open(src, newline='', encoding='utf-8-sig') as fin, open(dst, 'w', newline='', encoding='utf-8') as fout:
+        reader = csv.reader(fin)
+        writer = csv.writer(fout, lineterminator='\n')
+        header = next(reader, None)
+        if header is None:
+            return 0
+        writer.writerow(header)
+        indexes = [header.index(column) for column in columns if column in header]
+        for row in reader:
+            for i in indexes:
+                if i < len(row):
+                    row[i] = to_markdown(row[i], dollars=dollars, display_spacing=display_spacing)
+            writer.writerow(row)
+            count += 1
+    return count
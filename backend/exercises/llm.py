@@ -0,0 +1,216 @@
+"""
+进程级共享的大模型客户端
+- 复用同一个 OpenAI/httpx 客户端，保持长连接，避免每次请求重新握手
+- 每次调用有总截止时间，超时即放弃
+- 对超时、连接错误、限流和 5xx 做有限次数的退避重试（带随机抖动）
+- 熔断器：连续失败达到阈值后在冷却期内直接失败，不再占用 worker
+本模块不依赖 Django，batch_process 下的脚本也可直接导入使用。
+"""
+import os
+import random
+import threading
+import time
+
+import httpx
+from dotenv import load_dotenv
+from openai import (
+    OpenAI,
+    APIConnectionError,
+    APITimeoutError,
+    InternalServerError,
+    RateLimitError,
+)
+
+load_dotenv()
+
+# 可通过环境变量指向本地替身服务（见 run_llm_stub 命令）
+DEFAULT_BASE_URL = os.getenv('DEEPSEEK_BASE_URL', "https://api.deepseek.com")
+DEFAULT_MODEL = "deepseek-chat"
+
+LLM_TIMEOUT = float(os.getenv('LLM_TIMEOUT', '30'))
+LLM_CONNECT_TIMEOUT = float(os.getenv('LLM_CONNECT_TIMEOUT', '5'))
+LLM_MAX_RETRIES = int(os.getenv('LLM_MAX_RETRIES', '2'))
+LLM_BACKOFF_BASE = float(os.getenv('LLM_BACKOFF_BASE', '0.5'))
+LLM_BACKOFF_MAX = float(os.getenv('LLM_BACKOFF_MAX', '4'))
+LLM_MAX_CONNECTIONS = int(os.getenv('LLM_MAX_CONNECTIONS', '20'))
+LLM_BREAKER_THRESHOLD = int(os.getenv('LLM_BREAKER_THRESHOLD', '5'))
+LLM_BREAKER_RESET = float(os.getenv('LLM_BREAKER_RESET', '30'))
+
+RETRYABLE_ERRORS = (APITimeoutError, APIConnectionError, RateLimitError, InternalServerError)
+
+
+class LLMError(Exception):
+    """大模型调用失败"""
+
+
+class LLMUnavailable(LLMError):
+    """熔断器处于打开状态，调用被直接拒绝"""
+
+
+class CircuitBreaker:
+    """
+    简单熔断器
+    - closed：正常放行，连续失败 threshold 次后打开
+    - open：reset_timeout 秒内直接拒绝
+    - half-open：冷却结束后只放行一个试探请求，成功则关闭，失败则重新打开
+    """
+
+    def __init__(self, threshold: int = 5, reset_timeout: float = 30):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: float | None = None
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state()
+
+    def _state(self) -> str:
+        if self._opened_at is None:
+            return 'closed'
+        if time.monotonic() - self._opened_at >= self.reset_timeout:
+            return 'half-open'
+        return 'open'
+
+    def before_call(self) -> None:
+        with self._lock:
+            state = self._state()
+            if state == 'open' or (state == 'half-open' and self._probing):
+                raise LLMUnavailable("LLM circuit breaker is open")
+            if state == 'half-open':
+                self._probing = True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._probing or self._failures >= self.threshold:
+                self._opened_at = time.monotonic()
+            self._probing = False
+
+    def release(self) -> None:
+        """调用未得出上游是否可用的结论（如参数错误）时结束试探，下一个请求重新试探"""
+        with self._lock:
+            self._probing = False
+
+
+_client: OpenAI | None = None
+_client_lock = threading.Lock()
+breaker = CircuitBreaker(LLM_BREAKER_THRESHOLD, LLM_BREAKER_RESET)
+
+
+def get_client() -> OpenAI:
+    """返回进程内共享的客户端（惰性创建，线程安全）"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                http_client = httpx.Client(
+                    limits=httpx.Limits(
+                        max_connections=LLM_MAX_CONNECTIONS,
+                        max_keepalive_connections=LLM_MAX_CONNECTIONS,
+                        keepalive_expiry=60,
+                    ),
+                    timeout=httpx.Timeout(LLM_TIMEOUT, connect=LLM_CONNECT_TIMEOUT),
+                )
+                _client = OpenAI(
+                    api_key=os.getenv('DEEPSEEK_API_KEY'),
+                    base_url=DEFAULT_BASE_URL,
+                    http_client=http_client,
+                    # 重试由本模块统一控制
+                    max_retries=0,
+                )
+    return _client
+
+
+def _backoff(attempt: int) -> float:
+    # full jitter：在 [0, min(max, base * 2^attempt)] 内随机等待
+    return random.uniform(0, min(LLM_BACKOFF_MAX, LLM_BACKOFF_BASE * (2 ** attempt)))
+
+
+def _create(messages: list[dict], model: str, timeout: float, max_retries: int, stream: bool, **kwargs):
+    """带截止时间、重试与熔断的 chat.completions.create"""
+    deadline = time.monotonic() + timeout
+    client = get_client()
+
+    attempt = 0
+    while True:
+        # 先检查截止时间再占用试探名额，避免试探请求未发出就退出
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise LLMError("LLM call deadline exceeded")
+        breaker.before_call()
+        try:
+            return client.chat.completions.create(
+                model=model,
+                messages=messages,
+                stream=stream,
+                timeout=remaining,
+                **kwargs,
+            )
+        except RETRYABLE_ERRORS as e:
+            breaker.record_failure()
+            delay = _backoff(attempt)
+            if attempt >= max_retries or time.monotonic() + delay >= deadline:
+                raise LLMError(str(e)) from e
+            attempt += 1
+            time.sleep(delay)
+        except BaseException as e:
+            # 参数错误、鉴权失败等不可重试，也不计入熔断，但要释放试探名额
+            breaker.release()
+            if not isinstance(e, Exception):
+                raise
+            raise LLMError(str(e)) from e
+
+
+def chat(messages: list[dict], *, model: str = DEFAULT_MODEL, timeout: float | None = None,
+         max_retries: int | None = None, **kwargs) -> str:
+    """
+    发送一次对话补全请求并返回回复文本
+    timeout 为整次调用（含重试）的截止时间，默认 LLM_TIMEOUT
+    失败时抛出 LLMError（熔断时为 LLMUnavailable）
+    """
+    timeout = LLM_TIMEOUT if timeout is None else timeout
+    max_retries = LLM_MAX_RETRIES if max_retries is None else max_retries
+    response = _create(messages, model, timeout, max_retries, stream=False, **kwargs)
+    breaker.record_success()
+    return response.choices[0].message.content or ''
+
+
+def stream_chat(messages: list[dict], *, model: str = DEFAULT_MODEL, timeout: float | None = None,
+                max_retries: int | None = None, **kwargs):
+    """
+    流式对话补全，逐段产出回复文本
+    只在建立连接阶段重试；开始产出内容后出错直接抛出 LLMError。timeout 也约束整个读取过程，
+    每收到一段都检查截止时间，上游缓慢地逐段返回时超出截止时间即放弃
+    熔断器：正常读完记为成功，出错或超时记为失败；客户端中途断开（GeneratorExit）无法说明上游是否可用，
+    不计成败，只结束试探
+    """
+    timeout = LLM_TIMEOUT if timeout is None else timeout
+    max_retries = LLM_MAX_RETRIES if max_retries is None else max_retries
+    deadline = time.monotonic() + timeout
+    stream = _create(messages, model, timeout, max_retries, stream=True, **kwargs)
+    outcome = breaker.record_failure
+    try:
+        for chunk in stream:
+            if time.monotonic() > deadline:
+                raise LLMError("LLM stream deadline exceeded")
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+        outcome = breaker.record_success
+    except GeneratorExit:
+        outcome = breaker.release
+        raise
+    except (*RETRYABLE_ERRORS, httpx.HTTPError) as e:
+        raise LLMError(str(e)) from e
+    finally:
+        stream.close()
+        outcome()
@@ -0,0 +1,230 @@
+"""
+本地 OpenAI 兼容的大模型替身服务，用于在不访问 DeepSeek 的情况下压测判题、标注与易错报告
+- 可配置延迟分布、错误率与固定回复
+- record 模式：把请求转发到真实上游并把回复写入 fixture（JSONL）
+- replay 模式：按请求内容从 fixture 中取回复
+将 DEEPSEEK_BASE_URL 指向本服务即可替换真实接口，见 run_llm_stub 命令。
+本模块不依赖 Django。
+"""
+import hashlib
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+
+
+def parse_latency(spec: str):
+    """
+    解析延迟分布，返回一个无参函数，每次调用得到一次采样（秒）
+    - fixed:0.5
+    - uniform:0.2,1.5
+    - normal:1.0,0.3（均值, 标准差）
+    - lognormal:0,0.5（对数均值, 对数标准差）
+    """
+    kind, _, args = spec.partition(':')
+    params = [float(x) for x in args.split(',') if x]
+    if kind == 'fixed':
+        return lambda: params[0] if params else 0.0
+    if kind == 'uniform':
+        return lambda: random.uniform(params[0], params[1])
+    if kind == 'normal':
+        return lambda: max(0.0, random.gauss(params[0], params[1]))
+    if kind == 'lognormal':
+        return lambda: random.lognormvariate(params[0], params[1])
+    raise ValueError(f"unknown latency distribution: {spec}")
+
+
+def request_key(model: str, messages: list[dict]) -> str:
+    """fixture 的键：模型名与消息内容的摘要"""
+    raw = json.dumps({'model': model, 'messages': messages}, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+def canned_reply(messages: list[dict]) -> str:
+    """按提示词类型给出合法格式的默认回复"""
+    prompt = messages[-1].get('content', '') if messages else ''
+    if '【判定】' in prompt:
+        verdict = random.choice(['正确', '错误'])
+        return f"给出的解答与正确答案逐项比对后，结论为{verdict}。\n【判定】{verdict}"
+    if 'is_correct' in prompt:
+        verdict = random.choice(['true', 'false'])
+        return json.dumps({'is_correct': verdict, 'explanation': '给出的解答与正确答案逐项比对后得出结论。'}, ensure_ascii=False)
+    if 'difficulty' in prompt:
+        return json.dumps({
+            'difficulty': random.choice(['easy', 'medium', 'hard']),
+            'topic': random.choice(['probability', 'distribution', 'expectation']),
+            'hint': '先写出样本空间，再利用概率公式计算。',
+        }, ensure_ascii=False)
+    return "# 近期易错概览\n\n## 核心易错点\n- 条件概率公式使用不当\n\n## 改进建议\n- 先画出事件关系图\n\n## 需要巩固的知识点\n条件概率、全概率公式"
+
+
+class StubConfig:
+    def __init__(self, latency: str = 'fixed:0', token_delay: float = 0.0, error_rate: float = 0.0,
+                 error_statuses: tuple[int, ...] = (500, 429), responses: list[dict] | None = None,
+                 mode: str = 'stub', fixture_path: str | None = None, upstream: str | None = None,
+                 api_key: str | None = None, seed: int | None = None):
+        self.sample_latency = parse_latency(latency)
+        self.token_delay = token_delay
+        self.error_rate = error_rate
+        self.error_statuses = error_statuses
+        # 固定回复规则：[{"match": "提示词中的子串", "content": "回复内容"}]，按顺序匹配
+        self.responses = responses or []
+        self.mode = mode
+        self.fixture_path = fixture_path
+        self.upstream = upstream
+        self.api_key = api_key
+        self.fixtures: dict[str, str] = {}
+        self.lock = threading.Lock()
+        self.stats = {'requests': 0, 'errors': 0, 'replay_misses': 0, 'recorded': 0}
+        if seed is not None:
+            random.seed(seed)
+        if mode == 'replay' and fixture_path:
+            self.load_fixtures()
+
+    def load_fixtures(self) -> None:
+        with open(self.fixture_path, encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    self.fixtures[record['key']] = record['content']
+
+    def record(self, key: str, model: str, messages: list[dict], content: str) -> None:
+        line = json.dumps({'key': key, 'model': model, 'messages': messages, 'content': content}, ensure_ascii=False)
+        with self.lock:
+            with open(self.fixture_path, 'a', encoding='utf-8') as f:
+                f.write(line + '\n')
+            self.fixtures[key] = content
+            self.stats['recorded'] += 1
+
+    def incr(self, name: str) -> None:
+        with self.lock:
+            self.stats[name] += 1
+
+    def reply_for(self, model: str, messages: list[dict]) -> str | None:
+        if self.mode == 'replay':
+            content = self.fixtures.get(request_key(model, messages))
+            if content is None:
+                self.incr('replay_misses')
+            return content
+        if self.mode == 'record':
+            key = request_key(model, messages)
+            if key in self.fixtures:
+                return self.fixtures[key]
+            response = httpx.post(
+                f"{self.upstream.rstrip('/')}/chat/completions",
+                headers={'Authorization': f"Bearer {self.api_key}"},
+                json={'model': model, 'messages': messages, 'stream': False},
+                timeout=120,
+            )
+            response.raise_for_status()
+            content = response.json()['choices'][0]['message']['content'] or ''
+            self.record(key, model, messages, content)
+            return content
+        prompt = messages[-1].get('content', '') if messages else ''
+        for rule in self.responses:
+            if rule.get('match', '') in prompt:
+                return rule['content']
+        return canned_reply(messages)
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    server_version = 'LLMStub/1.0'
+    config: StubConfig
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, payload: dict) -> None:
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path.rstrip('/') in ('/stats', '/v1/stats'):
+            self._send_json(200, self.config.stats)
+        elif self.path.rstrip('/') in ('/models', '/v1/models'):
+            self._send_json(200, {'object': 'list', 'data': [{'id': 'deepseek-chat', 'object': 'model', 'owned_by': 'stub'}]})
+        else:
+            self._send_json(404, {'error': {'message': 'not found'}})
+
+    def do_POST(self):
+        if self.path.rstrip('/') not in ('/chat/completions', '/v1/chat/completions'):
+            self._send_json(404, {'error': {'message': 'not found'}})
+            return
+        config = self.config
+        config.incr('requests')
+        request = json.loads(self.rfile.read(int(self.headers.get('Content-Length') or 0)) or b'{}')
+        model = request.get('model', 'deepseek-chat')
+        messages = request.get('messages', [])
+
+        time.sleep(config.sample_latency())
+        if config.error_rate and random.random() < config.error_rate:
+            config.incr('errors')
+            status = random.choice(config.error_statuses)
+            self._send_json(status, {'error': {'message': 'stub injected error', 'type': 'server_error', 'code': status}})
+            return
+
+        try:
+            content = config.reply_for(model, messages)
+        except httpx.HTTPError as e:
+            config.incr('errors')
+            self._send_json(502, {'error': {'message': f'upstream error: {e}'}})
+            return
+        if content is None:
+            self._send_json(404, {'error': {'message': 'no fixture for this request', 'type': 'invalid_request_error'}})
+            return
+
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        created = int(time.time())
+        if request.get('stream'):
+            self._stream(completion_id, created, model, content)
+            return
+        self._send_json(200, {
+            'id': completion_id,
+            'object': 'chat.completion',
+            'created': created,
+            'model': model,
+            'choices': [{'index': 0, 'finish_reason': 'stop', 'message': {'role': 'assistant', 'content': content}}],
+            'usage': {'prompt_tokens': 0, 'completion_tokens': len(content), 'total_tokens': len(content)},
+        })
+
+    def _stream(self, completion_id: str, created: int, model: str, content: str) -> None:
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.end_headers()
+
+        def chunk(delta: dict, finish_reason=None) -> bytes:
+            payload = {
+                'id': completion_id,
+                'object': 'chat.completion.chunk',
+                'created': created,
+                'model': model,
+                'choices': [{'index': 0, 'delta': delta, 'finish_reason': finish_reason}],
+            }
+            return f"data: {json.dumps(payload, ensure_ascii=False)}\n\n".encode('utf-8')
+
+        self.wfile.write(chunk({'role': 'assistant', 'content': ''}))
+        # 每 4 个字符作为一个 token 推送
+        for i in range(0, len(content), 4):
+            if self.config.token_delay:
+                time.sleep(self.config.token_delay)
+            self.wfile.write(chunk({'content': content[i:i + 4]}))
+            self.wfile.flush()
+        self.wfile.write(chunk({}, 'stop'))
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+
+def make_server(host: str, port: int, config: StubConfig) -> ThreadingHTTPServer:
+    handler = type('ConfiguredStubHandler', (StubHandler,), {'config': config})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
@@ -1,10 +1,28 @@
-import csv
-from django.core.management.base import BaseCommand
+import json
+import time
+from collections import Counter
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+from exercises.cache import verdict_cache
+from exercises.dedup import Deduplicator, backfill_content_hashes
+from exercises.facets import apply_deltas, facet_key, record_added
+from exercises.importing import Checkpoint, map_ordered, parse_chunk, read_chunks
 from exercises.models import Exercise
+from exercises.similarity import add_exercises
+from search.index import index_objects
+
+# 已有题目再次导入时可被 CSV 覆盖的字段
+UPSERT_FIELDS = ('answer', 'difficulty', 'category', 'hint')
 
 
 class Command(BaseCommand):
-    help = "从 CSV 文件批量导入练习题数据"
+    help = (
+        "从 CSV 文件流式导入练习题数据：按块读取、每块一个事务并记录进度；"
+        "已有题目按题面摘要更新，近似重复的题目不导入并输出重复簇"
+    )
 
     def add_arguments(self, parser):
         parser.add_argument(
@@ -13,38 +31,166 @@ class Command(BaseCommand):
             required=True,
             help='CSV 文件路径，例如：--path data/exercises.csv'
         )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='每块的记录数，每块在一个事务中写入'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='解析与计算题面摘要的进程数，写入始终由主进程完成'
+        )
+        parser.add_argument(
+            '--resume',
+            action='store_true',
+            help='从上次中断处继续（读取进度文件，CSV 修改过则不能继续）'
+        )
+        parser.add_argument(
+            '--checkpoint',
+            type=str,
+            help='进度文件路径，默认 <CSV 路径>.checkpoint.json'
+        )
+        parser.add_argument(
+            '--threshold',
+            type=float,
+            default=getattr(settings, 'EXERCISE_DEDUP_THRESHOLD', 0.85),
+            help='近似重复的 MinHash 相似度阈值（0～1）'
+        )
+        parser.add_argument(
+            '--no-near-duplicates',
+            action='store_true',
+            help='只按题面摘要去重，不做近似重复检测'
+        )
+        parser.add_argument(
+            '--latex-to-markdown',
+            action='store_true',
+            help='导入时把 \\( \\) 换成 $、\\[ \\] 换成 $$（未经 data/clean.py 处理的 labeled_quiz.csv 可直接导入）'
+        )
+        parser.add_argument(
+            '--report',
+            type=str,
+            help='把重复簇写入该 JSON 文件'
+        )
 
     def handle(self, *args, **options):
         csv_path = options['path']
-        exercises = []
+        batch_size = max(1, options['batch_size'])
+        near_duplicates = not options['no_near_duplicates']
+        checkpoint = Checkpoint(csv_path, options['checkpoint'])
+
+        totals = Counter()
+        start_line = 0
+        if options['resume']:
+            try:
+                state = checkpoint.load()
+            except ValueError as e:
+                raise CommandError(str(e))
+            if state:
+                start_line = state['line']
+                totals.update(state['totals'])
+                self.stdout.write(self.style.WARNING(f"从第 {start_line} 行之后继续导入"))
+
+        backfilled = backfill_content_hashes()
+        if backfilled:
+            self.stdout.write(f"已为 {backfilled} 道旧题补全题面摘要")
+        dedup = Deduplicator(options['threshold'], near_duplicates=near_duplicates)
+        dedup.load_existing()
+        # 本次新增的题目 id 都大于该值，结束后据此更新相似题索引
+        max_pk_before = Exercise.objects.aggregate(n=Max('pk'))['n'] or 0
 
         self.stdout.write(self.style.WARNING(f"正在读取文件：{csv_path}"))
+        started = time.monotonic()
+        processed = 0
+        chunks = read_chunks(csv_path, batch_size, start_line)
+        for parsed in map_ordered(parse_chunk, chunks, max(1, options['workers']), near_duplicates, options['latex_to_markdown']):
+            try:
+                stats = self.write_chunk(parsed, dedup)
+            except Exception as e:
+                raise CommandError(
+                    f"第 {parsed.first_line}～{parsed.last_line} 行写入失败：{e}；"
+                    f"之前的数据已提交；修正 CSV 后去掉 --resume 重新导入即可，已导入的题目按题面摘要更新，不会重复插入"
+                )
+            totals.update(stats)
+            checkpoint.save(parsed.last_line, dict(totals))
+            for line, reason in parsed.errors:
+                self.stdout.write(self.style.ERROR(f"  第 {line} 行已跳过：{reason}"))
+
+            processed += len(parsed.rows) + len(parsed.errors)
+            elapsed = time.monotonic() - started
+            self.stdout.write(
+                f"已处理至第 {parsed.last_line} 行：新增 {totals['created']}，更新 {totals['updated']}，"
+                f"重复 {totals['duplicates']}，无效 {totals['invalid']}（{processed / max(elapsed, 1e-6):.0f} 条/秒）"
+            )
+
+        if totals['created']:
+            created = Exercise.objects.filter(pk__gt=max_pk_before).only('pk', 'question').iterator(chunk_size=2000)
+            mode = add_exercises(created)
+            self.stdout.write(f"相似题索引：{ {'appended': '已追加新题', 'rebuilt': '已全量重建'}.get(mode, '无变化')}")
+        checkpoint.clear()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"导入完成：新增 {totals['created']} 条，已有题目 {totals['existing']} 条（其中 {totals['updated']} 条有更新），"
+            f"重复 {totals['duplicates']} 条，无效 {totals['invalid']} 条，用时 {time.monotonic() - started:.1f} 秒"
+        ))
+        clusters = dedup.report()
+        if clusters:
+            self.stdout.write(self.style.WARNING(f"本次跳过的重复题目共 {len(clusters)} 个重复簇："))
+            for cluster in clusters:
+                self.stdout.write(f"  [{cluster['representative']}] {cluster['question'][:40]}")
+                for member in cluster['members']:
+                    self.stdout.write(f"    L{member['line']} ({member['similarity']:.2f}) {member['question'][:40]}")
+        if options['report']:
+            with open(options['report'], 'w', encoding='utf-8') as f:
+                json.dump(clusters, f, ensure_ascii=False, indent=2)
+            self.stdout.write(f"重复簇已写入 {options['report']}")
+
+    def write_chunk(self, parsed, dedup: Deduplicator) -> Counter:
+        """在一个事务中写入一块数据，返回该块的计数"""
+        stats = Counter(invalid=len(parsed.errors))
+        exercises = []
+        updates = {}
+        for row in parsed.rows:
+            verdict = dedup.check(row.question, row.line, row.fingerprint)
+            if verdict.kind == 'new':
+                exercises.append(Exercise(question=row.question, content_hash=verdict.content_hash, **row.fields))
+            elif verdict.kind == 'existing':
+                updates[verdict.exercise_id] = row.fields
+            else:
+                stats['duplicates'] += 1
+
+        with transaction.atomic():
+            # bulk_create 不触发信号，手动累加筛选计数
+            created = Exercise.objects.bulk_create(exercises)
+            record_added(created)
+            changed = self.apply_updates(updates)
+            # 全文索引与数据在同一事务中写入
+            index_objects('exercise', created + changed)
+        stats.update(created=len(created), existing=len(updates), updated=len(changed))
+        return stats
 
-        with open(csv_path, newline='', encoding='utf-8') as csvfile:
-            reader = csv.reader(csvfile)
-            header = next(reader)  # 第一行是标题 ['question','answer','difficulty','topic']
-
-            for row in reader:
-                # 确保至少有四列
-                if len(row) < 5:
-                    continue
-
-                question = row[0].strip()
-                answer = row[1].strip()
-                difficulty = row[2].strip() if row[2].strip() in ['easy', 'medium', 'hard'] else 'medium'
-                category = row[3].strip() if row[3].strip() else '未分类'
-                hint = row[4].strip() if row[4].strip() else '无提示内容'
-
-                exercises.append(Exercise(
-                    question=question,
-                    answer=answer,
-                    difficulty=difficulty,
-                    category=category,
-                    hint=hint
-                ))
-
-        if exercises:
-            Exercise.objects.bulk_create(exercises)
-            self.stdout.write(self.style.SUCCESS(f"成功导入 {len(exercises)} 条练习题数据"))
-        else:
-            self.stdout.write(self.style.WARNING("未发现可导入的数据"))
+    def apply_updates(self, updates: dict[int, dict]) -> list[Exercise]:
+        """把 CSV 中的字段写回已有题目，只更新有变化的行，返回更新的题目"""
+        changed = []
+        deltas = Counter()
+        now = timezone.now()
+        for exercise in Exercise.objects.filter(pk__in=list(updates)):
+            fields = updates[exercise.pk]
+            if all(getattr(exercise, name) == value for name, value in fields.items()):
+                continue
+            before = facet_key(exercise)
+            if exercise.answer != fields['answer']:
+                verdict_cache.invalidate(exercise.pk)
+            for name, value in fields.items():
+                setattr(exercise, name, value)
+            # bulk_update 不会自动刷新 auto_now 字段，条件请求的校验值依赖 updated_at
+            exercise.updated_at = now
+            deltas[before] -= 1
+            deltas[facet_key(exercise)] += 1
+            changed.append(exercise)
+        if changed:
+            Exercise.objects.bulk_update(changed, [*UPSERT_FIELDS, 'updated_at'], batch_size=500)
+            apply_deltas(deltas)
+        return changed
@@ -0,0 +1,210 @@
+import difflib
+import hashlib
+from collections import Counter
+from pathlib import Path
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from exercises.cache import verdict_cache
+from exercises.dedup import content_hash
+from exercises.facets import record_added
+from exercises.latex import to_markdown
+from exercises.models import Exercise, QuizSourceFile
+from exercises.quiz_markdown import parse_file
+from exercises.similarity import add_exercises, refresh_exercises
+from search.index import index_objects
+
+
+def answer_digest(answer: str) -> str:
+    return hashlib.sha1(answer.encode('utf-8')).hexdigest()[:16]
+
+
+def previous_order(problems: dict) -> list[str]:
+    """上次导入时各题面摘要在文件中的顺序；早期的记录没有序号，按记录中的先后"""
+    fallback = {key: i for i, key in enumerate(problems)}
+    return sorted(problems, key=lambda key: problems[key][2] if len(problems[key]) > 2 else fallback[key])
+
+
+def edited_problems(old_order: list[str], new_order: list[str]) -> dict[str, str]:
+    """
+    按位置对齐前后两版的题目，返回 {新题面摘要: 旧题面摘要}：
+    两版之间同一位置上一道题消失、另一道新题出现（difflib 的 replace 区段，逐个配对）视为改写了题面
+    """
+    old_keys, new_keys = set(old_order), set(new_order)
+    edited = {}
+    matcher = difflib.SequenceMatcher(None, old_order, new_order, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag != 'replace':
+            continue
+        for old_key, new_key in zip(old_order[i1:i2], new_order[j1:j2]):
+            # 只是挪了位置的题仍按摘要对应，不当作改写
+            if old_key not in new_keys and new_key not in old_keys:
+                edited[new_key] = old_key
+    return edited
+
+
+class Command(BaseCommand):
+    help = (
+        "直接从 quiz_data 的 Markdown（<problem>/<answer>）增量导入练习题："
+        "大小与修改时间未变的文件直接跳过，变化的文件只写入新增或答案有变化的题"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path',
+            type=str,
+            default=str(Path(settings.BASE_DIR).parent / 'batch_process' / 'quiz_data'),
+            help='Markdown 文件所在目录（或单个文件），默认 batch_process/quiz_data'
+        )
+        parser.add_argument(
+            '--category',
+            type=str,
+            default='未分类',
+            help='新题的分类（打标签后可用 import_exercises 按题面摘要更新）'
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='忽略修改时间与摘要，重新解析全部文件'
+        )
+
+    def handle(self, *args, **options):
+        root = Path(options['path'])
+        if root.is_dir():
+            files = sorted(root.glob('*.md'))
+        elif root.is_file():
+            files = [root]
+        else:
+            raise CommandError(f"路径不存在：{root}")
+
+        records = {r.path: r for r in QuizSourceFile.objects.filter(path__in=[str(f.resolve()) for f in files])}
+        totals = Counter()
+        created_all = []
+        edited_all = []
+        for file in files:
+            path = str(file.resolve())
+            stat = file.stat()
+            record = records.get(path)
+            if record and not options['force'] and record.size == stat.st_size and record.mtime == stat.st_mtime:
+                totals['skipped_files'] += 1
+                continue
+            digest, problems = parse_file(file)
+            if record and not options['force'] and record.content_hash == digest:
+                # 只是修改时间变了
+                QuizSourceFile.objects.filter(pk=record.pk).update(size=stat.st_size, mtime=stat.st_mtime)
+                totals['skipped_files'] += 1
+                continue
+
+            with transaction.atomic():
+                stats, mapping, created, edited = self.import_file(file.name, problems, record, options['category'])
+                QuizSourceFile.objects.update_or_create(path=path, defaults={
+                    'size': stat.st_size, 'mtime': stat.st_mtime, 'content_hash': digest, 'problems': mapping,
+                })
+            created_all.extend(created)
+            edited_all.extend(edited)
+            totals.update(stats)
+            totals['changed_files'] += 1
+            self.stdout.write(
+                f"{file.name}：{len(problems)} 题，新增 {stats['created']}，改写题面 {stats['edited']}，更新答案 {stats['updated']}，"
+                f"未变 {stats['unchanged']}，已关联已有题目 {stats['linked']}，文件中已移除 {stats['removed']}"
+            )
+
+        if created_all:
+            mode = add_exercises(created_all)
+            self.stdout.write(f"相似题索引：{ {'appended': '已追加新题', 'rebuilt': '已全量重建'}.get(mode, '无变化')}")
+        if edited_all:
+            # bulk_update 不触发信号，改写了题面的题手动刷新相似题索引
+            refresh_exercises(edited_all)
+        self.stdout.write(self.style.SUCCESS(
+            f"处理 {totals['changed_files']} 个有变化的文件（跳过 {totals['skipped_files']} 个未变化的文件）："
+            f"新增 {totals['created']} 题，改写题面 {totals['edited']} 题，更新答案 {totals['updated']} 题"
+        ))
+        if totals['removed']:
+            self.stdout.write(self.style.WARNING(
+                f"有 {totals['removed']} 道题已从源文件中移除，数据库中的题目未删除，如需删除请在管理后台处理"
+            ))
+
+    def import_file(self, name: str, problems, record: QuizSourceFile | None, category: str):
+        """
+        导入一个文件中新增、改写了题面或答案有变化的题目
+        题面摘要没有对应记录的题，若在文件中的位置上原来是一道已不存在的题，视为改写题面，原地更新原题（保留用户的标注与归档）
+        返回 (计数, 新的题目摘要表 {题面摘要: [练习题 id, 答案摘要, 序号]}, 新建的题目, 改写了题面的题目 id)
+        """
+        previous = record.problems if record else {}
+        entries = {}  # 题面摘要 -> (题目, 答案)
+        for problem in problems:
+            question = to_markdown(problem.question)
+            key = content_hash(question)
+            if key in entries:
+                self.stdout.write(self.style.WARNING(f"  {name} 第 {problem.line} 行：与文件中前面的题目重复，已忽略"))
+                continue
+            entries[key] = (question, to_markdown(problem.answer))
+        edited = edited_problems(previous_order(previous), list(entries))
+
+        # 上次导入的题目可能已在后台删除，这些题按新题处理
+        known = [previous[k][0] for k in entries if k in previous] + [previous[k][0] for k in edited.values()]
+        alive = set(Exercise.objects.filter(pk__in=known).values_list('pk', flat=True))
+        stats = Counter()
+        mapping = {}
+        answers = {}  # 练习题 id -> 新答案
+        questions = {}  # 练习题 id -> (改写后的题面, 题面摘要)
+        rewritten = set()  # 已原地改写的旧题面摘要
+        pending = {}  # 题面摘要 -> 待新建的 Exercise
+        for key, (question, answer) in entries.items():
+            digest = answer_digest(answer)
+            if key in previous and previous[key][0] in alive:
+                pk, old_digest = previous[key][:2]
+                mapping[key] = [pk, digest]
+                if old_digest == digest:
+                    stats['unchanged'] += 1
+                else:
+                    answers[pk] = answer
+                continue
+            # 其他文件或 CSV 已导入过同一道题时关联到该题，不重复插入
+            pk = Exercise.objects.filter(content_hash=key).order_by('pk').values_list('pk', flat=True).first()
+            if pk is not None:
+                mapping[key] = [pk, digest]
+                answers[pk] = answer
+                stats['linked'] += 1
+            elif key in edited and previous[edited[key]][0] in alive:
+                pk = previous[edited[key]][0]
+                mapping[key] = [pk, digest]
+                questions[pk] = (question, key)
+                answers[pk] = answer
+                rewritten.add(edited[key])
+            else:
+                pending[key] = Exercise(
+                    question=question, answer=answer, explanation='', hint='无提示内容',
+                    difficulty='medium', category=category, content_hash=key,
+                )
+                mapping[key] = [None, digest]
+
+        # bulk_create 不触发信号，手动累加筛选计数
+        created = Exercise.objects.bulk_create(list(pending.values()))
+        record_added(created)
+        for key, exercise in pending.items():
+            mapping[key][0] = exercise.pk
+        for i, key in enumerate(mapping):
+            mapping[key].append(i)
+
+        changed = []
+        now = timezone.now()
+        for exercise in Exercise.objects.filter(pk__in=list(answers)):
+            if exercise.pk not in questions and exercise.answer == answers[exercise.pk]:
+                continue
+            if exercise.pk in questions:
+                exercise.question, exercise.content_hash = questions[exercise.pk]
+            exercise.answer = answers[exercise.pk]
+            # bulk_update 不会自动刷新 auto_now 字段
+            exercise.updated_at = now
+            verdict_cache.invalidate(exercise.pk)
+            changed.append(exercise)
+        Exercise.objects.bulk_update(changed, ['question', 'content_hash', 'answer', 'updated_at'])
+        index_objects('exercise', created + changed)
+
+        stats.update(
+            created=len(created), edited=len(questions), updated=len(changed) - len(questions),
+            removed=len(set(previous) - set(mapping) - rewritten),
+        )
+        return stats, mapping, created, list(questions)
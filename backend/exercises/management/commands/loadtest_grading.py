@@ -0,0 +1,60 @@
+import random
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from exercises.grading import grade_exercise
+from exercises.models import Exercise
+from exercises.utils import call_deepseek_api, generate_error_report
+
+
+class Command(BaseCommand):
+    help = "对判题链路做并发压测，输出吞吐量与延迟分位数（建议配合 run_llm_stub 使用）"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help='请求总数')
+        parser.add_argument('--concurrency', type=int, default=16, help='并发数')
+        parser.add_argument(
+            '--target',
+            choices=['llm', 'grade', 'report'],
+            default='llm',
+            help='llm：直接调用 call_deepseek_api；grade：完整判题链路（含本地比较与缓存）；report：易错报告生成'
+        )
+        parser.add_argument('--seed', type=int, default=0, help='随机种子')
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        exercises = list(Exercise.objects.only('id', 'question', 'answer')[:500])
+        if not exercises and options['target'] != 'report':
+            raise CommandError('题库为空，请先导入练习题')
+
+        def one(_):
+            exercise = rng.choice(exercises) if exercises else None
+            started = time.perf_counter()
+            try:
+                if options['target'] == 'llm':
+                    ok = bool(call_deepseek_api(exercise.question, str(rng.randint(0, 9)), exercise.answer)[1])
+                elif options['target'] == 'grade':
+                    ok = bool(grade_exercise(exercise, str(rng.randint(0, 9)))[1])
+                else:
+                    ok = bool(generate_error_report([{'explanation': '条件概率公式使用错误'}] * 5))
+            finally:
+                connection.close()
+            return time.perf_counter() - started, ok
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+            results = list(pool.map(one, range(options['requests'])))
+        elapsed = time.perf_counter() - started
+
+        latencies = sorted(r[0] for r in results)
+        failures = sum(1 for r in results if not r[1])
+        quantiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+        self.stdout.write(self.style.SUCCESS(
+            f"请求 {len(results)} 个，失败 {failures} 个，耗时 {elapsed:.2f}s，吞吐 {len(results) / elapsed:.1f} req/s\n"
+            f"延迟 p50={quantiles[49] * 1000:.0f}ms p95={quantiles[94] * 1000:.0f}ms "
+            f"p99={quantiles[98] * 1000:.0f}ms max={latencies[-1] * 1000:.0f}ms"
+        ))
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from exercises.facets import rebuild_facets
+
+
+class Command(BaseCommand):
+    help = "按练习题表重新统计分类/难度计数（数据被绕过信号批量修改后运行）"
+
+    def handle(self, *args, **options):
+        rows = rebuild_facets()
+        self.stdout.write(self.style.SUCCESS(f"已重建 {rows} 条计数"))
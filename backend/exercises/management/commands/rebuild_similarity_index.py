@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from exercises.similarity import index_dir, rebuild
+
+
+class Command(BaseCommand):
+    help = "全量重建相似题索引（修改或删除大量题目后运行；import_exercises 会自动追加新题）"
+
+    def handle(self, *args, **options):
+        count = rebuild()
+        self.stdout.write(self.style.SUCCESS(f"已索引 {count} 道题，保存在 {index_dir()}"))
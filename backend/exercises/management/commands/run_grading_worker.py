@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+from exercises.jobs import run_worker_pool
+
+
+class Command(BaseCommand):
+    help = "启动本地判题 worker 池，处理 /api/exercise/check/jobs/ 提交的异步判题任务"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=4,
+            help='并发判题线程数，例如：--workers 8'
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=0.5,
+            help='队列为空时的轮询间隔（秒）'
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='处理完当前积压的任务后退出'
+        )
+
+    def handle(self, *args, **options):
+        workers = max(1, options['workers'])
+        self.stdout.write(self.style.WARNING(f"判题 worker 已启动，并发数：{workers}"))
+        try:
+            processed = run_worker_pool(
+                workers=workers,
+                poll_interval=options['poll_interval'],
+                once=options['once'],
+                log=self.stdout.write,
+            )
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.WARNING("判题 worker 已停止"))
+            return
+        self.stdout.write(self.style.SUCCESS(f"共处理 {processed} 个判题任务"))
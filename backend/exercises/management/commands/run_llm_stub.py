@@ -0,0 +1,69 @@
+import json
+import os
+from django.core.management.base import BaseCommand, CommandError
+from exercises.llm_stub import StubConfig, make_server
+
+
+class Command(BaseCommand):
+    help = "启动本地 OpenAI 兼容的大模型替身服务，用于离线压测（设置 DEEPSEEK_BASE_URL=http://127.0.0.1:<port> 后生效）"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', type=str, default='127.0.0.1', help='监听地址')
+        parser.add_argument('--port', type=int, default=8765, help='监听端口')
+        parser.add_argument(
+            '--latency',
+            type=str,
+            default='fixed:0',
+            help='延迟分布：fixed:0.5 / uniform:0.2,1.5 / normal:1.0,0.3 / lognormal:0,0.5'
+        )
+        parser.add_argument('--token-delay', type=float, default=0.0, help='流式输出时每个 token 的间隔（秒）')
+        parser.add_argument('--error-rate', type=float, default=0.0, help='注入错误的概率（0~1）')
+        parser.add_argument('--error-status', type=str, default='500,429', help='注入错误时使用的状态码，逗号分隔')
+        parser.add_argument(
+            '--responses',
+            type=str,
+            help='固定回复规则文件（JSON 列表：[{"match": "提示词子串", "content": "回复"}]）'
+        )
+        parser.add_argument('--record', type=str, help='record 模式：转发到真实上游并把回复追加写入该 fixture 文件')
+        parser.add_argument('--replay', type=str, help='replay 模式：只从该 fixture 文件读取回复')
+        parser.add_argument('--upstream', type=str, default='https://api.deepseek.com', help='record 模式下的真实上游地址')
+        parser.add_argument('--seed', type=int, help='随机种子，便于复现延迟与错误序列')
+
+    def handle(self, *args, **options):
+        if options['record'] and options['replay']:
+            raise CommandError('--record 与 --replay 不能同时使用')
+
+        responses = None
+        if options['responses']:
+            with open(options['responses'], encoding='utf-8') as f:
+                responses = json.load(f)
+
+        mode = 'record' if options['record'] else 'replay' if options['replay'] else 'stub'
+        try:
+            config = StubConfig(
+                latency=options['latency'],
+                token_delay=options['token_delay'],
+                error_rate=options['error_rate'],
+                error_statuses=tuple(int(s) for s in options['error_status'].split(',') if s),
+                responses=responses,
+                mode=mode,
+                fixture_path=options['record'] or options['replay'],
+                upstream=options['upstream'],
+                api_key=os.getenv('DEEPSEEK_API_KEY'),
+                seed=options['seed'],
+            )
+        except (ValueError, IndexError) as e:
+            raise CommandError(f'参数错误：{e}')
+
+        server = make_server(options['host'], options['port'], config)
+        self.stdout.write(self.style.SUCCESS(
+            f"大模型替身服务已启动（{mode} 模式）：http://{options['host']}:{options['port']}，"
+            f"统计信息见 /stats"
+        ))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            self.stdout.write(self.style.WARNING(f"已停止，统计：{config.stats}"))
@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 from courses.models import Chapter
 
 
@@ -18,11 +19,149 @@ class Exercise(models.Model):
     category = models.CharField(max_length=100, verbose_name="分类")
     chapter = models.ForeignKey(Chapter, on_delete=models.SET_NULL, null=True, blank=True, verbose_name="所属章节")
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="创建时间")
+    updated_at = models.DateTimeField(auto_now=True, db_index=True, verbose_name="更新时间")
+    # 归一化题面的 SHA-256，导入时据此判断是否为已有题目（见 dedup.py）
+    content_hash = models.CharField(max_length=64, blank=True, default='', db_index=True, editable=False, verbose_name="题面摘要")
 
     class Meta:
         verbose_name = "练习题"
         verbose_name_plural = "练习题"
         ordering = ['-created_at']
+        indexes = [
+            # 列表页按创建时间倒序；带上 id 以便游标分页按 (created_at, id) 顺序读取
+            models.Index(fields=['-created_at', '-id'], name='exercise_created_idx'),
+            # search：只按 category 过滤
+            models.Index(fields=['category', '-created_at', '-id'], name='exercise_cat_idx'),
+            # search：category + difficulty__in
+            models.Index(fields=['category', 'difficulty', '-created_at', '-id'], name='exercise_cat_diff_idx'),
+            # search：只按 difficulty 过滤
+            models.Index(fields=['difficulty', '-created_at', '-id'], name='exercise_diff_idx'),
+            # 随机练习：在 (分类, 难度) 桶内按主键顺序取第 r 道可选的题
+            models.Index(fields=['category', 'difficulty', 'id'], name='exercise_sample_idx'),
+        ]
 
     def __str__(self):
         return f"{self.category} - {self.question[:50]}..."
+
+
+class VerdictCacheEntry(models.Model):
+    """判题结果缓存（数据库层，所有 worker 共享）"""
+    exercise = models.ForeignKey(Exercise, on_delete=models.CASCADE, related_name='verdict_cache_entries', verbose_name="练习题")
+    answer_revision = models.CharField(max_length=16, verbose_name="答案版本")
+    answer_key = models.CharField(max_length=64, verbose_name="答案摘要")
+    user_answer = models.TextField(verbose_name="归一化用户答案")
+    is_correct = models.BooleanField(verbose_name="是否正确")
+    explanation = models.TextField(blank=True, verbose_name="解释")
+    hits = models.PositiveIntegerField(default=0, verbose_name="命中次数")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="创建时间")
+
+    class Meta:
+        verbose_name = "判题缓存"
+        verbose_name_plural = "判题缓存"
+        unique_together = ('exercise', 'answer_revision', 'answer_key')
+
+    def __str__(self):
+        return f"{self.exercise_id} - {self.user_answer[:30]}"
+
+    def is_expired(self, ttl: float) -> bool:
+        return (timezone.now() - self.created_at).total_seconds() > ttl
+
+
+class GradingJob(models.Model):
+    """异步判题任务，由 run_grading_worker 启动的 worker 池处理"""
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, '排队中'),
+        (STATUS_RUNNING, '判题中'),
+        (STATUS_DONE, '已完成'),
+        (STATUS_FAILED, '失败'),
+    ]
+
+    exercise = models.ForeignKey(Exercise, on_delete=models.CASCADE, related_name='grading_jobs', verbose_name="练习题")
+    user_answer = models.TextField(verbose_name="用户答案")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING, verbose_name="状态")
+    is_correct = models.BooleanField(null=True, blank=True, verbose_name="是否正确")
+    explanation = models.TextField(blank=True, default='', verbose_name="解释")
+    error = models.TextField(blank=True, default='', verbose_name="错误信息")
+    attempts = models.PositiveIntegerField(default=0, verbose_name="尝试次数")
+    # 早于该时间不会被领取，失败重试时按退避时间推后
+    available_at = models.DateTimeField(default=timezone.now, verbose_name="可领取时间")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="创建时间")
+    started_at = models.DateTimeField(null=True, blank=True, verbose_name="开始时间")
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name="完成时间")
+
+    class Meta:
+        verbose_name = "判题任务"
+        verbose_name_plural = "判题任务"
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+            models.Index(fields=['status', 'available_at']),
+        ]
+
+    def __str__(self):
+        return f"GradingJob({self.pk}, {self.status})"
+
+
+class GradingLease(models.Model):
+    """跨 worker 的判题租约：同一 (题目, 答案) 同时只有一个 worker 调用大模型"""
+    key = models.CharField(max_length=128, unique=True, verbose_name="键")
+    owner = models.CharField(max_length=100, verbose_name="持有者")
+    expires_at = models.DateTimeField(verbose_name="过期时间")
+
+    class Meta:
+        verbose_name = "判题租约"
+        verbose_name_plural = "判题租约"
+
+    def __str__(self):
+        return f"{self.key} ({self.owner})"
+
+
+class ExerciseFacet(models.Model):
+    """
+    (章节, 分类, 难度) 维度的题目计数，随练习题增删改增量维护，供筛选项展示数量
+    chapter 为空表示未归属章节的题目
+    """
+    chapter = models.ForeignKey(Chapter, on_delete=models.CASCADE, null=True, blank=True, related_name='exercise_facets', verbose_name="所属章节")
+    category = models.CharField(max_length=100, verbose_name="分类")
+    difficulty = models.CharField(max_length=10, choices=Exercise.DIFFICULTY_CHOICES, verbose_name="难度")
+    count = models.IntegerField(default=0, verbose_name="题目数")
+
+    class Meta:
+        verbose_name = "题目计数"
+        verbose_name_plural = "题目计数"
+        constraints = [
+            models.UniqueConstraint(fields=['chapter', 'category', 'difficulty'], name='exercise_facet_unique'),
+            # NULL 不参与唯一约束，未归属章节的计数单独约束
+            models.UniqueConstraint(
+                fields=['category', 'difficulty'],
+                condition=models.Q(chapter__isnull=True),
+                name='exercise_facet_unique_no_chapter',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.chapter_id} - {self.category} - {self.difficulty}: {self.count}"
+
+
+class QuizSourceFile(models.Model):
+    """
+    已导入的 quiz_data Markdown 文件，供 import_quiz_markdown 增量导入
+    problems 记录 {题面摘要: [练习题 id, 答案摘要, 在文件中的序号]}，文件变化时只处理新增、改写或答案有变化的题
+    """
+    path = models.CharField(max_length=500, unique=True, verbose_name="文件路径")
+    size = models.BigIntegerField(verbose_name="文件大小")
+    mtime = models.FloatField(verbose_name="修改时间")
+    content_hash = models.CharField(max_length=64, verbose_name="内容摘要")
+    problems = models.JSONField(default=dict, verbose_name="题目摘要")
+    imported_at = models.DateTimeField(auto_now=True, verbose_name="导入时间")
+
+    class Meta:
+        verbose_name = "题库源文件"
+        verbose_name_plural = "题库源文件"
+
+    def __str__(self):
+        return self.path
@@ -1,13 +1,137 @@
-from rest_framework.pagination import PageNumberPagination
+import base64
+import hashlib
+from datetime import datetime
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class ExerciseCursorPagination(BasePagination):
+    """
+    基于 (created_at, id) 的游标分页（keyset）
+    - 按 created_at 倒序、id 倒序排列，id 保证同一时刻创建的题目顺序也确定
+    - 翻页条件为 (created_at, id) < 游标，不使用 OFFSET，深翻页与首页同样快；翻页期间插入新题不会造成重复或遗漏
+    - 默认不返回总数；?count=approx 返回近似总数（短期缓存），?count=exact 返回精确总数
+    """
+    page_size = 10
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    invalid_cursor_message = '无效的游标'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.count = self.get_count(queryset, request.query_params.get(self.count_query_param))
+
+        position = self.decode_cursor(request.query_params.get(self.cursor_query_param))
+        self.reverse = position is not None and position[2] == 'p'
+        queryset = queryset.order_by('created_at', 'id') if self.reverse else queryset.order_by('-created_at', '-id')
+        if position is not None:
+            created_at, pk, _ = position
+            # 写成 created_at <= c AND (created_at < c OR id < pk)，使数据库能在索引上做范围扫描
+            if self.reverse:
+                queryset = queryset.filter(Q(created_at__gte=created_at), Q(created_at__gt=created_at) | Q(id__gt=pk))
+            else:
+                queryset = queryset.filter(Q(created_at__lte=created_at), Q(created_at__lt=created_at) | Q(id__lt=pk))
+
+        # 多取一条，用于判断这一方向上是否还有数据
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if self.reverse:
+            results.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+        self.page = results
+        return results
+
+    def get_paginated_response(self, data):
+        payload = {'next': self.get_next_link(), 'previous': self.get_previous_link(), 'results': data}
+        if self.count is not None:
+            payload['count'] = self.count[0]
+            payload['count_approximate'] = self.count[1]
+        return Response(payload)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.link_for(self.page[-1], 'n')
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.link_for(self.page[0], 'p')
+
+    def link_for(self, exercise, direction: str) -> str:
+        return replace_query_param(self.base_url, self.cursor_query_param, self.encode_cursor(exercise, direction))
+
+    @staticmethod
+    def encode_cursor(exercise, direction: str) -> str:
+        raw = f"{exercise.created_at.isoformat()}|{exercise.pk}|{direction}"
+        return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+    def decode_cursor(self, encoded: str | None):
+        """返回 (created_at, id, 方向)；游标为空表示第一页"""
+        if not encoded:
+            return None
+        try:
+            raw = base64.urlsafe_b64decode(encoded + '=' * (-len(encoded) % 4)).decode('utf-8')
+            created_at, pk, direction = raw.split('|')
+            if direction not in ('n', 'p'):
+                raise ValueError(direction)
+            return datetime.fromisoformat(created_at), int(pk), direction
+        except (ValueError, UnicodeDecodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_count(self, queryset, mode: str | None) -> tuple[int, bool] | None:
+        """返回 (总数, 是否近似)"""
+        if mode == 'exact':
+            return queryset.count(), False
+        if mode != 'approx':
+            return None
+        queryset = queryset.order_by()
+        if not queryset.query.where and connection.vendor == 'postgresql':
+            # 无过滤条件时直接读取统计信息中的行数估计
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                               [queryset.model._meta.db_table])
+                row = cursor.fetchone()
+            if row and row[0] >= 0:
+                return int(row[0]), True
+        # 其他情况使用短期缓存的 COUNT(*)，同一筛选条件在缓存期内只计数一次
+        digest = hashlib.sha1(str(queryset.query).encode('utf-8')).hexdigest()
+        ttl = getattr(settings, 'EXERCISE_APPROX_COUNT_TTL', 60)
+        return cache.get_or_set(f'exercise-count:{digest}', queryset.count, ttl), True
 
 
 class ExercisePagination(PageNumberPagination):
     """
     练习题分页配置：固定每页数量，支持通过 `?page=` 指定页码。
     如需前端可控每页数量，可开放 page_size_query_param。
+    请求中带 `?cursor=`（首页可为空值）时改用游标分页，见 ExerciseCursorPagination。
     """
     page_size = 10  # 固定每页 10 条
     page_query_param = 'page'
     # 如果想让前端控制每页数量，可取消下方注释
     # page_size_query_param = 'page_size'
     # max_page_size = 100
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_paginator = None
+        if ExerciseCursorPagination.cursor_query_param in request.query_params:
+            self.cursor_paginator = ExerciseCursorPagination()
+            self.cursor_paginator.page_size = self.page_size
+            return self.cursor_paginator.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
@@ -0,0 +1,71 @@
+"""
+batch_process/quiz_data 中习题 Markdown 的流式解析
+文件格式：
+    <problem>
+    题目……
+    <problem/>
+    <answer>
+    答案……
+    <answer/>
+逐行读取，同时计算整个文件的 SHA-256；标签既可以单独成行，也可以与内容写在同一行，
+结束标签写作 <problem/> 或 </problem> 均可。题目或答案为空的条目被忽略。
+"""
+import hashlib
+import re
+from dataclasses import dataclass
+
+_TAG_RE = re.compile(r'<(/?)(problem|answer)(/?)>')
+
+
+@dataclass
+class Problem:
+    line: int  # <problem> 所在行号
+    question: str
+    answer: str
+
+
+def iter_problems(lines):
+    """从逐行文本中依次产出 Problem"""
+    section = None  # None / problem / answer
+    start_line = 0
+    buffers = {'problem': [], 'answer': []}
+    question = None
+    for number, line in enumerate(lines, start=1):
+        pos = 0
+        for m in _TAG_RE.finditer(line):
+            if section is not None:
+                buffers[section].append(line[pos:m.start()])
+            pos = m.end()
+            closing, tag = bool(m.group(1) or m.group(3)), m.group(2)
+            if not closing:
+                if tag == 'problem':
+                    start_line = number
+                    buffers = {'problem': [], 'answer': []}
+                    question = None
+                section = tag
+            elif tag == section:
+                section = None
+                text = ''.join(buffers[tag]).strip()
+                if tag == 'problem':
+                    question = text
+                elif question:
+                    if text:
+                        yield Problem(start_line, question, text)
+                    question = None
+        if section is not None:
+            buffers[section].append(line[pos:])
+
+
+def _read_lines(path, digest):
+    with open(path, 'rb') as f:
+        for i, raw in enumerate(f):
+            digest.update(raw)
+            line = raw.decode('utf-8')
+            yield line.lstrip('\ufeff') if i == 0 else line
+
+
+def parse_file(path) -> tuple[str, list[Problem]]:
+    """读一遍文件，同时计算摘要并解析，返回 (SHA-256, 题目列表)"""
+    digest = hashlib.sha256()
+    problems = list(iter_problems(_read_lines(path, digest)))
+    return digest.hexdigest(), problems
@@ -0,0 +1,21 @@
+import json
+from rest_framework.renderers import BaseRenderer
+
+
+def format_event(event: str, data) -> bytes:
+    """按 text/event-stream 格式编码一条事件"""
+    payload = json.dumps(data, ensure_ascii=False)
+    return f"event: {event}\ndata: {payload}\n\n".encode('utf-8')
+
+
+class EventStreamRenderer(BaseRenderer):
+    """
+    Server-Sent Events 渲染器
+    正常情况下视图直接返回 StreamingHttpResponse，这里只负责把参数错误等普通响应渲染成一条 error 事件
+    """
+    media_type = 'text/event-stream'
+    format = 'event-stream'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return format_event('error', data)
@@ -0,0 +1,72 @@
+import random
+from collections import defaultdict
+
+from django.db.models import Sum
+
+from .models import Exercise, ExerciseFacet
+
+MAX_SAMPLE_SIZE = 50
+
+
+def excluded_exercise_ids(profile, exclude=('archived',)) -> set[int]:
+    """用户要跳过的题目 id（已归档，以及可选的已标注），按 profile 索引读取，通常只有几百道"""
+    from users.models import ArchivedExercise, LabeledExercise
+    excluded_models = {'archived': ArchivedExercise, 'labeled': LabeledExercise}
+    ids = set()
+    for name in exclude:
+        ids.update(excluded_models[name].objects.filter(profile=profile).values_list('exercise_id', flat=True))
+    return ids
+
+
+def sample_exercises(n: int, *, category: str | None = None, difficulties=None, profile=None,
+                     exclude=('archived',), seed: int | None = None) -> list[Exercise]:
+    """
+    在所有可选的题中等概率、不放回地随机抽取至多 n 道题，跳过用户已归档（以及可选的已标注）的题目
+    - 分桶：各 (分类, 难度) 桶的可选题数 = ExerciseFacet 计数 − 用户跳过的题中属于该桶的数量，按可选题数加权选桶
+    - 桶内按名次抽样：在 [0, 可选题数) 中均匀取名次 r，沿 (category, difficulty, id) 索引按 id 顺序
+      跳过 r 道可选的题取下一道（OFFSET），与 id 是否连续、其他桶的题如何穿插无关
+    每次抽取是一次索引范围扫描，扫描长度不超过桶内题数，不对全表排序；用户跳过的题与已抽中的题以 NOT IN 排除。
+    计数表与实际不符、名次超出桶内实际题数时，用 COUNT 重新统计该桶后重抽。
+    同一 seed 在数据不变时得到相同结果。
+    """
+    buckets = ExerciseFacet.objects.filter(count__gt=0)
+    if category:
+        buckets = buckets.filter(category=category)
+    if difficulties:
+        buckets = buckets.filter(difficulty__in=difficulties)
+    available = {
+        (row['category'], row['difficulty']): row['n']
+        for row in buckets.values('category', 'difficulty').annotate(n=Sum('count')).order_by('category', 'difficulty')
+    }
+
+    skipped: dict[tuple[str, str], list[int]] = defaultdict(list)  # 桶 -> 不可再选的题 id（用户跳过的与已抽中的）
+    excluded = excluded_exercise_ids(profile, exclude) if profile is not None else set()
+    if excluded:
+        rows = Exercise.objects.filter(pk__in=excluded).values_list('pk', 'category', 'difficulty')
+        for pk, *bucket in rows.order_by('pk'):
+            bucket = tuple(bucket)
+            if bucket in available:
+                skipped[bucket].append(pk)
+                available[bucket] -= 1
+
+    rng = random.Random(seed)
+    chosen: list[int] = []
+    while len(chosen) < n:
+        keys = [k for k in available if available[k] > 0]
+        if not keys:
+            break
+        bucket = rng.choices(keys, weights=[available[k] for k in keys])[0]
+        rank = rng.randrange(available[bucket])
+        candidates = (Exercise.objects.filter(category=bucket[0], difficulty=bucket[1])
+                      .exclude(pk__in=skipped[bucket]).order_by('pk').values_list('pk', flat=True))
+        pk = next(iter(candidates[rank:rank + 1]), None)
+        if pk is None:
+            # 计数偏大（计数表尚未修正），按实际可选题数重抽
+            available[bucket] = candidates.count()
+            continue
+        chosen.append(pk)
+        skipped[bucket].append(pk)
+        available[bucket] -= 1
+
+    found = Exercise.objects.in_bulk(chosen)
+    return [found[pk] for pk in chosen if pk in found]
@@ -1,13 +1,33 @@
 from rest_framework import serializers
-from .models import Exercise
+from .models import Exercise, GradingJob
 
 
-class ExerciseSerializer(serializers.ModelSerializer):
+class DynamicFieldsMixin:
+    """支持通过 fields 参数只输出部分字段，例如 ExerciseSerializer(qs, many=True, fields=['id', 'question'])"""
+
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+class ExerciseSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    # 练习模式（?mode=practice）只返回题面，答案、解释、提示通过 /exercise/{id}/solution/ 按需获取
+    PRACTICE_FIELDS = ['id', 'question', 'options', 'difficulty', 'category', 'chapter', 'created_at']
+
     class Meta:
         model = Exercise
         fields = ['id', 'question', 'options', 'answer', 'explanation', 'hint', 'difficulty', 'category', 'chapter', 'created_at']
 
 
+class ExerciseSolutionSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    class Meta:
+        model = Exercise
+        fields = ['id', 'answer', 'explanation', 'hint']
+
+
 class ExerciseCheckSerializer(serializers.Serializer):
     answer = serializers.CharField()
     
@@ -15,3 +35,26 @@ class ExerciseCheckSerializer(serializers.Serializer):
         if not value:
             raise serializers.ValidationError("答案不能为空")
         return value
+
+
+class GradingJobCreateSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    answer = serializers.CharField()
+
+
+class ExerciseCheckBatchSerializer(serializers.Serializer):
+    # 逐项校验在视图中完成，单项格式错误不影响其他题目
+    items = serializers.ListField(child=serializers.DictField(), allow_empty=False, max_length=50)
+
+
+class GradingJobSerializer(serializers.ModelSerializer):
+    job_id = serializers.IntegerField(source='id', read_only=True)
+    correct_answer = serializers.SerializerMethodField()
+
+    class Meta:
+        model = GradingJob
+        fields = ['job_id', 'status', 'is_correct', 'explanation', 'error', 'user_answer', 'correct_answer', 'created_at', 'finished_at']
+
+    def get_correct_answer(self, obj):
+        # 判题完成后才返回标准答案
+        return obj.exercise.answer if obj.status == GradingJob.STATUS_DONE else None
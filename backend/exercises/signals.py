@@ -0,0 +1,53 @@
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from courses.models import Chapter
+from .dedup import content_hash
+from .facets import facet_key, fold_chapter, record_added, record_changed, record_removed
+from .models import Exercise
+from .similarity import schedule_refresh
+
+
+@receiver(pre_save, sender=Exercise)
+def remember_previous_state(sender, instance, raw=False, **kwargs):
+    # 记下保存前的答案与筛选维度，供判题缓存失效和计数调整使用
+    instance._facet_before = None
+    instance._question_changed = True
+    if not raw:
+        instance.content_hash = content_hash(instance.question)
+    if not instance.pk or raw:
+        return
+    old = Exercise.objects.filter(pk=instance.pk).values('answer', 'question', 'chapter_id', 'category', 'difficulty').first()
+    if old is None:
+        return
+    instance._facet_before = (old['chapter_id'], old['category'], old['difficulty'])
+    instance._question_changed = old['question'] != instance.question
+    # 标准答案变更后，旧的判题缓存全部作废
+    if old['answer'] != instance.answer:
+        from .cache import verdict_cache
+        verdict_cache.invalidate(instance.pk)
+
+
+@receiver(post_save, sender=Exercise)
+def update_facets_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    before = getattr(instance, '_facet_before', None)
+    if before is None:
+        record_added([instance])
+    else:
+        record_changed(before, facet_key(instance))
+    instance._facet_before = facet_key(instance)
+    # 新增或题面变化的题在事务提交后刷新相似题索引
+    if getattr(instance, '_question_changed', True):
+        schedule_refresh(instance.pk)
+
+
+@receiver(post_delete, sender=Exercise)
+def update_facets_on_delete(sender, instance, **kwargs):
+    record_removed([instance])
+    schedule_refresh(instance.pk)
+
+
+@receiver(pre_delete, sender=Chapter)
+def fold_chapter_facets(sender, instance, **kwargs):
+    fold_chapter(instance.pk)
@@ -0,0 +1,357 @@
+"""
+相似题索引：题面按字符 n-gram（2～3 个字符）切分，经哈希映射到固定维度，
+以 TF-IDF 加权并按行 L2 归一化，余弦相似度即向量点积。
+索引按特征存为倒排形式的 CSR 矩阵（每行是一个特征在各题中的权重），
+查询只读取题面中出现的特征所在的行，不扫描练习题表，也不遍历整个矩阵。
+
+文件保存在 SIMILARITY_INDEX_DIR 下的版本目录中，CURRENT 记录当前版本，查询时以内存映射方式加载；
+写入新版本后原子替换 CURRENT，进程在下一次查询时切换。
+导入新题只对新题切分并追加列，IDF 沿用全量重建时的值；题面修改后去掉旧列并追加新列，删除的题直接去掉对应列。
+自上次全量重建以来追加与去掉的列数超过当时题数的 SIMILARITY_REBUILD_RATIO 时改为全量重建。
+读取当前版本、修改并保存新版本的整个过程持有目录下 LOCK 文件的排他锁，多个进程同时写入时依次进行，不会互相覆盖。
+后台或接口中保存、删除题目后，由进程内的后台线程合并刷新，不在请求中重写索引。
+"""
+import json
+import math
+import os
+import re
+import shutil
+import threading
+import time
+import zlib
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+from django.conf import settings
+from django.db import connection, transaction
+from scipy import sparse
+
+from .equivalence import normalize_latex
+from .models import Exercise
+
+N_FEATURES = 2 ** 18
+NGRAM_RANGE = (2, 3)
+MAX_SIMILAR = 50
+
+_WHITESPACE_RE = re.compile(r'\s+')
+_feature_ids: dict[str, int] = {}
+
+
+def index_dir() -> Path:
+    return Path(getattr(settings, 'SIMILARITY_INDEX_DIR', Path(settings.BASE_DIR) / 'similarity_index'))
+
+
+@contextmanager
+def index_lock():
+    """跨进程的排他锁（索引目录下的 LOCK 文件），进程退出时由操作系统释放"""
+    root = index_dir()
+    root.mkdir(parents=True, exist_ok=True)
+    with open(root / 'LOCK', 'a+b') as f:
+        if os.name == 'nt':
+            import msvcrt
+            f.seek(0)
+            while True:
+                try:
+                    # LK_LOCK 重试约 10 秒后抛出 OSError，继续等待
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    continue
+            try:
+                yield
+            finally:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def _feature(gram: str) -> int:
+    # crc32 跨进程稳定，内置 hash() 受 PYTHONHASHSEED 影响不能用于持久化的索引
+    feature = _feature_ids.get(gram)
+    if feature is None:
+        if len(_feature_ids) > 500_000:
+            _feature_ids.clear()
+        feature = _feature_ids[gram] = zlib.crc32(gram.encode('utf-8')) % N_FEATURES
+    return feature
+
+
+def ngram_counts(text: str) -> Counter:
+    """特征编号 -> 出现次数"""
+    text = _WHITESPACE_RE.sub(' ', normalize_latex(text).lower())
+    counts = Counter()
+    for n in range(NGRAM_RANGE[0], NGRAM_RANGE[1] + 1):
+        counts.update(_feature(text[i:i + n]) for i in range(len(text) - n + 1))
+    return counts
+
+
+def term_frequencies(texts) -> sparse.csr_matrix:
+    """每行一道题的次线性词频 1 + log(tf)，未加权"""
+    indptr, indices, data = [0], [], []
+    for text in texts:
+        counts = ngram_counts(text)
+        features = sorted(counts)
+        indices.extend(features)
+        data.extend(1.0 + math.log(counts[f]) for f in features)
+        indptr.append(len(indices))
+    return sparse.csr_matrix(
+        (np.asarray(data, dtype=np.float32), np.asarray(indices, dtype=np.int32), np.asarray(indptr, dtype=np.int64)),
+        shape=(len(indptr) - 1, N_FEATURES),
+    )
+
+
+def idf_weights(tf: sparse.csr_matrix) -> np.ndarray:
+    df = np.bincount(tf.indices, minlength=N_FEATURES)
+    return (np.log((1.0 + tf.shape[0]) / (1.0 + df)) + 1.0).astype(np.float32)
+
+
+def weighted(tf: sparse.csr_matrix, idf: np.ndarray) -> sparse.csr_matrix:
+    """TF-IDF 加权并按行 L2 归一化"""
+    m = tf.multiply(idf).tocsr().astype(np.float32)
+    norms = np.sqrt(np.asarray(m.multiply(m).sum(axis=1)).ravel())
+    norms[norms == 0] = 1.0
+    return sparse.diags(1.0 / norms).dot(m).tocsr().astype(np.float32)
+
+
+class SimilarityIndex:
+    def __init__(self, postings: sparse.csr_matrix, ids: np.ndarray, idf: np.ndarray, meta: dict, version: str):
+        self.postings = postings  # N_FEATURES × 题目数
+        self.ids = ids
+        self.idf = idf
+        self.meta = meta
+        self.version = version
+
+    @classmethod
+    def load(cls, path: Path) -> 'SimilarityIndex':
+        meta = json.loads((path / 'meta.json').read_text(encoding='utf-8'))
+        arrays = {name: np.load(path / f'{name}.npy', mmap_mode='r')
+                  for name in ('data', 'indices', 'indptr', 'ids', 'idf')}
+        postings = sparse.csr_matrix(
+            (arrays['data'], arrays['indices'], arrays['indptr']),
+            shape=(N_FEATURES, meta['n_docs']),
+            copy=False,
+        )
+        return cls(postings, arrays['ids'], arrays['idf'], meta, path.name)
+
+    def vector(self, text: str) -> sparse.csr_matrix:
+        return weighted(term_frequencies([text]), self.idf)
+
+    def query(self, text: str, k: int, exclude=()) -> list[tuple[int, float]]:
+        """返回相似度最高的至多 k 个 (练习题 id, 相似度)，相似度为 0 的不返回"""
+        if not self.meta['n_docs']:
+            return []
+        vec = self.vector(text)
+        if not vec.nnz:
+            return []
+        # 只取题面中出现的特征行：scores[j] = Σ 查询权重 × 第 j 题在该特征上的权重
+        scores = self.postings[vec.indices].T.dot(vec.data)
+        want = min(k + len(exclude), scores.shape[0])
+        top = np.argpartition(-scores, want - 1)[:want]
+        top = top[np.argsort(-scores[top], kind='stable')]
+        excluded = set(exclude)
+        results = []
+        for j in top:
+            pk = int(self.ids[j])
+            if scores[j] <= 0 or pk in excluded:
+                continue
+            results.append((pk, float(scores[j])))
+            if len(results) >= k:
+                break
+        return results
+
+
+def save(postings: sparse.csr_matrix, ids: np.ndarray, idf: np.ndarray, base_docs: int, changed: int = 0) -> SimilarityIndex:
+    """写入新的版本目录并切换 CURRENT，只保留当前与上一个版本"""
+    root = index_dir()
+    root.mkdir(parents=True, exist_ok=True)
+    version = f'v{time.time_ns()}'
+    path = root / version
+    path.mkdir()
+    postings = postings.tocsr()
+    postings.sort_indices()
+    np.save(path / 'data.npy', postings.data.astype(np.float32))
+    np.save(path / 'indices.npy', postings.indices.astype(np.int32))
+    np.save(path / 'indptr.npy', postings.indptr.astype(np.int64))
+    np.save(path / 'ids.npy', np.asarray(ids, dtype=np.int64))
+    np.save(path / 'idf.npy', np.asarray(idf, dtype=np.float32))
+    meta = {'n_docs': int(postings.shape[1]), 'base_docs': int(base_docs), 'changed': int(changed), 'built_at': time.time()}
+    (path / 'meta.json').write_text(json.dumps(meta), encoding='utf-8')
+
+    tmp = root / 'CURRENT.tmp'
+    tmp.write_text(version, encoding='utf-8')
+    os.replace(tmp, root / 'CURRENT')
+
+    # 已加载旧版本的进程仍持有内存映射，删除目录不影响其读取
+    versions = sorted(p for p in root.iterdir() if p.is_dir() and p.name.startswith('v'))
+    for old in versions[:-2]:
+        shutil.rmtree(old, ignore_errors=True)
+    return SimilarityIndex.load(path)
+
+
+_loaded: SimilarityIndex | None = None
+
+
+def get_index() -> SimilarityIndex | None:
+    """当前版本的索引，未建立时返回 None；版本变化时重新加载"""
+    global _loaded
+    try:
+        version = (index_dir() / 'CURRENT').read_text(encoding='utf-8').strip()
+    except FileNotFoundError:
+        return None
+    if _loaded is None or _loaded.version != version:
+        _loaded = SimilarityIndex.load(index_dir() / version)
+    return _loaded
+
+
+def rebuild(chunk_size: int = 2000) -> int:
+    """全量重建，返回索引的题目数"""
+    with index_lock():
+        return _rebuild(chunk_size)
+
+
+def _rebuild(chunk_size: int = 2000) -> int:
+    ids, texts = [], []
+    for pk, question in Exercise.objects.order_by('pk').values_list('pk', 'question').iterator(chunk_size=chunk_size):
+        ids.append(pk)
+        texts.append(question)
+    tf = term_frequencies(texts)
+    idf = idf_weights(tf)
+    save(weighted(tf, idf).T, np.asarray(ids, dtype=np.int64), idf, base_docs=len(ids))
+    return len(ids)
+
+
+def _changed(index: SimilarityIndex) -> int:
+    """自上次全量重建以来追加与去掉的列数；旧版本的 meta 没有记录，按追加的题数算"""
+    return index.meta.get('changed', index.meta['n_docs'] - index.meta['base_docs'])
+
+
+def _over_threshold(index: SimilarityIndex, changed: int) -> bool:
+    ratio = getattr(settings, 'SIMILARITY_REBUILD_RATIO', 0.2)
+    return changed > index.meta['base_docs'] * ratio
+
+
+def add_exercises(exercises) -> str:
+    """
+    把新导入的题目加入索引，返回执行方式：
+    - appended：只切分新题并追加
+    - rebuilt：索引不存在，或变动量超过阈值，已全量重建
+    - unchanged：没有需要加入的题目
+    """
+    with index_lock():
+        return _add_exercises(exercises)
+
+
+def _add_exercises(exercises) -> str:
+    index = get_index()
+    if index is None:
+        _rebuild()
+        return 'rebuilt'
+    known = set(np.asarray(index.ids).tolist())
+    new = [e for e in exercises if e.pk is not None and e.pk not in known]
+    if not new:
+        return 'unchanged'
+    changed = _changed(index) + len(new)
+    if _over_threshold(index, changed):
+        _rebuild()
+        return 'rebuilt'
+    appended = weighted(term_frequencies(e.question for e in new), index.idf).T
+    postings = sparse.hstack([index.postings, appended], format='csr')
+    ids = np.concatenate([index.ids, np.asarray([e.pk for e in new], dtype=np.int64)])
+    save(postings, ids, index.idf, base_docs=index.meta['base_docs'], changed=changed)
+    return 'appended'
+
+
+def refresh_exercises(pks) -> str:
+    """
+    按数据库中的当前题面更新这些题在索引中的列：去掉旧列，仍存在的题重新切分后追加，已删除的题不再出现。
+    返回值同 add_exercises；索引未建立时不处理（返回 unchanged），由下次重建收录
+    """
+    with index_lock():
+        return _refresh_exercises(pks)
+
+
+def _refresh_exercises(pks) -> str:
+    index = get_index()
+    pks = set(pks)
+    if index is None or not pks:
+        return 'unchanged'
+    current = dict(Exercise.objects.filter(pk__in=pks).order_by('pk').values_list('pk', 'question'))
+    ids = np.asarray(index.ids)
+    stale = np.isin(ids, list(pks))
+    if not stale.any() and not current:
+        return 'unchanged'
+    changed = _changed(index) + int(stale.sum()) + len(current)
+    if _over_threshold(index, changed):
+        _rebuild()
+        return 'rebuilt'
+    keep = np.flatnonzero(~stale)
+    # CSR 按列取子集只复制非零元素，不展开成稠密矩阵
+    postings = index.postings[:, keep]
+    if current:
+        appended = weighted(term_frequencies(current.values()), index.idf).T
+        postings = sparse.hstack([postings, appended], format='csr')
+    ids = np.concatenate([ids[keep], np.asarray(list(current), dtype=np.int64)])
+    save(postings, ids, index.idf, base_docs=index.meta['base_docs'], changed=changed)
+    return 'appended'
+
+
+_queue_lock = threading.Lock()
+_queued: set[int] = set()
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='similarity')
+
+
+def schedule_refresh(pk: int) -> None:
+    """
+    登记题面有变化（新增、修改或删除）的题，事务提交后交给 refresh_exercises（事务回滚时不登记）。
+    SIMILARITY_REFRESH_IN_BACKGROUND 为真时由进程内的单个后台线程处理，排队期间登记的题合并为一次写入
+    """
+    transaction.on_commit(lambda: _enqueue(pk))
+
+
+def _enqueue(pk: int) -> None:
+    with _queue_lock:
+        _queued.add(pk)
+    if getattr(settings, 'SIMILARITY_REFRESH_IN_BACKGROUND', True):
+        _executor.submit(_drain_in_thread)
+    else:
+        _drain()
+
+
+def _drain() -> None:
+    with _queue_lock:
+        pks = set(_queued)
+        _queued.clear()
+    if not pks:
+        return
+    try:
+        refresh_exercises(pks)
+    except Exception as e:
+        # 题目已经保存成功，索引写入失败不影响请求，重建时会补上
+        print(f"[Similarity Index Error] {e}")
+
+
+def _drain_in_thread() -> None:
+    try:
+        _drain()
+    finally:
+        # 后台线程持有独立的数据库连接，处理完释放
+        connection.close()
+
+
+def similar_exercises(exercise: Exercise, k: int) -> list[tuple[Exercise, float]] | None:
+    """与 exercise 题面最相似的至多 k 道题；索引未建立时返回 None"""
+    index = get_index()
+    if index is None:
+        return None
+    # 多取几条，弥补索引刷新前就已删除的题
+    hits = index.query(exercise.question, k + 10, exclude=(exercise.pk,))
+    found = Exercise.objects.in_bulk([pk for pk, _ in hits])
+    return [(found[pk], score) for pk, score in hits if pk in found][:k]
@@ -0,0 +1,105 @@
+"""
+合并相同的并发判题请求（single-flight）
+- 进程内：同一键只有一个线程真正执行，其余线程等待并共享结果
+- 跨 worker：通过 GradingLease 表上的唯一键租约选出执行者，其余 worker 轮询判题缓存等待结果
+"""
+import os
+import socket
+import threading
+import time
+from datetime import timedelta
+
+from django.db import DatabaseError, IntegrityError, transaction
+from django.utils import timezone
+
+from .models import GradingLease
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: BaseException | None = None
+
+
+class SingleFlight:
+    """进程内的 single-flight：do(key, fn) 对同一 key 的并发调用只执行一次 fn"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: dict[str, _Call] = {}
+        self.shared = 0
+
+    def do(self, key: str, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self.shared += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+
+def _owner() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+
+
+def acquire_lease(key: str, ttl: float) -> bool:
+    """尝试获取租约；已被其他 worker 持有且未过期时返回 False"""
+    now = timezone.now()
+    try:
+        GradingLease.objects.filter(key=key, expires_at__lt=now).delete()
+        with transaction.atomic():
+            GradingLease.objects.create(key=key, owner=_owner(), expires_at=now + timedelta(seconds=ttl))
+        return True
+    except IntegrityError:
+        return False
+    except DatabaseError:
+        # 租约表不可用（如数据库繁忙）时不阻塞判题，按自己是执行者处理
+        return True
+
+
+def release_lease(key: str) -> None:
+    try:
+        GradingLease.objects.filter(key=key, owner=_owner()).delete()
+    except DatabaseError:
+        pass
+
+
+def coalesce_across_workers(key: str, fn, lookup, ttl: float = 60, wait_timeout: float = 45,
+                            poll_interval: float = 0.2):
+    """
+    跨 worker 合并：拿到租约的 worker 执行 fn（执行前再查一次 lookup，避免重复调用），
+    其余 worker 每隔 poll_interval 调用 lookup 查看结果，超过 wait_timeout 仍无结果则自行执行 fn
+    """
+    deadline = time.monotonic() + wait_timeout
+    while True:
+        if acquire_lease(key, ttl):
+            try:
+                result = lookup()
+                return result if result is not None else fn()
+            finally:
+                release_lease(key)
+        result = lookup()
+        if result is not None:
+            return result
+        if time.monotonic() >= deadline:
+            return fn()
+        time.sleep(poll_interval)
@@ -0,0 +1,37 @@
+from django.core.cache import caches
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from courses.models import Chapter, ChapterContent, Course
+
+
+class CatalogCacheTests(APITestCase):
+    """课程缓存的键带数据库中的数据版本号，其他进程写入（本进程没有收到任何通知）后也不会返回旧内容"""
+
+    def setUp(self):
+        caches['catalog'].clear()
+        self.course = Course.objects.create(title='概率论', description='')
+        self.chapter = Chapter.objects.create(course=self.course, title='随机事件', order=0)
+        ChapterContent.objects.create(chapter=self.chapter, title='课件', content_type='ppt', url='https://example.com/', order=0)
+
+    def test_write_from_another_process_is_visible(self):
+        first = self.client.get(f'/api/course/courses/{self.course.pk}/')
+        self.assertEqual(first.data['chapters'][0]['title'], '随机事件')
+
+        # queryset.update 不发送信号，相当于另一个进程的写入
+        Chapter.objects.filter(pk=self.chapter.pk).update(title='条件概率', updated_at=timezone.now())
+        second = self.client.get(f'/api/course/courses/{self.course.pk}/')
+        self.assertEqual(second.data['chapters'][0]['title'], '条件概率')
+        self.assertNotEqual(first['ETag'], second['ETag'])
+
+    def test_delete_changes_version(self):
+        self.client.get('/api/course/chapters/')
+        ChapterContent.objects.all().delete()
+        response = self.client.get(f'/api/course/chapters/{self.chapter.pk}/')
+        self.assertEqual(response.data['contents'], [])
+
+    def test_unchanged_data_is_served_from_cache(self):
+        self.client.get('/api/course/courses/')
+        with self.assertNumQueries(4):
+            # 只有校验值查询：删除计数 1 次 + 三个模型的 MAX(updated_at)
+            self.client.get('/api/course/courses/')
@@ -0,0 +1,89 @@
+from fractions import Fraction
+
+from django.test import SimpleTestCase
+
+from exercises.equivalence import Approx, compare_values, judge_locally, parse_value
+
+# (用户答案, 标准答案, 期望)：True 判对 / False 判错 / None 交给大模型
+CASES = [
+    # 分数与小数
+    ('0.5', '1/2', True),
+    ('1/2', r'\frac{1}{2}', True),
+    (r'\frac12', '0.5', True),
+    ('2/4', '1/2', True),
+    ('-1/2', r'-\frac{1}{2}', True),
+    ('0.6', '1/2', False),
+    ('50%', '0.5', True),
+    (r'50\%', '1/2', True),
+    ('3/8', '0.38', True),
+    ('3/8', '0.36', False),
+    # Approx 精度：按位数较少的一方的精度比较
+    ('0.33', '1/3', True),
+    ('0.3333', '1/3', True),
+    ('0.34', '1/3', False),
+    ('0.7772', '0.77723', True),
+    ('0.78', '0.7772', True),
+    ('0.7773', '0.7772', False),
+    # 集合与元组
+    (r'\{1,2,3\}', r'\{3,2,1\}', True),
+    ('{1,2,3}', r'\{1,2,3\}', True),
+    (r'\{1,2\}', r'\{1,2,3\}', False),
+    (r'\{a,b\}', r'\{a,c\}', None),
+    ('(1,2)', '(1,2)', True),
+    ('(1,2)', '(2,1)', False),
+    ('(1,2)', '(1,2,3)', None),
+    ('(0.5,1)', '(1/2,1)', True),
+    # 多小问
+    ('(1) 1/2; (2) 0.25', '(1) 0.5; (2) 1/4', True),
+    ('(1) 1/2; (2) 0.3', '(1) 0.5; (2) 1/4', False),
+    ('1/2; 1/4', '(1) 0.5; (2) 1/4', True),
+    ('(1) 1/2', '(1) 0.5; (2) 1/4', None),
+    ('(2) 1/4; (1) 1/2', '(1) 0.5; (2) 1/4', None),
+    # 连等式与顺序
+    ('P = 3/8 ≈ 0.375', '3/8', True),
+    ('1 = 2', '2', None),
+    ('2, 1', '1, 2', None),
+    ('1, 3', '1, 2', False),
+    # 判断题用词
+    ('对', '正确', True),
+    ('yes', '√', True),
+    ('否', '对', False),
+    ('False', '错', True),
+    ('no', 'f', None),
+    ('t', 'yes', None),
+    ('f', 'f', True),
+    # 无法解析的符号表达式交给大模型
+    ('x^2', 'x^{2}', None),
+    ('', '1', None),
+]
+
+
+class JudgeLocallyTests(SimpleTestCase):
+
+    def test_cases(self):
+        for user, correct, expected in CASES:
+            with self.subTest(user=user, correct=correct):
+                verdict = judge_locally(user, correct)
+                self.assertEqual(verdict[0] if verdict else None, expected)
+
+    def test_wrong_part_is_named(self):
+        _, explanation = judge_locally('(1) 1/2; (2) 0.3', '(1) 0.5; (2) 1/4')
+        self.assertIn('第(2)问', explanation)
+        self.assertNotIn('第(1)问', explanation)
+
+
+class ParseValueTests(SimpleTestCase):
+
+    def test_parse(self):
+        self.assertEqual(parse_value('3/4'), Fraction(3, 4))
+        self.assertEqual(parse_value('0.5'), Fraction(1, 2))
+        self.assertEqual(parse_value('(1,2)'), (Fraction(1), Fraction(2)))
+        self.assertEqual(parse_value(r'\{1,2\}'), frozenset({Fraction(1), Fraction(2)}))
+        approx = parse_value('0.125')
+        self.assertIsInstance(approx, Approx)
+        self.assertEqual((approx.value, approx.places), (Fraction(1, 8), 3))
+
+    def test_compare_values(self):
+        self.assertTrue(compare_values(parse_value('0.67'), parse_value('2/3')))
+        self.assertFalse(compare_values(parse_value('0.66'), parse_value('2/3')))
+        self.assertIsNone(compare_values(parse_value('x'), parse_value('1')))
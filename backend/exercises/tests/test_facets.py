@@ -0,0 +1,83 @@
+from django.db.models import Count
+from rest_framework.test import APITestCase
+
+from courses.models import Chapter, Course
+from exercises.facets import facet_counts, rebuild_facets
+from exercises.models import Exercise, ExerciseFacet
+
+
+class FacetCounterTests(APITestCase):
+    """计数表随练习题的新增、修改、删除以及章节删除同步变化，始终与按练习题表统计的结果一致"""
+
+    def setUp(self):
+        course = Course.objects.create(title='课程', description='')
+        self.first = Chapter.objects.create(course=course, title='随机事件', order=0)
+        self.second = Chapter.objects.create(course=course, title='随机变量', order=1)
+
+    def create(self, chapter, category='概率论', difficulty='easy') -> Exercise:
+        return Exercise.objects.create(question='题目', answer='', explanation='', hint='', category=category,
+                                       difficulty=difficulty, chapter=chapter)
+
+    def assertCountsMatch(self):
+        actual = {
+            (row['chapter_id'], row['category'], row['difficulty']): row['n']
+            for row in Exercise.objects.order_by().values('chapter_id', 'category', 'difficulty').annotate(n=Count('id'))
+        }
+        stored = {
+            (facet.chapter_id, facet.category, facet.difficulty): facet.count
+            for facet in ExerciseFacet.objects.filter(count__gt=0)
+        }
+        self.assertEqual(stored, actual)
+
+    def test_save_and_delete(self):
+        exercises = [self.create(self.first), self.create(self.first, difficulty='hard'),
+                     self.create(self.second, category='统计学')]
+        self.assertCountsMatch()
+
+        exercises[0].difficulty = 'medium'
+        exercises[0].save()
+        exercises[1].chapter = self.second
+        exercises[1].save()
+        exercises[2].question = '只改题面'
+        exercises[2].save()
+        self.assertCountsMatch()
+
+        exercises[0].delete()
+        Exercise.objects.filter(pk=exercises[1].pk).delete()
+        self.assertCountsMatch()
+
+    def test_chapter_delete_moves_counts_to_unassigned(self):
+        self.create(self.first)
+        self.create(self.first, category='统计学')
+        self.create(self.second)
+        self.first.delete()
+        self.assertEqual(Exercise.objects.filter(chapter=None).count(), 2)
+        self.assertCountsMatch()
+
+    def test_rebuild_after_bulk_update(self):
+        self.create(self.first)
+        self.create(self.first)
+        # queryset.update 不发送信号，计数表此时已过期
+        Exercise.objects.update(difficulty='hard')
+        self.assertEqual(rebuild_facets(), 1)
+        self.assertCountsMatch()
+
+    def test_facet_counts(self):
+        self.create(self.first)
+        self.create(self.first, difficulty='hard')
+        self.create(self.second, category='统计学')
+        data = facet_counts()
+        self.assertEqual(data['total'], 3)
+        self.assertEqual(data['difficulties'], {'easy': 2, 'medium': 0, 'hard': 1})
+        self.assertEqual({item['category']: item['count'] for item in data['categories']}, {'概率论': 2, '统计学': 1})
+        self.assertEqual(facet_counts(self.second.pk)['total'], 1)
+
+    def test_endpoint(self):
+        self.create(self.first)
+        url = f'/api/exercise/facets/?chapter={self.first.pk}'
+        response = self.client.get(url)
+        self.assertEqual(response.data['total'], 1)
+        self.assertEqual(self.client.get('/api/exercise/facets/?chapter=x').status_code, 400)
+        with self.assertNumQueries(3):
+            # 只有校验值查询，不读取计数表
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
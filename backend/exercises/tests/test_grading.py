@@ -0,0 +1,56 @@
+from unittest import mock
+
+from django.test import TestCase
+
+from courses.models import Chapter, Course
+from exercises.cache import verdict_cache
+from exercises.grading import stream_grade
+from exercises.models import Exercise
+from exercises.utils import parse_stream_verdict
+
+
+def make_exercise(**fields) -> Exercise:
+    chapter = Chapter.objects.create(course=Course.objects.create(title='课程', description=''), title='章节', order=0)
+    defaults = dict(question='求 P(A∪B)', answer='0.7', explanation='', hint='', category='概率论',
+                    difficulty='easy', chapter=chapter)
+    defaults.update(fields)
+    return Exercise.objects.create(**defaults)
+
+
+class StreamVerdictTests(TestCase):
+    """流式判题回复的判定标记只接受恰好 “正确” 或 “错误”，其余视为未解析且不缓存"""
+
+    def test_parse(self):
+        cases = [
+            ('解释\n【判定】正确', (True, '解释')),
+            ('解释\n【判定】错误', (False, '解释')),
+            ('解释\n【判定】 正确。\n', (True, '解释')),
+        ]
+        for reply, expected in cases:
+            with self.subTest(reply=reply):
+                self.assertEqual(parse_stream_verdict(reply), expected)
+
+    def test_parse_rejects(self):
+        for reply in ('解释\n【判定】不正确', '解释\n【判定】正确，但不完整', '只有解释', '【判定】正确', '解释\n【判定】'):
+            with self.subTest(reply=reply), self.assertRaises(ValueError):
+                parse_stream_verdict(reply)
+
+    def stream(self, exercise, answer, chunks):
+        with mock.patch('exercises.utils.stream_chat', return_value=iter(chunks)):
+            return list(stream_grade(exercise, answer))
+
+    def test_unparsed_reply_is_not_cached(self):
+        exercise = make_exercise(answer='P(A)+P(B)-P(AB)')
+        for chunks in (['解释没有标记'], ['解释', '\n【判定】不正确']):
+            with self.subTest(chunks=chunks):
+                events = self.stream(exercise, '0.7', chunks)
+                self.assertEqual(events[-1], ('verdict', (False, '')))
+                self.assertIsNone(verdict_cache.get(exercise, '0.7'))
+
+    def test_marker_is_not_forwarded(self):
+        exercise = make_exercise(answer='P(A)+P(B)-P(AB)')
+        events = self.stream(exercise, '0.8', ['两者', '不相等\n【判', '定】错误'])
+        text = ''.join(payload for kind, payload in events if kind == 'delta')
+        self.assertEqual(text.strip(), '两者不相等')
+        self.assertEqual(events[-1], ('verdict', (False, '两者不相等')))
+        self.assertEqual(verdict_cache.get(exercise, '0.8'), (False, '两者不相等'))
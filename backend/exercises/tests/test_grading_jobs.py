@@ -0,0 +1,95 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from courses.models import Chapter, Course
+from exercises.jobs import claim_jobs, process_job, requeue_stale_jobs, retry_delay, submit_job
+from exercises.models import Exercise, GradingJob
+
+
+class GradingJobTests(TestCase):
+    """判题任务的提交、领取、退避重试与遗留任务回收"""
+
+    def setUp(self):
+        settings = override_settings(GRADING_JOB_MAX_ATTEMPTS=3, GRADING_JOB_RETRY_BASE=5, GRADING_JOB_RETRY_MAX=120,
+                                     GRADING_JOB_STALE_AFTER=120)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        chapter = Chapter.objects.create(course=Course.objects.create(title='课程', description=''), title='章节', order=0)
+        self.exercise = Exercise.objects.create(question='求 P(A∪B)', answer='P(A)+P(B)-P(AB)', explanation='', hint='',
+                                                category='概率论', difficulty='easy', chapter=chapter)
+
+    def grade(self, result):
+        patcher = mock.patch('exercises.jobs.grade_exercise', return_value=result)
+        grade = patcher.start()
+        self.addCleanup(patcher.stop)
+        return grade
+
+    def test_local_verdict_finishes_on_submit(self):
+        job = submit_job(self.exercise, 'P(A)+P(B)-P(AB)')
+        self.assertEqual(job.status, GradingJob.STATUS_DONE)
+        self.assertTrue(job.is_correct)
+        self.assertEqual(submit_job(self.exercise, 'P(A)').status, GradingJob.STATUS_PENDING)
+
+    def test_claim_skips_taken_and_backed_off_jobs(self):
+        ready = [GradingJob.objects.create(exercise=self.exercise, user_answer=str(i)) for i in range(3)]
+        GradingJob.objects.create(exercise=self.exercise, user_answer='later',
+                                  available_at=timezone.now() + timedelta(minutes=1))
+
+        first = claim_jobs(2)
+        self.assertEqual({job.pk for job in first}, {ready[0].pk, ready[1].pk})
+        self.assertTrue(all(job.status == GradingJob.STATUS_RUNNING and job.started_at for job in first))
+        self.assertEqual([job.pk for job in claim_jobs(5)], [ready[2].pk])
+        self.assertEqual(claim_jobs(5), [])
+
+    def test_retry_delay(self):
+        cases = [(1, 5), (2, 10), (3, 20), (6, 120), (100, 120)]
+        for attempts, expected in cases:
+            with self.subTest(attempts=attempts):
+                self.assertEqual(retry_delay(attempts), expected)
+
+    def test_failure_backs_off_then_fails(self):
+        self.grade((False, ''))
+        job = GradingJob.objects.create(exercise=self.exercise, user_answer='P(A)')
+
+        before = timezone.now()
+        process_job(claim_jobs(1)[0])
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts, job.started_at), (GradingJob.STATUS_PENDING, 1, None))
+        self.assertGreaterEqual(job.available_at, before + timedelta(seconds=5))
+        self.assertEqual(claim_jobs(1), [])
+
+        for attempts in (2, 3):
+            GradingJob.objects.filter(pk=job.pk).update(available_at=timezone.now())
+            process_job(claim_jobs(1)[0])
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts, job.error), (GradingJob.STATUS_FAILED, 3, '判题服务暂不可用'))
+
+    def test_exception_is_recorded(self):
+        with mock.patch('exercises.jobs.grade_exercise', side_effect=RuntimeError('boom')):
+            GradingJob.objects.create(exercise=self.exercise, user_answer='P(A)')
+            job = process_job(claim_jobs(1)[0])
+        self.assertEqual((job.status, job.error), (GradingJob.STATUS_PENDING, 'boom'))
+
+    def test_success_clears_error(self):
+        self.grade((False, '漏减交集'))
+        GradingJob.objects.create(exercise=self.exercise, user_answer='P(A)', error='上次失败', attempts=1)
+        job = process_job(claim_jobs(1)[0])
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.is_correct, job.explanation, job.error),
+                         (GradingJob.STATUS_DONE, False, '漏减交集', ''))
+        self.assertIsNotNone(job.finished_at)
+
+    def test_requeue_stale_jobs(self):
+        now = timezone.now()
+        stale = GradingJob.objects.create(exercise=self.exercise, user_answer='a', status=GradingJob.STATUS_RUNNING,
+                                          started_at=now - timedelta(seconds=300))
+        fresh = GradingJob.objects.create(exercise=self.exercise, user_answer='b', status=GradingJob.STATUS_RUNNING,
+                                          started_at=now)
+        self.assertEqual(requeue_stale_jobs(), 1)
+        stale.refresh_from_db()
+        fresh.refresh_from_db()
+        self.assertEqual((stale.status, stale.started_at), (GradingJob.STATUS_PENDING, None))
+        self.assertEqual(fresh.status, GradingJob.STATUS_RUNNING)
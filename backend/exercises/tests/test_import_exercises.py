@@ -0,0 +1,146 @@
+import csv
+import json
+import tempfile
+from io import StringIO
+from pathlib import Path
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from exercises.cache import verdict_cache
+from exercises.importing import Checkpoint, read_chunks
+from exercises.models import Exercise
+
+HEADER = ['question', 'answer', 'difficulty', 'topic', 'hint']
+
+
+class ImportTestCase(TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = Path(tmp.name)
+        settings = override_settings(SIMILARITY_INDEX_DIR=str(self.dir / 'similarity'))
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def write_csv(self, rows, name='exercises.csv') -> str:
+        path = self.dir / name
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(HEADER)
+            writer.writerows(rows)
+        return str(path)
+
+    def run_import(self, path, **options) -> str:
+        out = StringIO()
+        call_command('import_exercises', path=path, stdout=out, **options)
+        return out.getvalue()
+
+
+class LineNumberTests(ImportTestCase):
+    """引号内含换行的题目占多行，之后各条记录报告的仍是文件中的行号"""
+
+    ROWS = [
+        ['设 X 服从二项分布\n求 E(X)\n与 D(X)', 'np; np(1-p)', 'easy', '概率论', ''],  # 第 2～4 行
+        ['求 P(A)', '', 'easy', '概率论', ''],  # 第 5 行：答案为空
+        ['多行\n题目', '1', 'easy', '概率论', ''],  # 第 6～7 行
+        ['', '1', 'easy', '概率论', ''],  # 第 8 行：题目为空
+    ]
+
+    def test_read_chunks_reports_physical_lines(self):
+        path = self.write_csv(self.ROWS)
+        lines = [line for chunk in read_chunks(path, 2) for line, _ in chunk]
+        self.assertEqual(lines, [2, 5, 6, 8])
+        resumed = [line for chunk in read_chunks(path, 2, start_line=5) for line, _ in chunk]
+        self.assertEqual(resumed, [6, 8])
+
+    def test_error_messages_use_file_lines(self):
+        out = self.run_import(self.write_csv(self.ROWS), batch_size=2)
+        self.assertIn('第 5 行已跳过：答案为空', out)
+        self.assertIn('第 8 行已跳过：题目为空', out)
+        self.assertEqual(Exercise.objects.count(), 2)
+
+
+class ResumeTests(ImportTestCase):
+
+    def test_resume_continues_after_checkpoint(self):
+        rows = [[f'第 {i} 题：求 P(A_{i}) 的值', str(i), 'easy', '概率论', ''] for i in range(6)]
+        path = self.write_csv(rows)
+        # 模拟处理完前 3 条后中断
+        checkpoint = Checkpoint(path)
+        self.run_import(self.write_csv(rows[:3], name='head.csv'))
+        checkpoint.save(4, {'created': 3})
+
+        out = self.run_import(path, resume=True)
+        self.assertIn('从第 4 行之后继续导入', out)
+        self.assertEqual(Exercise.objects.count(), 6)
+        self.assertFalse(checkpoint.path.exists())
+
+    def test_modified_csv_cannot_resume(self):
+        path = self.write_csv([['求 P(A)', '0.3', 'easy', '概率论', '']])
+        Checkpoint(path).save(2, {})
+        Path(path).write_text(Path(path).read_text(encoding='utf-8') + '求 P(B),0.4,easy,概率论,\n', encoding='utf-8')
+        with self.assertRaisesMessage(Exception, '去掉 --resume'):
+            self.run_import(path, resume=True)
+
+
+class DedupTests(ImportTestCase):
+    """重复导入按题面摘要更新已有题目；近似重复的题不导入并列入重复簇，只有数字不同的题照常导入"""
+
+    QUESTION = '某工厂生产的零件中有 5% 为次品，现从一大批零件中随机抽取 20 个进行检验，求其中恰有 2 个次品的概率'
+
+    def test_reimport_is_idempotent(self):
+        rows = [['求 P(A)', '0.3', 'easy', '概率论', ''], ['求 P(B)', '0.4', 'hard', '统计学', '']]
+        self.run_import(self.write_csv(rows))
+        out = self.run_import(self.write_csv(rows))
+        self.assertEqual(Exercise.objects.count(), 2)
+        self.assertIn('新增 0 条，已有题目 2 条（其中 0 条有更新）', out)
+
+    def test_reimport_updates_fields(self):
+        self.run_import(self.write_csv([['求 P(A)', '0.3', 'easy', '概率论', '']]))
+        exercise = Exercise.objects.get()
+        verdict_cache.set(exercise, '0.2', False, '不等于 0.3')
+
+        # 题面只差空白与标点，视为同一道题
+        out = self.run_import(self.write_csv([['求  P(A)。', '0.35', 'medium', '概率论', '提示']]))
+        exercise.refresh_from_db()
+        self.assertEqual(Exercise.objects.count(), 1)
+        self.assertEqual((exercise.answer, exercise.difficulty, exercise.hint), ('0.35', 'medium', '提示'))
+        self.assertIsNone(verdict_cache.get(exercise, '0.2'))
+        self.assertIn('其中 1 条有更新', out)
+
+    def test_exact_duplicates_in_one_file(self):
+        rows = [['求 P(A)', '0.3', 'easy', '概率论', ''], ['求 P（A）', '0.3', 'easy', '概率论', '']]
+        out = self.run_import(self.write_csv(rows))
+        self.assertEqual(Exercise.objects.count(), 1)
+        self.assertIn('重复 1 条', out)
+
+    def test_near_duplicates(self):
+        rows = [
+            [self.QUESTION, '0.189', 'medium', '概率论', ''],
+            [self.QUESTION.replace('某工厂', '一工厂'), '0.189', 'medium', '概率论', ''],
+            [self.QUESTION.replace('5%', '8%'), '0.264', 'medium', '概率论', ''],
+        ]
+        report = self.dir / 'report.json'
+        self.run_import(self.write_csv(rows), report=str(report))
+        self.assertEqual(Exercise.objects.count(), 2)
+        self.assertTrue(Exercise.objects.filter(question__contains='8%').exists())
+
+        clusters = json.loads(report.read_text(encoding='utf-8'))
+        self.assertEqual([(c['representative'], [m['line'] for m in c['members']]) for c in clusters], [('L2', [3])])
+
+    def test_near_duplicate_of_existing_exercise(self):
+        self.run_import(self.write_csv([[self.QUESTION, '0.189', 'medium', '概率论', '']]))
+        existing = Exercise.objects.get()
+        report = self.dir / 'report.json'
+        self.run_import(self.write_csv([[self.QUESTION.replace('某工厂', '一工厂'), '0.189', 'medium', '概率论', '']]),
+                        report=str(report))
+        self.assertEqual(Exercise.objects.count(), 1)
+        self.assertEqual(json.loads(report.read_text(encoding='utf-8'))[0]['representative'], f'#{existing.pk}')
+
+    def test_no_near_duplicates_option(self):
+        rows = [[self.QUESTION, '0.189', 'medium', '概率论', ''],
+                [self.QUESTION.replace('某工厂', '一工厂'), '0.189', 'medium', '概率论', '']]
+        self.run_import(self.write_csv(rows), no_near_duplicates=True)
+        self.assertEqual(Exercise.objects.count(), 2)
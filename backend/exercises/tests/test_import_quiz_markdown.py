@@ -0,0 +1,78 @@
+import tempfile
+from io import StringIO
+from pathlib import Path
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from exercises.management.commands.import_quiz_markdown import edited_problems
+from exercises.models import Exercise
+from users.models import LabeledExercise
+
+
+def render(problems) -> str:
+    return ''.join(f'<problem>\n{q}\n<problem/>\n<answer>\n{a}\n<answer/>\n' for q, a in problems)
+
+
+class EditedProblemsTests(TestCase):
+
+    def test_alignment(self):
+        cases = [
+            # (旧顺序, 新顺序, 期望的 {新: 旧})
+            ('abc', 'aXc', {'X': 'b'}),
+            ('abc', 'Nabc', {}),
+            ('abc', 'NaXc', {'X': 'b'}),
+            ('abc', 'ac', {}),
+            ('abc', 'cab', {}),
+            ('abc', 'XYc', {'X': 'a', 'Y': 'b'}),
+            ('abc', 'aXYc', {'X': 'b'}),
+        ]
+        for old, new, expected in cases:
+            with self.subTest(old=old, new=new):
+                self.assertEqual(edited_problems(list(old), list(new)), expected)
+
+
+class ImportQuizMarkdownTests(TestCase):
+    """改写题面措辞后重新导入，原地更新原题而不是新建一道题"""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        settings = override_settings(SIMILARITY_INDEX_DIR=str(Path(tmp.name) / 'similarity'))
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.path = Path(tmp.name) / '习题1.md'
+
+    def run_import(self, problems):
+        self.path.write_text(render(problems), encoding='utf-8')
+        out = StringIO()
+        call_command('import_quiz_markdown', path=str(self.path), force=True, stdout=out)
+        return out.getvalue()
+
+    def test_reimport_is_idempotent(self):
+        problems = [('求 P(A)', '0.3'), ('求 P(B)', '0.4')]
+        self.run_import(problems)
+        self.run_import(problems)
+        self.assertEqual(Exercise.objects.count(), 2)
+
+    def test_edited_question_updates_in_place(self):
+        self.run_import([('求 P(A)', '0.3'), ('求事件 B 的概率', '0.4'), ('求 P(C)', '0.5')])
+        original = Exercise.objects.get(question='求事件 B 的概率')
+        user = User.objects.create_user('importer', password='importer')
+        LabeledExercise.objects.create(profile=user.profile, exercise=original)
+
+        out = self.run_import([('求 P(A)', '0.3'), ('求事件 B 发生的概率', '0.45'), ('求 P(C)', '0.5')])
+
+        self.assertEqual(Exercise.objects.count(), 3)
+        original.refresh_from_db()
+        self.assertEqual((original.question, original.answer), ('求事件 B 发生的概率', '0.45'))
+        self.assertTrue(LabeledExercise.objects.filter(exercise=original).exists())
+        self.assertIn('改写题面 1', out)
+        self.assertNotIn('已从源文件中移除', out)
+
+    def test_inserted_problem_is_created(self):
+        self.run_import([('求 P(A)', '0.3'), ('求 P(B)', '0.4')])
+        out = self.run_import([('求 P(A)', '0.3'), ('求 P(A∪B)', '0.7'), ('求 P(B)', '0.4')])
+        self.assertEqual(Exercise.objects.count(), 3)
+        self.assertIn('新增 1', out)
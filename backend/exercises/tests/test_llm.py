@@ -0,0 +1,192 @@
+import time
+from types import SimpleNamespace
+from unittest import mock
+
+import httpx
+from django.test import SimpleTestCase
+from openai import APITimeoutError
+
+from exercises import llm
+from exercises.llm import CircuitBreaker, LLMError, LLMUnavailable
+
+
+def timeout_error() -> APITimeoutError:
+    return APITimeoutError(request=httpx.Request('POST', 'http://llm.test/chat/completions'))
+
+
+def chunk(text: str):
+    return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text))])
+
+
+class FakeStream:
+    def __init__(self, items, delay: float = 0.0):
+        self.items = items
+        self.delay = delay
+        self.closed = False
+
+    def __iter__(self):
+        for item in self.items:
+            time.sleep(self.delay)
+            if isinstance(item, BaseException):
+                raise item
+            yield chunk(item)
+
+    def close(self):
+        self.closed = True
+
+
+class FakeClient:
+    """按顺序返回或抛出 responses 中的结果"""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, **kwargs):
+        self.calls += 1
+        response = self.responses.pop(0)
+        if isinstance(response, BaseException):
+            raise response
+        return response
+
+
+class CircuitBreakerTests(SimpleTestCase):
+
+    def test_opens_after_threshold(self):
+        breaker = CircuitBreaker(threshold=2, reset_timeout=60)
+        breaker.before_call()
+        breaker.record_failure()
+        self.assertEqual(breaker.state, 'closed')
+        breaker.before_call()
+        breaker.record_failure()
+        self.assertEqual(breaker.state, 'open')
+        with self.assertRaises(LLMUnavailable):
+            breaker.before_call()
+
+    def test_success_resets_failures(self):
+        breaker = CircuitBreaker(threshold=2, reset_timeout=60)
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+        self.assertEqual(breaker.state, 'closed')
+
+    def test_half_open_allows_a_single_probe(self):
+        breaker = CircuitBreaker(threshold=1, reset_timeout=0)
+        breaker.record_failure()
+        self.assertEqual(breaker.state, 'half-open')
+        breaker.before_call()
+        with self.assertRaises(LLMUnavailable):
+            breaker.before_call()
+        breaker.record_success()
+        self.assertEqual(breaker.state, 'closed')
+        breaker.before_call()
+
+    def test_failed_probe_reopens(self):
+        breaker = CircuitBreaker(threshold=5, reset_timeout=0)
+        for _ in range(5):
+            breaker.record_failure()
+        breaker.before_call()
+        breaker.record_failure()
+        breaker.reset_timeout = 60
+        self.assertEqual(breaker.state, 'open')
+
+    def test_release_frees_the_probe(self):
+        breaker = CircuitBreaker(threshold=1, reset_timeout=0)
+        breaker.record_failure()
+        breaker.before_call()
+        breaker.release()
+        self.assertEqual(breaker.state, 'half-open')
+        breaker.before_call()
+
+
+class LLMClientTests(SimpleTestCase):
+
+    def setUp(self):
+        self.breaker = CircuitBreaker(threshold=3, reset_timeout=60)
+        for target, value in (('breaker', self.breaker), ('_backoff', lambda attempt: 0)):
+            patcher = mock.patch.object(llm, target, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def use(self, client: FakeClient) -> FakeClient:
+        patcher = mock.patch.object(llm, 'get_client', return_value=client)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return client
+
+    def half_open(self):
+        self.breaker.reset_timeout = 0
+        for _ in range(self.breaker.threshold):
+            self.breaker.record_failure()
+
+    def reply(self, text: str):
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=text))])
+
+    def test_chat_retries_then_succeeds(self):
+        client = self.use(FakeClient(timeout_error(), self.reply('ok')))
+        self.assertEqual(llm.chat([], max_retries=2), 'ok')
+        self.assertEqual(client.calls, 2)
+        self.assertEqual(self.breaker._failures, 0)
+
+    def test_chat_gives_up_after_max_retries(self):
+        client = self.use(FakeClient(timeout_error(), timeout_error()))
+        with self.assertRaises(LLMError):
+            llm.chat([], max_retries=1)
+        self.assertEqual(client.calls, 2)
+        self.assertEqual(self.breaker._failures, 2)
+
+    def test_non_retryable_error_releases_probe(self):
+        self.half_open()
+        client = self.use(FakeClient(ValueError('bad request'), self.reply('ok')))
+        with self.assertRaises(LLMError):
+            llm.chat([])
+        self.assertEqual(client.calls, 1)
+        # 试探名额已释放，下一个请求可以再次试探
+        self.assertEqual(llm.chat([]), 'ok')
+        self.assertEqual(self.breaker.state, 'closed')
+
+    def test_expired_deadline_does_not_take_the_probe(self):
+        self.half_open()
+        client = self.use(FakeClient(self.reply('ok')))
+        with self.assertRaises(LLMError):
+            llm.chat([], timeout=0)
+        self.assertEqual(client.calls, 0)
+        self.assertFalse(self.breaker._probing)
+
+    def test_stream_success_closes_breaker(self):
+        self.half_open()
+        stream = FakeStream(['a', 'b'])
+        self.use(FakeClient(stream))
+        self.assertEqual(list(llm.stream_chat([])), ['a', 'b'])
+        self.assertTrue(stream.closed)
+        self.assertEqual(self.breaker.state, 'closed')
+
+    def test_stream_disconnect_is_neutral(self):
+        self.half_open()
+        stream = FakeStream(['a', 'b'])
+        self.use(FakeClient(stream))
+        chunks = llm.stream_chat([])
+        next(chunks)
+        chunks.close()
+        self.assertTrue(stream.closed)
+        self.assertEqual(self.breaker.state, 'half-open')
+        self.assertFalse(self.breaker._probing)
+
+    def test_stream_error_midway_records_failure(self):
+        self.half_open()
+        for error in (httpx.ReadError('reset'), ValueError('broken chunk')):
+            with self.subTest(error=error):
+                self.breaker._probing = False
+                self.use(FakeClient(FakeStream(['a', error])))
+                with self.assertRaises(Exception):
+                    list(llm.stream_chat([]))
+                self.breaker.reset_timeout = 60
+                self.assertEqual(self.breaker.state, 'open')
+                self.breaker.reset_timeout = 0
+
+    def test_stream_deadline_covers_slow_body(self):
+        self.use(FakeClient(FakeStream(['a'] * 10, delay=0.03)))
+        with self.assertRaises(LLMError):
+            list(llm.stream_chat([], timeout=0.1))
+        self.assertEqual(self.breaker._failures, 1)
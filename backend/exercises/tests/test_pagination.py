@@ -0,0 +1,83 @@
+from datetime import timedelta
+from urllib.parse import urlencode
+
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from courses.models import Chapter, Course
+from exercises.models import Exercise
+
+
+class CursorPaginationTests(APITestCase):
+    """游标分页前后翻页往返一致；同一时刻创建的题按 id 排序，翻页期间插入新题不会重复或遗漏"""
+
+    @classmethod
+    def setUpTestData(cls):
+        chapter = Chapter.objects.create(course=Course.objects.create(title='课程', description=''), title='章节', order=0)
+        base = timezone.now()
+        for i in range(25):
+            exercise = Exercise.objects.create(question=f'第 {i} 题', answer='', explanation='', hint='',
+                                               category='统计学' if i % 2 else '概率论', difficulty='easy',
+                                               chapter=chapter)
+            # 每三道题共用一个创建时间，检验同一时刻的题目顺序
+            Exercise.objects.filter(pk=exercise.pk).update(created_at=base - timedelta(minutes=i // 3))
+        cls.chapter = chapter
+
+    def expected(self, **filters) -> list[int]:
+        return list(Exercise.objects.filter(**filters).order_by('-created_at', '-id').values_list('pk', flat=True))
+
+    def walk(self, url: str, direction: str = 'next') -> list[list[int]]:
+        pages = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            pages.append([item['id'] for item in response.data['results']])
+            url = response.data[direction]
+        return pages
+
+    def test_forward_and_backward_round_trip(self):
+        pages = self.walk('/api/exercise/?cursor=')
+        self.assertEqual([len(page) for page in pages], [10, 10, 5])
+        self.assertEqual(sum(pages, []), self.expected())
+
+        last = self.client.get('/api/exercise/?cursor=').data
+        while last['next']:
+            last = self.client.get(last['next']).data
+        self.assertIsNone(last['next'])
+        backward = self.walk(last['previous'], 'previous')
+        self.assertEqual(backward, pages[-2::-1])
+
+    def test_first_page_has_no_previous(self):
+        response = self.client.get('/api/exercise/?cursor=')
+        self.assertIsNone(response.data['previous'])
+        self.assertNotIn('count', response.data)
+
+    def test_insert_during_paging(self):
+        first = self.client.get('/api/exercise/?cursor=').data
+        Exercise.objects.create(question='新题', answer='', explanation='', hint='', category='概率论',
+                                difficulty='easy', chapter=self.chapter)
+        rest = self.walk(first['next'])
+        seen = [item['id'] for item in first['results']] + sum(rest, [])
+        self.assertEqual(len(seen), len(set(seen)))
+        self.assertEqual(seen, self.expected()[1:])
+
+    def test_search_with_filters(self):
+        pages = self.walk('/api/exercise/search/?' + urlencode({'category': '统计学', 'cursor': ''}))
+        self.assertEqual(sum(pages, []), self.expected(category='统计学'))
+
+    def test_counts(self):
+        cases = [('exact', 25, False), ('approx', 25, True)]
+        for mode, count, approximate in cases:
+            with self.subTest(mode=mode):
+                data = self.client.get(f'/api/exercise/?cursor=&count={mode}').data
+                self.assertEqual((data['count'], data['count_approximate']), (count, approximate))
+
+    def test_invalid_cursor(self):
+        for cursor in ('not-base64!', 'eHx5fHo', 'MjAyNi0wMS0wMVQwMDowMDowMHwxfHg'):
+            with self.subTest(cursor=cursor):
+                self.assertEqual(self.client.get(f'/api/exercise/?cursor={cursor}').status_code, 404)
+
+    def test_page_number_pagination_unchanged(self):
+        data = self.client.get('/api/exercise/?page=3').data
+        self.assertEqual(data['count'], 25)
+        self.assertEqual(len(data['results']), 5)
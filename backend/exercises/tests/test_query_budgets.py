@@ -0,0 +1,88 @@
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from courses.models import Chapter, ChapterContent, Course
+from exercises.facets import rebuild_facets
+from exercises.models import Exercise
+from knowledge.models import Knowledge
+from users.models import ArchivedExercise, LabeledExercise
+
+# (名称, 地址, 是否需要登录, 查询次数)；未命中缓存时的查询次数，两种数据规模下必须相同（N+1 回归检查）
+# 目录接口含条件请求校验值的查询：删除计数 1 次 + 每个相关模型的 MAX(updated_at) 各 1 次
+BUDGETS = [
+    ('course list', '/api/course/courses/', False, 7),
+    ('course detail', '/api/course/courses/{course}/', False, 7),
+    ('course chapters', '/api/course/courses/{course}/chapters/', False, 7),
+    ('chapter list', '/api/course/chapters/', False, 5),
+    ('chapter content', '/api/course/chapters/{chapter}/content/', False, 5),
+    ('knowledge list', '/api/knowledge/', False, 4),
+    ('knowledge popular', '/api/knowledge/popular/', False, 3),
+    ('exercise list', '/api/exercise/', False, 5),
+    ('exercise list (cursor)', '/api/exercise/?cursor=&mode=practice', False, 4),
+    ('exercise search', '/api/exercise/search/?category=概率论&difficulty=easy', False, 5),
+    ('exercise facets', '/api/exercise/facets/', False, 4),
+    ('exercise detail', '/api/exercise/{exercise}/', False, 4),
+    ('my exercises', '/api/users/me/exercises/', True, 4),
+    ('my error report', '/api/users/me/error-report/', True, 6),
+]
+
+
+def populate(scale: int) -> dict:
+    """按规模生成数据：scale 门课程 × scale 个章节 × scale 条内容，以及 10 * scale 道题"""
+    chapters = []
+    for i in range(scale):
+        course = Course.objects.create(title=f'课程{i}', description='')
+        for j in range(scale):
+            chapter = Chapter.objects.create(course=course, title=f'章节{i}-{j}', order=j)
+            chapters.append(chapter)
+            ChapterContent.objects.bulk_create([
+                ChapterContent(chapter=chapter, title=f'内容{k}', content_type='ppt', url='https://example.com/', order=k)
+                for k in range(scale)
+            ])
+    exercises = Exercise.objects.bulk_create([
+        Exercise(question=f'题目{i}', answer='1', explanation='', hint='', category='概率论',
+                 difficulty=['easy', 'medium', 'hard'][i % 3], chapter=chapters[i % len(chapters)])
+        for i in range(10 * scale)
+    ])
+    rebuild_facets()
+    Knowledge.objects.bulk_create([
+        Knowledge(title=f'知识点{i}', description='', content='', category='概率论', duration='5:00')
+        for i in range(5 * scale)
+    ])
+
+    user = User.objects.create_user('budget-check', password='budget-check')
+    profile = user.profile
+    LabeledExercise.objects.bulk_create([LabeledExercise(profile=profile, exercise=e) for e in exercises[:scale * 3]])
+    ArchivedExercise.objects.bulk_create([ArchivedExercise(profile=profile, exercise=e) for e in exercises[-scale * 3:]])
+    return {
+        'course': chapters[0].course_id,
+        'chapter': chapters[0].pk,
+        'exercise': exercises[0].pk,
+        'token': Token.objects.create(user=user).key,
+    }
+
+
+class QueryBudgetTests(APITestCase):
+    """各接口未命中缓存时的查询次数固定，不随课程、章节、题目数量增长"""
+
+    def assert_budgets(self, scale: int):
+        ids = populate(scale)
+        for name, url, needs_login, budget in BUDGETS:
+            with self.subTest(endpoint=name, scale=scale):
+                if needs_login:
+                    self.client.credentials(HTTP_AUTHORIZATION=f"Token {ids['token']}")
+                else:
+                    self.client.credentials()
+                for alias in ('default', 'catalog'):
+                    caches[alias].clear()
+                with self.assertNumQueries(budget):
+                    response = self.client.get(url.format(**ids))
+                self.assertEqual(response.status_code, 200)
+
+    def test_small_catalog(self):
+        self.assert_budgets(1)
+
+    def test_large_catalog(self):
+        self.assert_budgets(4)
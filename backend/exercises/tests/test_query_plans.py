@@ -0,0 +1,72 @@
+import re
+from datetime import datetime, timezone
+
+from django.db.models import Q
+from django.test import TestCase
+
+from exercises.models import Exercise
+from users.models import ArchivedExercise, LabeledExercise
+
+# 全表扫描：SQLite 的 "SCAN <表>"（未使用索引）与 PostgreSQL 的 "Seq Scan on <表>"
+FULL_SCAN_PATTERNS = (
+    re.compile(r'\bSCAN (?!.*\bUSING\b)(?:TABLE )?(\w+)'),
+    re.compile(r'\bSeq Scan on (\w+)'),
+)
+# 排序未走索引：SQLite 的临时 B 树与 PostgreSQL 的 Sort 节点
+SORT_PATTERNS = (
+    re.compile(r'USE TEMP B-TREE FOR .*ORDER BY'),
+    re.compile(r'^\s*(?:->\s*)?Sort\b', re.M),
+)
+
+
+def hot_queries():
+    """
+    热点查询清单：(名称, QuerySet, 是否要求排序走索引)
+    与 ExerciseViewSet.list / search 以及个人中心的标注、归档列表保持一致
+    """
+    page = 10
+    # 游标分页的翻页条件，见 ExerciseCursorPagination
+    created_at = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    after_cursor = Q(created_at__lte=created_at) & (Q(created_at__lt=created_at) | Q(id__lt=100))
+    return [
+        ('exercise list', Exercise.objects.all()[:page], True),
+        ('search category', Exercise.objects.filter(category='概率论')[:page], True),
+        ('search difficulty', Exercise.objects.filter(difficulty__in=['easy'])[:page], True),
+        ('search category+difficulty', Exercise.objects.filter(category='概率论', difficulty__in=['easy'])[:page], True),
+        # difficulty 传多个值时 SQLite 无法用索引保证顺序，只要求不全表扫描
+        ('search category+difficulties',
+         Exercise.objects.filter(category='概率论', difficulty__in=['easy', 'medium'])[:page], False),
+        ('search difficulties', Exercise.objects.filter(difficulty__in=['easy', 'medium'])[:page], False),
+        ('exercise list cursor', Exercise.objects.filter(after_cursor).order_by('-created_at', '-id')[:page + 1], True),
+        ('search category cursor',
+         Exercise.objects.filter(after_cursor, category='概率论').order_by('-created_at', '-id')[:page + 1], True),
+        ('search count', Exercise.objects.filter(category='概率论', difficulty__in=['easy', 'medium']).order_by(), False),
+        # 随机练习：(分类, 难度) 桶内按 id 顺序跳过 r 道可选的题；用户跳过的题按 profile 读取
+        ('sample probe',
+         Exercise.objects.filter(category='概率论', difficulty='easy').exclude(pk__in=[3, 7])
+         .order_by('pk').values_list('pk', flat=True)[20:21], True),
+        ('sample excluded', ArchivedExercise.objects.filter(profile_id=1).values_list('exercise_id', flat=True), False),
+        ('labeled list', LabeledExercise.objects.filter(profile_id=1).select_related('exercise'), True),
+        ('archived list', ArchivedExercise.objects.filter(profile_id=1).select_related('exercise'), True),
+    ]
+
+
+def check_plan(plan: str, ordered: bool) -> list[str]:
+    """返回执行计划中的问题，空列表表示通过"""
+    problems = []
+    for pattern in FULL_SCAN_PATTERNS:
+        for table in pattern.findall(plan):
+            problems.append(f"全表扫描 {table}")
+    if ordered and any(pattern.search(plan) for pattern in SORT_PATTERNS):
+        problems.append("排序未使用索引")
+    return problems
+
+
+class QueryPlanTests(TestCase):
+    """热点查询的执行计划中不得出现全表扫描或未走索引的排序（索引回归检查）"""
+
+    def test_hot_queries_use_indexes(self):
+        for name, qs, ordered in hot_queries():
+            with self.subTest(name):
+                plan = qs.explain()
+                self.assertEqual(check_plan(plan, ordered), [], f"\nSQL: {qs.query}\n{plan}")
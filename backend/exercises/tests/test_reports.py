@@ -0,0 +1,49 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+
+from courses.models import Chapter, Course
+from exercises.models import Exercise
+from users.models import LabeledExercise, UserErrorReport
+from users.reports import regenerate_report
+
+
+class ErrorReportTests(TestCase):
+
+    def setUp(self):
+        chapter = Chapter.objects.create(course=Course.objects.create(title='课程', description=''), title='章节', order=0)
+        self.exercise = Exercise.objects.create(question='求 P(A)', answer='0.3', explanation='', hint='',
+                                                category='概率论', difficulty='easy', chapter=chapter)
+        self.profile = User.objects.create_user('reporter', password='reporter').profile
+        self.report = UserErrorReport.objects.create(profile=self.profile)
+        patcher = mock.patch('users.reports.generate_error_report', return_value='# 近期易错概览')
+        self.generate = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def label(self, explanation='混淆了互斥与独立'):
+        return LabeledExercise.objects.create(profile=self.profile, exercise=self.exercise,
+                                              user_answer='0.5', correct_answer='0.3', explanation=explanation)
+
+    def test_full_then_skipped(self):
+        self.label()
+        self.assertEqual(regenerate_report(self.report), 'full')
+        self.assertEqual(regenerate_report(self.report), 'skipped')
+        self.assertEqual(self.generate.call_count, 1)
+
+    def test_unlabeling_everything_clears_without_calling_the_model(self):
+        self.label()
+        regenerate_report(self.report)
+        LabeledExercise.objects.filter(profile=self.profile).delete()
+        self.generate.reset_mock()
+
+        self.assertEqual(regenerate_report(self.report), 'empty')
+        self.generate.assert_not_called()
+        self.report.refresh_from_db()
+        self.assertEqual((self.report.content, self.report.source_entries), ('', []))
+        self.assertEqual(regenerate_report(self.report), 'skipped')
+
+    def test_labels_without_explanation_do_not_call_the_model(self):
+        self.label(explanation='')
+        self.assertEqual(regenerate_report(self.report), 'empty')
+        self.generate.assert_not_called()
@@ -0,0 +1,70 @@
+from collections import Counter
+
+from django.contrib.auth.models import User
+from django.db.models import F
+from django.test import TestCase
+
+from courses.models import Chapter, Course
+from exercises.facets import rebuild_facets
+from exercises.models import Exercise, ExerciseFacet
+from exercises.sampling import sample_exercises
+from users.models import ArchivedExercise
+
+DRAWS = 600
+
+
+class SamplingTests(TestCase):
+    """桶内 id 有大段间隔、与其他桶穿插、用户归档了连续一段时，每道可选的题被抽中的概率仍然相同"""
+
+    @classmethod
+    def setUpTestData(cls):
+        chapter = Chapter.objects.create(course=Course.objects.create(title='课程', description=''), title='章节', order=0)
+        # 目标桶 (概率论, easy) 的题与 (统计学, easy) 的题穿插：目标桶题目之间隔着 0～9 道其他桶的题
+        rows = []
+        for gap in [0, 9, 0, 1, 9, 0, 0, 5, 9, 0]:
+            rows += [('统计学', f'统计{len(rows)}-{i}') for i in range(gap)]
+            rows.append(('概率论', f'概率{len(rows)}'))
+        exercises = Exercise.objects.bulk_create([
+            Exercise(question=q, answer='1', explanation='', hint='', category=c, difficulty='easy', chapter=chapter)
+            for c, q in rows
+        ])
+        rebuild_facets()
+        cls.targets = [e.pk for e in exercises if e.category == '概率论']
+        cls.user = User.objects.create_user('sampler', password='sampler')
+
+    def frequencies(self, **kwargs) -> Counter:
+        counts = Counter()
+        for seed in range(DRAWS):
+            counts.update(e.pk for e in sample_exercises(1, category='概率论', seed=seed, **kwargs))
+        return counts
+
+    def assertUniform(self, counts: Counter, pks):
+        expected = DRAWS / len(pks)
+        self.assertEqual(set(counts), set(pks))
+        for pk in pks:
+            # 二项分布标准差约 9～11，允许 ±4 个标准差
+            self.assertLess(abs(counts[pk] - expected), 45, (pk, counts[pk], expected))
+
+    def test_uniform_within_bucket(self):
+        self.assertUniform(self.frequencies(), self.targets)
+
+    def test_uniform_after_archiving_a_run(self):
+        archived = self.targets[3:7]
+        ArchivedExercise.objects.bulk_create([ArchivedExercise(profile=self.user.profile, exercise_id=pk) for pk in archived])
+        counts = self.frequencies(profile=self.user.profile)
+        self.assertUniform(counts, [pk for pk in self.targets if pk not in archived])
+
+    def test_without_replacement_and_reproducible(self):
+        first = [e.pk for e in sample_exercises(20, seed=7)]
+        self.assertEqual(len(first), len(set(first)))
+        self.assertEqual(len(first), 20)
+        self.assertEqual(first, [e.pk for e in sample_exercises(20, seed=7)])
+        everything = {e.pk for e in sample_exercises(100, category='概率论', seed=1)}
+        self.assertEqual(everything, set(self.targets))
+
+    def test_stale_facet_counts(self):
+        # 计数表偏大时（例如绕过信号的批量删除）仍只返回实际存在的题
+        ExerciseFacet.objects.filter(category='概率论').update(count=F('count') + 5)
+        for seed in range(20):
+            picked = [e.pk for e in sample_exercises(100, category='概率论', seed=seed)]
+            self.assertEqual(sorted(picked), sorted(self.targets))
@@ -0,0 +1,60 @@
+from django.test import TestCase
+
+from courses.models import Chapter, Course
+from exercises.models import Exercise
+from search.index import build_match, fts_available, search_hits, tokenize
+
+QUESTIONS = [
+    '设 X 服从均匀分布，求 E(X)',
+    '求二项分布的方差',
+    '某地区发布的统计数据中，求频率',
+    '求两个事件同时发生的概率',
+]
+
+
+class SearchTokenizeTests(TestCase):
+
+    def test_tokenize_appends_single_characters(self):
+        self.assertEqual(tokenize('均匀分布 x1'), ['均匀', '匀分', '分布', 'x1', '均', '匀', '分', '布'])
+        self.assertEqual(tokenize('布'), ['布'])
+
+    def test_build_match(self):
+        cases = [
+            ('分布', '"分布"'),
+            ('均匀分布', '"均匀 匀分 分布"'),
+            ('布', '"布"'),
+            ('var', '"var"*'),
+            ('布 var', '"布" "var"*'),
+        ]
+        for query, expected in cases:
+            with self.subTest(query=query):
+                self.assertEqual(build_match(query), expected)
+
+
+class SingleCharacterSearchTests(TestCase):
+    """单个汉字的查询要与 question__contains 找到同样的题，包括该字在词尾的情况"""
+
+    @classmethod
+    def setUpTestData(cls):
+        chapter = Chapter.objects.create(course=Course.objects.create(title='课程', description=''), title='章节', order=0)
+        for question in QUESTIONS:
+            Exercise.objects.create(question=question, answer='', explanation='', hint='', category='概率论',
+                                    difficulty='easy', chapter=chapter)
+
+    def setUp(self):
+        if not fts_available():
+            self.skipTest('需要 SQLite FTS5')
+
+    def test_matches_contains(self):
+        for query in ('布', '率', '发', '求'):
+            with self.subTest(query=query):
+                _, hits = search_hits(query, ['exercise'], limit=100)
+                expected = set(Exercise.objects.filter(question__contains=query).values_list('pk', flat=True))
+                self.assertTrue(expected)
+                self.assertEqual({pk for _, pk, _ in hits}, expected)
+
+    def test_phrase_still_requires_adjacency(self):
+        _, hits = search_hits('分布', ['exercise'], limit=100)
+        self.assertEqual(len(hits), 2)
+        _, hits = search_hits('布发', ['exercise'], limit=100)
+        self.assertEqual(hits, [])
@@ -0,0 +1,85 @@
+import tempfile
+import threading
+import time
+
+from django.test import TestCase, override_settings
+
+from courses.models import Chapter, Course
+from exercises import similarity
+from exercises.models import Exercise
+
+QUESTIONS = [
+    '掷两枚均匀的骰子，求点数之和为 7 的概率',
+    '袋中有 3 个红球 5 个白球，不放回取两次，求两次都是红球的概率',
+    '设随机变量 X 服从参数为 2 的泊松分布，求 P(X=0)',
+    '设 X 服从标准正态分布，求 P(|X|<1.96)',
+    '一批产品次品率为 0.1，随机抽取 10 件，求恰有 1 件次品的概率',
+]
+
+
+class SimilarityRefreshTests(TestCase):
+    """题面修改与删除后，相似题查询要反映数据库中的当前内容"""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        settings = override_settings(SIMILARITY_INDEX_DIR=tmp.name, SIMILARITY_REBUILD_RATIO=10,
+                                     SIMILARITY_REFRESH_IN_BACKGROUND=False)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        similarity._loaded = None
+
+        chapter = Chapter.objects.create(course=Course.objects.create(title='课程', description=''), title='章节', order=0)
+        self.exercises = Exercise.objects.bulk_create([
+            Exercise(question=q, answer='1', explanation='', hint='', category='概率论', difficulty='easy', chapter=chapter)
+            for q in QUESTIONS
+        ])
+        similarity.rebuild()
+
+    def top_hit(self, text):
+        hits = similarity.get_index().query(text, 1)
+        return hits[0][0] if hits else None
+
+    def test_edited_question_is_reindexed(self):
+        exercise = self.exercises[0]
+        exercise.question = '已知二维随机变量的联合密度函数，求边缘密度与协方差'
+        with self.captureOnCommitCallbacks(execute=True):
+            exercise.save()
+
+        self.assertEqual(self.top_hit('联合密度函数 边缘密度 协方差'), exercise.pk)
+        self.assertNotEqual(self.top_hit('掷两枚均匀的骰子，点数之和'), exercise.pk)
+        self.assertEqual(len(similarity.get_index().ids), len(QUESTIONS))
+
+    def test_deleted_exercises_leave_the_index(self):
+        removed = self.exercises[:2]
+        with self.captureOnCommitCallbacks(execute=True):
+            Exercise.objects.filter(pk__in=[e.pk for e in removed]).delete()
+
+        ids = set(similarity.get_index().ids.tolist())
+        self.assertFalse(ids & {e.pk for e in removed})
+        self.assertEqual(len(ids), len(QUESTIONS) - len(removed))
+
+    def test_unchanged_question_keeps_index_version(self):
+        version = similarity.get_index().version
+        exercise = self.exercises[1]
+        exercise.answer = '3/28'
+        with self.captureOnCommitCallbacks(execute=True):
+            exercise.save()
+
+        self.assertEqual(similarity.get_index().version, version)
+
+    def test_writers_are_serialized(self):
+        # 持有锁期间另一个写入者（与其他进程一样使用独立的文件句柄）必须等待
+        order = []
+
+        def writer():
+            with similarity.index_lock():
+                order.append('second')
+
+        with similarity.index_lock():
+            thread = threading.Thread(target=writer)
+            thread.start()
+            time.sleep(0.2)
+            order.append('first')
+        thread.join(5)
+        self.assertEqual(order, ['first', 'second'])
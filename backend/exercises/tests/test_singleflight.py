@@ -0,0 +1,108 @@
+import threading
+from datetime import timedelta
+from unittest import mock
+
+from django.db import DatabaseError
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+from exercises.models import GradingLease
+from exercises.singleflight import SingleFlight, acquire_lease, coalesce_across_workers, release_lease
+
+
+class SingleFlightTests(SimpleTestCase):
+    """同一键的并发调用只执行一次，结果与异常都共享给等待者"""
+
+    def run_concurrently(self, flight, fn, threads=5):
+        results, errors = [], []
+        started = threading.Barrier(threads)
+
+        def worker():
+            started.wait()
+            try:
+                results.append(flight.do('key', fn))
+            except Exception as e:
+                errors.append(e)
+
+        pool = [threading.Thread(target=worker) for _ in range(threads)]
+        for thread in pool:
+            thread.start()
+        for thread in pool:
+            thread.join()
+        return results, errors
+
+    def test_concurrent_calls_share_one_result(self):
+        flight = SingleFlight()
+        calls = []
+        release = threading.Event()
+
+        def fn():
+            calls.append(1)
+            release.wait(1)
+            return 'verdict'
+
+        threading.Timer(0.1, release.set).start()
+        results, errors = self.run_concurrently(flight, fn)
+        self.assertEqual(results, ['verdict'] * 5)
+        self.assertEqual((len(calls), errors, flight.shared), (1, [], 4))
+
+    def test_error_is_shared(self):
+        flight = SingleFlight()
+        release = threading.Event()
+
+        def fn():
+            release.wait(1)
+            raise RuntimeError('boom')
+
+        threading.Timer(0.1, release.set).start()
+        results, errors = self.run_concurrently(flight, fn)
+        self.assertEqual(results, [])
+        self.assertEqual([str(e) for e in errors], ['boom'] * 5)
+
+    def test_key_is_released_after_call(self):
+        flight = SingleFlight()
+        self.assertEqual(flight.do('key', lambda: 1), 1)
+        self.assertEqual(flight.do('key', lambda: 2), 2)
+        self.assertEqual(flight.shared, 0)
+
+
+class LeaseTests(TestCase):
+    """跨 worker 租约：持有者执行，其他 worker 等待缓存结果，超时或租约过期后自行执行"""
+
+    def test_acquire_and_release(self):
+        self.assertTrue(acquire_lease('k', ttl=60))
+        self.assertFalse(acquire_lease('k', ttl=60))
+        release_lease('k')
+        self.assertTrue(acquire_lease('k', ttl=60))
+
+    def test_expired_lease_is_taken_over(self):
+        GradingLease.objects.create(key='k', owner='dead-worker', expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertTrue(acquire_lease('k', ttl=60))
+        self.assertNotEqual(GradingLease.objects.get(key='k').owner, 'dead-worker')
+
+    def test_database_error_does_not_block(self):
+        with mock.patch.object(GradingLease.objects, 'filter', side_effect=DatabaseError('locked')):
+            self.assertTrue(acquire_lease('k', ttl=60))
+
+    def test_holder_checks_cache_before_calling(self):
+        fn = mock.Mock(return_value=(True, '调用'))
+        self.assertEqual(coalesce_across_workers('k', fn, lambda: (True, '缓存')), (True, '缓存'))
+        fn.assert_not_called()
+        self.assertEqual(coalesce_across_workers('k', fn, lambda: None), (True, '调用'))
+        fn.assert_called_once()
+        self.assertFalse(GradingLease.objects.exists())
+
+    def test_waiter_uses_result_written_by_holder(self):
+        GradingLease.objects.create(key='k', owner='other', expires_at=timezone.now() + timedelta(seconds=60))
+        fn = mock.Mock()
+        lookup = mock.Mock(side_effect=[None, None, (False, '他人结果')])
+        result = coalesce_across_workers('k', fn, lookup, wait_timeout=5, poll_interval=0)
+        self.assertEqual(result, (False, '他人结果'))
+        fn.assert_not_called()
+
+    def test_waiter_falls_back_after_timeout(self):
+        GradingLease.objects.create(key='k', owner='other', expires_at=timezone.now() + timedelta(seconds=60))
+        fn = mock.Mock(return_value=(False, '自行判题'))
+        result = coalesce_across_workers('k', fn, lambda: None, wait_timeout=0.05, poll_interval=0.01)
+        self.assertEqual(result, (False, '自行判题'))
+        fn.assert_called_once()
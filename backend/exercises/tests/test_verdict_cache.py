@@ -0,0 +1,81 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase
+from django.utils import timezone
+
+from courses.models import Chapter, Course
+from exercises.cache import VerdictCache, normalize_answer, verdict_cache
+from exercises.grading import grade_exercise
+from exercises.models import Exercise, VerdictCacheEntry
+
+
+class VerdictCacheTests(TestCase):
+
+    def setUp(self):
+        chapter = Chapter.objects.create(course=Course.objects.create(title='课程', description=''), title='章节', order=0)
+        self.exercise = Exercise.objects.create(question='求 P(A∪B)', answer='P(A)+P(B)-P(AB)', explanation='', hint='',
+                                                category='概率论', difficulty='easy', chapter=chapter)
+        self.cache = VerdictCache(max_entries=2, ttl=3600)
+
+    def test_normalize_answer(self):
+        cases = [('  P(A) + P(B) ', 'P(A) + P(B)'), ('ＰＡ　＋１', 'PA +1'), ('a\n\tb', 'a b'), (None, '')]
+        for raw, expected in cases:
+            with self.subTest(raw=raw):
+                self.assertEqual(normalize_answer(raw), expected)
+
+    def test_memory_then_database_hit(self):
+        self.assertIsNone(self.cache.get(self.exercise, 'x'))
+        self.cache.set(self.exercise, 'x', True, '正确')
+        self.assertEqual(self.cache.get(self.exercise, ' x '), (True, '正确'))
+        self.cache.clear()
+        with self.assertNumQueries(2):
+            # 读数据库一次、累加命中次数一次
+            self.assertEqual(self.cache.get(self.exercise, 'x'), (True, '正确'))
+        with self.assertNumQueries(0):
+            self.cache.get(self.exercise, 'x')
+        stats = self.cache.stats()
+        self.assertEqual((stats['memory_hits'], stats['db_hits'], stats['misses']), (2, 1, 1))
+
+    def test_answer_change_misses(self):
+        self.cache.set(self.exercise, 'x', True, '正确')
+        self.exercise.answer = '1 - P(\\bar A \\bar B)'
+        self.assertIsNone(self.cache.get(self.exercise, 'x'))
+
+    def test_invalidate_clears_both_tiers(self):
+        self.cache.set(self.exercise, 'x', True, '正确')
+        self.cache.invalidate(self.exercise.pk)
+        self.assertIsNone(self.cache.get(self.exercise, 'x'))
+        self.assertFalse(VerdictCacheEntry.objects.exists())
+
+    def test_lru_eviction_keeps_database_copy(self):
+        for answer in ('a', 'b', 'c'):
+            self.cache.set(self.exercise, answer, False, answer)
+        self.assertEqual(self.cache.stats()['memory_entries'], 2)
+        with self.assertNumQueries(2):
+            self.assertEqual(self.cache.get(self.exercise, 'a'), (False, 'a'))
+
+    def test_first_writer_wins(self):
+        self.cache.set(self.exercise, 'x', True, '先到')
+        VerdictCache().set(self.exercise, 'x', False, '后到')
+        self.assertEqual(VerdictCacheEntry.objects.get().explanation, '先到')
+
+    def test_database_ttl(self):
+        cache = VerdictCache(db_ttl=60)
+        cache.set(self.exercise, 'x', True, '正确')
+        cache.clear()
+        VerdictCacheEntry.objects.update(created_at=timezone.now() - timedelta(seconds=120))
+        self.assertIsNone(cache.get(self.exercise, 'x'))
+        self.assertFalse(VerdictCacheEntry.objects.exists())
+
+    def test_grade_exercise_caches_only_parsed_verdicts(self):
+        verdict_cache.invalidate(self.exercise.pk)
+        with mock.patch('exercises.grading.call_deepseek_api', return_value=(False, '')) as api:
+            self.assertEqual(grade_exercise(self.exercise, 'P(A)+P(B)'), (False, ''))
+            self.assertEqual(grade_exercise(self.exercise, 'P(A)+P(B)'), (False, ''))
+        self.assertEqual(api.call_count, 2)
+
+        with mock.patch('exercises.grading.call_deepseek_api', return_value=(False, '漏减交集')) as api:
+            grade_exercise(self.exercise, 'P(A)+P(B)')
+            self.assertEqual(grade_exercise(self.exercise, ' P(A)+P(B)\n'), (False, '漏减交集'))
+        self.assertEqual(api.call_count, 1)
@@ -1,6 +1,45 @@
-import os
-from openai import OpenAI
-from dotenv import load_dotenv
+import json
+import re
+
+from .llm import chat, stream_chat
+
+VERDICT_MARKER = '【判定】'
+_FENCE_RE = re.compile(r'```(?:json)?\s*(.*?)\s*```', re.S)
+
+
+def parse_verdict(reply: str) -> tuple[bool, str]:
+    """严格解析判题回复中的 JSON：is_correct 为布尔值或 "true"/"false"，explanation 为非空字符串；不合法时抛出 ValueError"""
+    text = reply.strip()
+    fenced = _FENCE_RE.fullmatch(text)
+    if fenced:
+        text = fenced.group(1)
+    data = json.loads(text)
+    if not isinstance(data, dict):
+        raise ValueError(f"回复不是 JSON 对象：{text[:80]}")
+    is_correct = data.get('is_correct')
+    if isinstance(is_correct, str) and is_correct.strip().lower() in ('true', 'false'):
+        is_correct = is_correct.strip().lower() == 'true'
+    if not isinstance(is_correct, bool):
+        raise ValueError(f"is_correct 不合法：{is_correct!r}")
+    explanation = data.get('explanation')
+    if not isinstance(explanation, str) or not explanation.strip():
+        raise ValueError("explanation 为空")
+    return is_correct, explanation.strip()
+
+
+def parse_stream_verdict(reply: str) -> tuple[bool, str]:
+    """严格解析流式判题回复：判定标记之后只能是 “正确” 或 “错误”，标记前的解释不能为空；不合法时抛出 ValueError"""
+    marker_at = reply.find(VERDICT_MARKER)
+    if marker_at < 0:
+        raise ValueError("回复中没有判定标记")
+    tail = reply[marker_at + len(VERDICT_MARKER):].strip().rstrip('。.').strip()
+    if tail not in ('正确', '错误'):
+        raise ValueError(f"判定不合法：{tail[:20]!r}")
+    explanation = reply[:marker_at].strip()
+    if not explanation:
+        raise ValueError("explanation 为空")
+    return tail == '正确', explanation
+
 
 # 调用 DeepSeek API 的函数
 def call_deepseek_api(question: str, user_answer: str, correct_answer: str) -> tuple[bool, str]:
@@ -8,34 +47,21 @@ def call_deepseek_api(question: str, user_answer: str, correct_answer: str) -> t
     调用 DeepSeek 或其他判题服务
     返回 bool，表示用户答案是否正确
     """
-    load_dotenv()
-    client = OpenAI(
-        api_key=os.getenv('DEEPSEEK_API_KEY'),
-        base_url="https://api.deepseek.com")
     try:
-        response = client.chat.completions.create(
-            model="deepseek-chat",
-            messages=[
+        result = chat(
+            [
                 {   
                     "role": "system", 
                     "content": "你是一个专门用于判断数学题目给定答案正确与否的聊天机器人，你在回答过程中不应包含任何人称词语，而是客观进行判断和解释"},
                 {
                     "role": "user", 
-                    "content": f"假设你需要进行对一个数学问题的正确答案与给定答案之间的判定（对或错），并给出判定的解释，假如题目为 {question}, 正确答案为 {correct_answer}, 给出的解答为 {user_answer},请你比对给定的解答和正确答案之间的关系，判定给定的解答是否正确回答了题目，并最终按照如下的JSON格式返回（注意除此之外不要带上任何标识符） {{'is_correct': 'true', 'explanation': '具体解释内容（用中文回答）'}}"
+                    "content": f"假设你需要进行对一个数学问题的正确答案与给定答案之间的判定（对或错），并给出判定的解释，假如题目为 {question}, 正确答案为 {correct_answer}, 给出的解答为 {user_answer},请你比对给定的解答和正确答案之间的关系，判定给定的解答是否正确回答了题目，并最终只返回如下格式的 JSON 对象（键和字符串使用双引号，除此之外不要带上任何标识符） {{\"is_correct\": true, \"explanation\": \"具体解释内容（用中文回答）\"}}"
                 }
             ],
-            stream=False,
+            response_format={'type': 'json_object'},
         )
-        result = response.choices[0].message.content or ''
-        # 期望 deepseek 返回形如 {'is_correct': 'true', 'explanation': '...'} 的文本
-        # 为安全起见尽量不用 eval，这里假定后端已严格 prompt，若失败则回退默认
-        try:
-            result_json = eval(result)
-        except Exception:
-            result_json = {}
-        is_correct_str = result_json.get('is_correct')
-        is_correct = True if is_correct_str  == "true" else False
-        explanation = result_json.get('explanation')
+        # 不合法的回复按失败处理（解释为空），不写入判题缓存，异步任务会稍后重试
+        is_correct, explanation = parse_verdict(result)
 
     except Exception as e:
         # 出现异常时可以记录日志并默认返回 False
@@ -45,12 +71,11 @@ def call_deepseek_api(question: str, user_answer: str, correct_answer: str) -> t
     return is_correct, (explanation or "")
 
 
-def generate_error_report(analysis_list: list[dict]) -> str:
-    """根据多条错因分析生成综合易错报告（Markdown），委托 deepseek 完成整理。"""
-    load_dotenv()
-    client = OpenAI(
-        api_key=os.getenv('DEEPSEEK_API_KEY'),
-        base_url="https://api.deepseek.com")
+def generate_error_report(analysis_list: list[dict], previous_report: str = '') -> str:
+    """
+    根据多条错因分析生成综合易错报告（Markdown），委托 deepseek 完成整理。
+    传入 previous_report 时为增量更新：analysis_list 只含新增的错因，在原报告基础上修订。
+    """
     try:
         # 将分析合并为一个精简提示（只传递错因解释的要点，避免逐题复述导致过长）
         bullets = []
@@ -58,10 +83,24 @@ def generate_error_report(analysis_list: list[dict]) -> str:
             ex = (a.get('explanation') or '')[:160]
             if ex:
                 bullets.append(f"{i}. {ex}")
-        joined = "\n".join(bullets) or "(暂无数据)"
+        if not bullets:
+            # 没有可归纳的错因，不调用大模型
+            return previous_report
+        joined = "\n".join(bullets)
+        if previous_report:
+            intro = (
+                "以下是此前生成的易错报告，以及之后新增的若干道题的错因解释要点。"
+                "请在原报告基础上吸收新增要点进行修订，保留仍然成立的结论，"
+                "避免逐题复述与冗长细节，聚焦宏观规律。\n\n"
+                f"此前的报告：\n{previous_report}\n\n"
+            )
+        else:
+            intro = (
+                "基于以下若干道题的错因解释要点，请归纳近期学习中的共性易错点，"
+                "避免逐题复述与冗长细节，聚焦宏观规律。\n\n"
+            )
         prompt = (
-            "基于以下若干道题的错因解释要点，请归纳近期学习中的共性易错点，"
-            "避免逐题复述与冗长细节，聚焦宏观规律。\n\n"
+            intro +
             "输出要求：\n"
             "- 使用中文 Markdown；\n"
             "- 结构简洁，包含：# 近期易错概览、## 核心易错点（3-5条清单）、## 改进建议（2-3条）、## 需要巩固的知识点（关键词）；\n"
@@ -69,16 +108,53 @@ def generate_error_report(analysis_list: list[dict]) -> str:
             "- 不要包含具体题目或长篇公式。\n\n"
             f"错因要点：\n{joined}"
         )
-        response = client.chat.completions.create(
-            model="deepseek-chat",
-            messages=[
-                {"role": "system", "content": "你是一个学习助手，负责汇总错因，输出结构化中文 Markdown 报告。"},
-                {"role": "user", "content": prompt},
-            ],
-            stream=False,
-        )
-        content = response.choices[0].message.content or ""
-        return content
+        return chat([
+            {"role": "system", "content": "你是一个学习助手，负责汇总错因，输出结构化中文 Markdown 报告。"},
+            {"role": "user", "content": prompt},
+        ])
     except Exception as e:
         print(f"[DeepSeek ErrorReport Error] {e}")
-        return ""
\ No newline at end of file
+        return ""
+
+
+def stream_deepseek_api(question: str, user_answer: str, correct_answer: str):
+    """
+    流式判题：先逐段产出解释文本 ('delta', 文本)，最后产出 ('verdict', (is_correct, explanation))
+    模型被要求在解释之后另起一行输出 “【判定】正确/错误”，该标记不会作为解释文本转发；
+    没有标记或标记后不是恰好 “正确”/“错误” 时视为未解析，产出 (False, "")
+    """
+    buffer = ''
+    sent = 0
+    marker_at = -1
+    try:
+        for delta in stream_chat([
+            {
+                "role": "system",
+                "content": "你是一个专门用于判断数学题目给定答案正确与否的聊天机器人，你在回答过程中不应包含任何人称词语，而是客观进行判断和解释"},
+            {
+                "role": "user",
+                "content": f"假设你需要进行对一个数学问题的正确答案与给定答案之间的判定（对或错），并给出判定的解释，假如题目为 {question}, 正确答案为 {correct_answer}, 给出的解答为 {user_answer},请你比对给定的解答和正确答案之间的关系，判定给定的解答是否正确回答了题目。先直接用中文写出判定的解释，解释结束后另起一行，只输出 “{VERDICT_MARKER}正确” 或 “{VERDICT_MARKER}错误”"
+            }
+        ]):
+            buffer += delta
+            if marker_at < 0:
+                marker_at = buffer.find(VERDICT_MARKER)
+                # 末尾可能是尚未完整到达的判定标记，先保留不发送
+                safe = marker_at if marker_at >= 0 else max(sent, len(buffer) - len(VERDICT_MARKER) + 1)
+                if safe > sent:
+                    yield 'delta', buffer[sent:safe]
+                    sent = safe
+    except Exception as e:
+        print(f"[DeepSeek Stream Error] {e}")
+        yield 'verdict', (False, "")
+        return
+
+    if marker_at < 0 and len(buffer) > sent:
+        yield 'delta', buffer[sent:]
+    try:
+        verdict = parse_stream_verdict(buffer)
+    except ValueError as e:
+        # 与非流式判题一致：无法解析的回复按失败处理（解释为空），不写入判题缓存
+        print(f"[DeepSeek Stream Error] {e}")
+        verdict = (False, "")
+    yield 'verdict', verdict
@@ -1,19 +1,68 @@
+import random
+
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from ai_course_assistant.conditional import ConditionalGetMixin
+from courses.models import Chapter
 
-from .utils import call_deepseek_api
-from .models import Exercise
-from .serializers import ExerciseSerializer
+from .cache import verdict_cache
+from .facets import facet_counts
+from .grading import grade_batch, grade_exercise, grading_flight, stream_grade
+from .jobs import submit_job
+from .models import Exercise, GradingJob
+from .sampling import MAX_SAMPLE_SIZE, sample_exercises
+from .similarity import MAX_SIMILAR, similar_exercises
+from .serializers import (
+    ExerciseSerializer,
+    ExerciseCheckBatchSerializer,
+    ExerciseSolutionSerializer,
+    GradingJobCreateSerializer,
+    GradingJobSerializer,
+)
 from .pagination import ExercisePagination
+from .renderers import EventStreamRenderer, format_event
 
 
 
 
-class ExerciseViewSet(viewsets.ReadOnlyModelViewSet):
+class ExerciseViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Exercise.objects.all()
     serializer_class = ExerciseSerializer
     pagination_class = ExercisePagination
+    # 章节删除时练习题的 chapter 被批量置空，不会更新 updated_at，因此也依赖 Chapter
+    conditional_models = (Exercise, Chapter)
+    conditional_actions = ('list', 'retrieve', 'search', 'facets', 'solution')
+    # 支持字段裁剪的接口：?mode=practice 只返回题面，?fields=id,question,... 指定字段
+    projected_actions = ('list', 'retrieve', 'search', 'sample', 'similar')
+
+    def requested_fields(self) -> list[str] | None:
+        if self.action not in self.projected_actions:
+            return None
+        params = self.request.query_params
+        if params.get('fields'):
+            names = {name.strip() for name in params['fields'].split(',')}
+            return ['id'] + [name for name in ExerciseSerializer.Meta.fields if name in names and name != 'id']
+        if params.get('mode') == 'practice':
+            return ExerciseSerializer.PRACTICE_FIELDS
+        return None
+
+    def get_queryset(self):
+        qs = super().get_queryset()
+        fields = self.requested_fields()
+        if fields is not None:
+            # 只读取需要的列，created_at 用于排序与游标分页
+            qs = qs.only(*fields, 'created_at')
+        return qs
+
+    def get_serializer(self, *args, **kwargs):
+        fields = self.requested_fields()
+        if fields is not None:
+            kwargs.setdefault('fields', fields)
+        return super().get_serializer(*args, **kwargs)
 
     @action(detail=False, methods=['get'], url_path='search')
     def search(self, request):
@@ -29,7 +78,7 @@ class ExerciseViewSet(viewsets.ReadOnlyModelViewSet):
         difficulty = request.query_params.getlist('difficulty')  # 支持重复参数 -> 数组
         page = request.query_params.get('page')
 
-        qs = self.queryset
+        qs = self.get_queryset()
 
         # 按 category 过滤
         if category:
@@ -48,6 +97,83 @@ class ExerciseViewSet(viewsets.ReadOnlyModelViewSet):
         return Response(serializer.data)
 
 
+    @action(detail=True, methods=['get'], url_path='solution')
+    def solution(self, request, pk=None):
+        """
+        按需获取单题的答案、解释与提示（配合 ?mode=practice 的列表使用）
+        - fields: 可选，例如 ?fields=hint 只返回提示
+        """
+        exercise = self.get_object()
+        fields = request.query_params.get('fields')
+        fields = ['id'] + [name.strip() for name in fields.split(',')] if fields else None
+        return Response(ExerciseSolutionSerializer(exercise, fields=fields).data)
+
+    @action(detail=True, methods=['get'], url_path='similar')
+    def similar(self, request, pk=None):
+        """
+        题面相似的题目（字符 n-gram TF-IDF 余弦相似度，按相似度降序）
+        - k: 数量（默认 10，最大 50）
+        - 示例: /exercise/12/similar/?k=5&mode=practice
+        """
+        try:
+            k = min(max(int(request.query_params.get('k', 10)), 1), MAX_SIMILAR)
+        except ValueError:
+            return Response({"detail": "k 必须是整数"}, status=status.HTTP_400_BAD_REQUEST)
+        exercise = self.get_object()
+        hits = similar_exercises(exercise, k)
+        if hits is None:
+            return Response({"detail": "相似题索引尚未建立，请先运行 rebuild_similarity_index"},
+                            status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        results = self.get_serializer([e for e, _ in hits], many=True).data
+        for item, (_, score) in zip(results, hits):
+            item['score'] = round(score, 4)
+        return Response({"id": exercise.pk, "count": len(results), "results": results})
+
+    @action(detail=False, methods=['get'], url_path='facets')
+    def facets(self, request):
+        """
+        分类、难度筛选项的题目数量（读取计数表，不扫描练习题表）
+        - chapter: 可选，只统计该章节的题目
+        - 示例: /exercise/facets/?chapter=3
+        """
+        chapter = request.query_params.get('chapter')
+        if chapter is not None and not chapter.isdigit():
+            return Response({"detail": "chapter 必须是整数"}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(facet_counts(int(chapter) if chapter is not None else None))
+
+    @action(detail=False, methods=['get'], url_path='sample')
+    def sample(self, request):
+        """
+        随机练习：抽取一组题目，登录用户会跳过自己已归档的题
+        - n: 题目数量（默认 10，最大 50）
+        - category: 可选分类
+        - difficulty: 可重复传递
+        - exclude: archived / labeled，可重复传递，默认 archived
+        - seed: 随机种子，相同种子在题库不变时返回相同结果；不传则随机生成并在响应中返回
+        - 示例: /exercise/sample/?n=5&category=统计学&difficulty=easy&seed=42
+        """
+        exclude = request.query_params.getlist('exclude') or ['archived']
+        if any(name not in ('archived', 'labeled') for name in exclude):
+            return Response({"detail": "exclude 只能是 archived/labeled"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            n = min(max(int(request.query_params.get('n', 10)), 1), MAX_SAMPLE_SIZE)
+            seed = request.query_params.get('seed')
+            seed = int(seed) if seed is not None else random.randrange(2 ** 31)
+        except ValueError:
+            return Response({"detail": "n 和 seed 必须是整数"}, status=status.HTTP_400_BAD_REQUEST)
+
+        profile = getattr(request.user, 'profile', None) if request.user.is_authenticated else None
+        exercises = sample_exercises(
+            n,
+            category=request.query_params.get('category'),
+            difficulties=request.query_params.getlist('difficulty'),
+            profile=profile,
+            exclude=exclude,
+            seed=seed,
+        )
+        serializer = self.get_serializer(exercises, many=True)
+        return Response({"seed": seed, "count": len(exercises), "results": serializer.data})
+
     @action(detail=False, methods=['get'], url_path='check')
     def check_exercise(self, request):
         """
@@ -80,8 +206,8 @@ class ExerciseViewSet(viewsets.ReadOnlyModelViewSet):
                 status=status.HTTP_404_NOT_FOUND
             )
 
-        # 这里调用 DeepSeek API 判断是否正确
-        is_correct,explanation = call_deepseek_api(exercise.question,user_answer, exercise.answer)
+        # 先查判题缓存，未命中再调用 DeepSeek API 判断是否正确
+        is_correct, explanation = grade_exercise(exercise, user_answer)
 
         response_data = {
             "is_correct": is_correct,
@@ -90,4 +216,146 @@ class ExerciseViewSet(viewsets.ReadOnlyModelViewSet):
             "user_answer": user_answer
         }
 
-        return Response(response_data)
\ No newline at end of file
+        return Response(response_data)
+
+    @action(detail=False, methods=['post'], url_path='check/batch')
+    def check_batch(self, request):
+        """
+        批量检查练习答案
+        POST 参数: {"items": [{"id": 练习题 ID, "answer": 用户提交答案}, ...]}（至多 50 项）
+        返回格式:
+        {
+            "results": [
+                {"id", "is_correct", "correct_answer", "explanation", "user_answer"}
+                或 {"id", "detail": 错误信息}（单项出错不影响其他题目）
+            ]
+        }
+        """
+        serializer = ExerciseCheckBatchSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        items = []
+        for raw in serializer.validated_data['items']:
+            item = GradingJobCreateSerializer(data=raw)
+            items.append(item.validated_data if item.is_valid() else None)
+
+        # 一次查询取出全部题目
+        exercises = Exercise.objects.in_bulk({item['id'] for item in items if item})
+
+        results = [None] * len(items)
+        pairs, positions = [], []
+        for i, (raw, item) in enumerate(zip(serializer.validated_data['items'], items)):
+            if item is None:
+                results[i] = {"id": raw.get('id'), "detail": "id 和 answer 参数必须提供"}
+            elif item['id'] not in exercises:
+                results[i] = {"id": item['id'], "detail": "指定的练习不存在"}
+            else:
+                pairs.append((exercises[item['id']], item['answer']))
+                positions.append(i)
+
+        concurrency = getattr(settings, 'GRADING_BATCH_CONCURRENCY', 4)
+        for i, (exercise, user_answer), verdict in zip(positions, pairs, grade_batch(pairs, concurrency)):
+            if isinstance(verdict, Exception):
+                results[i] = {"id": exercise.pk, "detail": "判题失败"}
+                continue
+            results[i] = {
+                "id": exercise.pk,
+                "is_correct": verdict[0],
+                "correct_answer": exercise.answer,
+                "explanation": verdict[1],
+                "user_answer": user_answer
+            }
+
+        return Response({"results": results})
+
+    @action(detail=False, methods=['get'], url_path='check/stream',
+            renderer_classes=[EventStreamRenderer, JSONRenderer])
+    def check_exercise_stream(self, request):
+        """
+        流式检查练习答案（Server-Sent Events）
+        GET 参数同 /check/:
+          - id: 练习题 ID
+          - answer: 用户提交答案
+        事件:
+          - token: {"text": 解释片段}，随模型生成逐段推送
+          - verdict: {"is_correct", "correct_answer", "explanation", "user_answer"}，最后一条
+          - error: {"detail": 错误信息}
+        """
+        exercise_id = request.query_params.get('id')
+        user_answer = request.query_params.get('answer')
+
+        if not exercise_id or not user_answer:
+            return Response(
+                {"detail": "id 和 answer 参数必须提供"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            exercise = Exercise.objects.get(pk=exercise_id)
+        except Exercise.DoesNotExist:
+            return Response(
+                {"detail": "指定的练习不存在"},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        def events():
+            for kind, payload in stream_grade(exercise, user_answer):
+                if kind == 'delta':
+                    yield format_event('token', {"text": payload})
+                    continue
+                is_correct, explanation = payload
+                yield format_event('verdict', {
+                    "is_correct": is_correct,
+                    "correct_answer": exercise.answer,
+                    "explanation": explanation,
+                    "user_answer": user_answer
+                })
+
+        response = StreamingHttpResponse(events(), content_type='text/event-stream; charset=utf-8')
+        response['Cache-Control'] = 'no-cache'
+        # 关闭 nginx 等反向代理的缓冲，保证逐段到达
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+    @action(detail=False, methods=['get'], url_path='check/stats')
+    def check_stats(self, request):
+        """判题缓存命中统计（进程内计数 + 数据库条目数），以及合并掉的并发判题请求数"""
+        data = verdict_cache.stats()
+        data['coalesced'] = grading_flight.shared
+        return Response(data)
+
+    @action(detail=False, methods=['post'], url_path='check/jobs')
+    def submit_check_job(self, request):
+        """
+        异步检查练习答案（提交）
+        POST 参数: {"id": 练习题 ID, "answer": 用户提交答案}
+        立即返回 {"job_id": int, "status": str, ...}，之后通过 GET /check/jobs/{job_id}/ 轮询结果；
+        能在本地直接判定的答案会以 status=done 返回
+        """
+        serializer = GradingJobCreateSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            exercise = Exercise.objects.get(pk=serializer.validated_data['id'])
+        except Exercise.DoesNotExist:
+            return Response(
+                {"detail": "指定的练习不存在"},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        job = submit_job(exercise, serializer.validated_data['answer'])
+        return Response(GradingJobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
+
+    @action(detail=False, methods=['get'], url_path=r'check/jobs/(?P<job_id>\d+)')
+    def check_job(self, request, job_id=None):
+        """异步检查练习答案（轮询），status 为 done 时附带判题结果"""
+        try:
+            job = GradingJob.objects.select_related('exercise').get(pk=job_id)
+        except GradingJob.DoesNotExist:
+            return Response(
+                {"detail": "指定的判题任务不存在"},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        return Response(GradingJobSerializer(job).data)
@@ -10,6 +10,7 @@ class Knowledge(models.Model):
     duration = models.CharField(max_length=20, verbose_name="时长")
     is_ai_generated = models.BooleanField(default=False, verbose_name="AI生成")
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="创建时间")
+    updated_at = models.DateTimeField(auto_now=True, db_index=True, verbose_name="更新时间")
 
     class Meta:
         verbose_name = "知识点"
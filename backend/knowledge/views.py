@@ -1,14 +1,17 @@
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from django.db.models import Q
+from ai_course_assistant.conditional import ConditionalGetMixin
+from search.index import HitList
 from .models import Knowledge
 from .serializers import KnowledgeSerializer
 
 
-class KnowledgeViewSet(viewsets.ReadOnlyModelViewSet):
+class KnowledgeViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Knowledge.objects.all()
     serializer_class = KnowledgeSerializer
+    conditional_models = (Knowledge,)
+    conditional_actions = ('list', 'retrieve', 'popular', 'category')
 
     @action(detail=False, methods=['get'])
     def popular(self, request):
@@ -26,15 +29,16 @@ class KnowledgeViewSet(viewsets.ReadOnlyModelViewSet):
 
     @action(detail=False, methods=['post'])
     def search(self, request):
-        """搜索知识点"""
+        """搜索知识点，与列表接口一样分页（?page=），返回 {count, next, previous, results}"""
         query = request.data.get('query', '')
-        knowledge = Knowledge.objects.filter(
-            Q(title__icontains=query) | 
-            Q(description__icontains=query) | 
-            Q(content__icontains=query)
-        )
-        serializer = self.get_serializer(knowledge, many=True)
-        return Response(serializer.data)
+        if not query.strip():
+            knowledge = Knowledge.objects.all()
+        else:
+            # 走全文索引，按相关度排序；每页只取该页的命中
+            knowledge = HitList(query, 'knowledge')
+        page = self.paginate_queryset(knowledge)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
 
     @action(detail=False, methods=['post'])
     def generate(self, request):
@@ -60,5 +64,5 @@ class KnowledgeViewSet(viewsets.ReadOnlyModelViewSet):
         """更新知识点浏览量"""
         knowledge = self.get_object()
         knowledge.views += 1
-        knowledge.save()
+        knowledge.save(update_fields=['views', 'updated_at'])
         return Response({'views': knowledge.views})
@@ -0,0 +1,20 @@
+from django.apps import AppConfig
+from django.db.models.signals import post_migrate
+
+
+def create_search_index(sender, using, **kwargs):
+    # FTS5 虚拟表不由迁移管理，migrate 后按需创建；
+    # 本应用没有模型，不会收到以自身为 sender 的 post_migrate，因此监听所有应用，表已存在时直接跳过
+    from .index import create_index_table, rebuild
+    if create_index_table(using):
+        rebuild(using=using)
+
+
+class SearchConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'search'
+
+    def ready(self):
+        # 注册信号
+        from . import signals  # noqa: F401
+        post_migrate.connect(create_search_index, dispatch_uid='search.create_search_index')
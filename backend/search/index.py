@@ -0,0 +1,291 @@
+"""
+知识点与练习题的全文索引（SQLite FTS5）
+- 中文按字符二元组（bigram）切分，另把各个汉字作为单字追加在末尾，英文与数字按词切分，切分结果以空格连接后写入 FTS5 表
+- 按 BM25 排序，标题列权重高于正文列
+- 非 SQLite 数据库上退化为 icontains 查询
+索引通过 signals.py 中的信号与数据保持同步，批量导入后可运行 rebuild_search_index 重建。
+"""
+import hashlib
+import html
+import re
+import unicodedata
+
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections, transaction
+from django.db.models import Q
+
+from exercises.models import Exercise
+from knowledge.models import Knowledge
+
+FTS_TABLE = 'search_fts'
+
+# 文档类型编码：FTS 行号 = 对象 id * 8 + 类型编码，便于按行号直接更新或删除
+KINDS = {'knowledge': 1, 'exercise': 2}
+KIND_MODELS = {'knowledge': Knowledge, 'exercise': Exercise}
+
+# 标题列、正文列的 BM25 权重（kind 列不参与检索）
+TITLE_WEIGHT = 4.0
+BODY_WEIGHT = 1.0
+
+TOKEN_RE = re.compile(r'[\u3400-\u4dbf\u4e00-\u9fff]+|[0-9a-z]+')
+CJK_RE = re.compile(r'[\u3400-\u4dbf\u4e00-\u9fff]')
+# 索引版本号存在数据库中（单行表），导入命令与各 worker 进程写入索引后，所有进程的结果缓存都会失效
+VERSION_TABLE = 'search_fts_version'
+
+
+def _normalize(text: str) -> str:
+    return unicodedata.normalize('NFKC', text or '').lower()
+
+
+def tokenize(text: str) -> list[str]:
+    """
+    切分文本：连续汉字输出相邻两字组成的二元组，英文与数字按词输出；
+    两字以上的汉字串中的每个字再作为单字追加在最后，供单字查询使用（放在末尾不会打断二元组短语的相邻关系）
+    """
+    tokens, chars = [], []
+    for run in TOKEN_RE.findall(_normalize(text)):
+        if CJK_RE.match(run) and len(run) > 1:
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+            chars.extend(run)
+        else:
+            tokens.append(run)
+    return tokens + chars
+
+
+def build_match(query: str) -> str:
+    """
+    把用户输入转换为 FTS5 MATCH 表达式
+    每段连续汉字转为二元组短语（要求相邻出现），单个汉字精确匹配单字，英文词做前缀匹配，各段之间为 AND
+    """
+    terms = []
+    for run in TOKEN_RE.findall(_normalize(query)):
+        if CJK_RE.match(run) and len(run) > 1:
+            terms.append('"' + ' '.join(run[i:i + 2] for i in range(len(run) - 1)) + '"')
+        elif CJK_RE.match(run):
+            # 单字按前缀匹配只能找到以它开头的二元组，漏掉它在词尾的情况，因此匹配索引中的单字
+            terms.append(f'"{run}"')
+        else:
+            terms.append(f'"{run}"*')
+    return ' '.join(terms)
+
+
+def fts_available(using: str = DEFAULT_DB_ALIAS) -> bool:
+    return connections[using].vendor == 'sqlite'
+
+
+def create_index_table(using: str = DEFAULT_DB_ALIAS) -> bool:
+    """创建 FTS5 虚拟表与版本号表（已存在时跳过），返回 FTS5 表是否新建"""
+    if not fts_available(using):
+        return False
+    with connections[using].cursor() as cursor:
+        cursor.execute(f"CREATE TABLE IF NOT EXISTS {VERSION_TABLE} (id INTEGER PRIMARY KEY CHECK (id = 1), version INTEGER NOT NULL)")
+        cursor.execute(f"INSERT OR IGNORE INTO {VERSION_TABLE} (id, version) VALUES (1, 1)")
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [FTS_TABLE])
+        if cursor.fetchone():
+            return False
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(kind UNINDEXED, title, body, tokenize = 'unicode61')"
+        )
+    return True
+
+
+def document_for(kind: str, obj) -> tuple[str, str]:
+    """返回 (标题, 正文) 原文"""
+    if kind == 'knowledge':
+        return obj.title, f"{obj.description}\n{obj.content}"
+    return obj.question, f"{obj.answer}\n{obj.hint or ''}"
+
+
+def index_version(using: str = DEFAULT_DB_ALIAS) -> int | None:
+    """
+    索引版本号，每次写入索引时在同一事务中递增；搜索结果缓存的键中带上它，写入后旧缓存自然失效
+    没有全文索引（非 SQLite 或尚未 migrate）时返回 None，此时结果不缓存
+    """
+    if not fts_available(using):
+        return None
+    try:
+        with connections[using].cursor() as cursor:
+            cursor.execute(f"SELECT version FROM {VERSION_TABLE} WHERE id = 1")
+            row = cursor.fetchone()
+    except OperationalError:
+        return None
+    return row[0] if row else None
+
+
+def _bump_version(cursor) -> None:
+    cursor.execute(f"UPDATE {VERSION_TABLE} SET version = version + 1 WHERE id = 1")
+
+
+def index_objects(kind: str, objects, using: str = DEFAULT_DB_ALIAS) -> int:
+    """写入或更新一批对象的索引"""
+    if not fts_available(using):
+        return 0
+    code = KINDS[kind]
+    rows = []
+    for obj in objects:
+        title, body = document_for(kind, obj)
+        rows.append((obj.pk * 8 + code, kind, ' '.join(tokenize(title)), ' '.join(tokenize(body))))
+    if not rows:
+        return 0
+    # 放在一个事务里：逐条自动提交时每行都要同步一次磁盘，批量导入会慢上百倍
+    with transaction.atomic(using=using), connections[using].cursor() as cursor:
+        cursor.executemany(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [(row[0],) for row in rows])
+        cursor.executemany(f"INSERT INTO {FTS_TABLE} (rowid, kind, title, body) VALUES (%s, %s, %s, %s)", rows)
+        _bump_version(cursor)
+    return len(rows)
+
+
+def remove_object(kind: str, pk: int, using: str = DEFAULT_DB_ALIAS) -> None:
+    if not fts_available(using):
+        return
+    with transaction.atomic(using=using), connections[using].cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [pk * 8 + KINDS[kind]])
+        _bump_version(cursor)
+
+
+def rebuild(kinds=None, batch_size: int = 500, using: str = DEFAULT_DB_ALIAS) -> dict[str, int]:
+    """清空并重建指定类型的索引，返回各类型写入的文档数"""
+    create_index_table(using)
+    counts = {}
+    for kind in kinds or KINDS:
+        with connections[using].cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE kind = %s", [kind])
+            _bump_version(cursor)
+        counts[kind] = 0
+        batch = []
+        for obj in KIND_MODELS[kind].objects.using(using).order_by('pk').iterator(chunk_size=batch_size):
+            batch.append(obj)
+            if len(batch) >= batch_size:
+                counts[kind] += index_objects(kind, batch, using)
+                batch = []
+        counts[kind] += index_objects(kind, batch, using)
+    return counts
+
+
+def make_snippet(text: str, query: str, width: int = 80) -> str:
+    """
+    截取包含查询词的一段原文，查询词用 <mark> 包裹；其余内容做 HTML 转义
+    没有命中时返回开头一段
+    """
+    text = ' '.join((text or '').split())
+    terms = sorted({t for t in TOKEN_RE.findall(_normalize(query))}, key=len, reverse=True)
+    folded = _normalize(text)
+    # NFKC 可能改变长度，此时放弃定位，只截取开头
+    if len(folded) != len(text):
+        folded = text.lower()
+
+    positions = [folded.find(t) for t in terms]
+    positions = [p for p in positions if p >= 0]
+    start = max(0, min(positions) - width // 4) if positions else 0
+    end = min(len(text), start + width)
+    window, folded_window = text[start:end], folded[start:end]
+
+    if terms:
+        pattern = re.compile('|'.join(re.escape(t) for t in terms))
+        parts, last = [], 0
+        for m in pattern.finditer(folded_window):
+            parts.append(html.escape(window[last:m.start()]))
+            parts.append(f"<mark>{html.escape(window[m.start():m.end()])}</mark>")
+            last = m.end()
+        parts.append(html.escape(window[last:]))
+        snippet = ''.join(parts)
+    else:
+        snippet = html.escape(window)
+    return ('…' if start > 0 else '') + snippet + ('…' if end < len(text) else '')
+
+
+def _fts_hits(match: str, kinds, limit: int, offset: int, using: str) -> tuple[int, list[tuple[str, int, float]]]:
+    kind_filter = ' AND kind IN (%s)' % ', '.join(['%s'] * len(kinds))
+    with connections[using].cursor() as cursor:
+        cursor.execute(f"SELECT COUNT(*) FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s{kind_filter}", [match, *kinds])
+        total = cursor.fetchone()[0]
+        cursor.execute(
+            f"SELECT rowid, kind, bm25({FTS_TABLE}, 0.0, {TITLE_WEIGHT}, {BODY_WEIGHT}) AS score "
+            f"FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s{kind_filter} ORDER BY score LIMIT %s OFFSET %s",
+            [match, *kinds, limit, offset],
+        )
+        # bm25() 越小越相关，对外取相反数
+        hits = [(kind, rowid // 8, round(-score, 4)) for rowid, kind, score in cursor.fetchall()]
+    return total, hits
+
+
+def _fallback_hits(query: str, kinds, limit: int, offset: int, using: str) -> tuple[int, list[tuple[str, int, float]]]:
+    filters = {
+        'knowledge': Q(title__icontains=query) | Q(description__icontains=query) | Q(content__icontains=query),
+        'exercise': Q(question__icontains=query) | Q(answer__icontains=query) | Q(hint__icontains=query),
+    }
+    hits = []
+    for kind in kinds:
+        pks = KIND_MODELS[kind].objects.using(using).filter(filters[kind]).values_list('pk', flat=True)
+        hits.extend((kind, pk, 0.0) for pk in pks)
+    return len(hits), hits[offset:offset + limit]
+
+
+def search_hits(query: str, kinds=None, limit: int = 20, offset: int = 0,
+                using: str = DEFAULT_DB_ALIAS) -> tuple[int, list[tuple[str, int, float]]]:
+    """返回 (命中总数, [(类型, id, 相关度)])，按相关度从高到低"""
+    kinds = [k for k in (kinds or KINDS) if k in KINDS]
+    match = build_match(query)
+    if not match or not kinds:
+        return 0, []
+    if fts_available(using):
+        return _fts_hits(match, kinds, limit, offset, using)
+    return _fallback_hits(query.strip(), kinds, limit, offset, using)
+
+
+class HitList:
+    """
+    按需分页的命中对象列表，可直接交给 Django / DRF 的分页器：
+    count() 只查命中总数，切片时才按 limit/offset 取该页的命中并加载对象（按相关度排序）
+    """
+
+    def __init__(self, query: str, kind: str, using: str = DEFAULT_DB_ALIAS):
+        self.query = query
+        self.kind = kind
+        self.using = using
+
+    def count(self) -> int:
+        return search_hits(self.query, [self.kind], limit=0, using=self.using)[0]
+
+    def __getitem__(self, index: slice) -> list:
+        start, stop = index.start or 0, index.stop
+        _, hits = search_hits(self.query, [self.kind], limit=stop - start, offset=start, using=self.using)
+        found = KIND_MODELS[self.kind].objects.using(self.using).in_bulk([pk for _, pk, _ in hits])
+        return [found[pk] for _, pk, _ in hits if pk in found]
+
+
+def search(query: str, kinds=None, limit: int = 20, offset: int = 0, using: str = DEFAULT_DB_ALIAS) -> dict:
+    """全文搜索，返回可直接序列化的结果（标题、带高亮的摘要、相关度）"""
+    total, hits = search_hits(query, kinds, limit, offset, using)
+    objects = {}
+    for kind in {kind for kind, _, _ in hits}:
+        pks = [pk for k, pk, _ in hits if k == kind]
+        objects[kind] = KIND_MODELS[kind].objects.using(using).in_bulk(pks)
+
+    results = []
+    for kind, pk, score in hits:
+        obj = objects[kind].get(pk)
+        if obj is None:
+            # 索引中残留已删除的对象，跳过
+            continue
+        title, body = document_for(kind, obj)
+        item = {
+            'type': kind,
+            'id': pk,
+            'score': score,
+            'title': make_snippet(title, query, width=60),
+            'snippet': make_snippet(body, query),
+            'category': obj.category,
+        }
+        if kind == 'exercise':
+            item['difficulty'] = obj.difficulty
+        results.append(item)
+    return {'query': query, 'count': total, 'results': results}
+
+
+def cache_key(query: str, kinds, limit: int, offset: int) -> str | None:
+    """结果缓存的键；没有索引版本号时返回 None，表示不缓存"""
+    version = index_version()
+    if version is None:
+        return None
+    raw = f"{query}|{','.join(sorted(kinds or KINDS))}|{limit}|{offset}"
+    return f"search:{version}:{hashlib.sha1(raw.encode('utf-8')).hexdigest()}"
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+from search.index import KINDS, fts_available, rebuild
+
+
+class Command(BaseCommand):
+    help = "重建知识点与练习题的全文索引（批量导入数据后运行）"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--type',
+            choices=list(KINDS),
+            action='append',
+            help='只重建指定类型，可重复传递，默认全部重建'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='每批写入索引的文档数'
+        )
+
+    def handle(self, *args, **options):
+        if not fts_available():
+            raise CommandError("全文索引仅支持 SQLite（FTS5），当前数据库将使用 icontains 查询")
+        counts = rebuild(options['type'], batch_size=max(1, options['batch_size']))
+        for kind, count in counts.items():
+            self.stdout.write(self.style.SUCCESS(f"{kind}：已索引 {count} 条"))
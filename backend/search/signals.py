@@ -0,0 +1,38 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from exercises.models import Exercise
+from knowledge.models import Knowledge
+from .index import index_objects, remove_object
+
+# 参与索引的字段；只更新其他字段（如浏览量）时不重建该文档的索引
+INDEXED_FIELDS = {
+    'knowledge': {'title', 'description', 'content'},
+    'exercise': {'question', 'answer', 'hint'},
+}
+
+
+def _needs_index(kind, raw, update_fields):
+    return not raw and (update_fields is None or bool(INDEXED_FIELDS[kind] & set(update_fields)))
+
+
+@receiver(post_save, sender=Knowledge)
+def index_knowledge(sender, instance, raw=False, using=None, update_fields=None, **kwargs):
+    if _needs_index('knowledge', raw, update_fields):
+        index_objects('knowledge', [instance], using)
+
+
+@receiver(post_save, sender=Exercise)
+def index_exercise(sender, instance, raw=False, using=None, update_fields=None, **kwargs):
+    if _needs_index('exercise', raw, update_fields):
+        index_objects('exercise', [instance], using)
+
+
+@receiver(post_delete, sender=Knowledge)
+def unindex_knowledge(sender, instance, using=None, **kwargs):
+    remove_object('knowledge', instance.pk, using)
+
+
+@receiver(post_delete, sender=Exercise)
+def unindex_exercise(sender, instance, using=None, **kwargs):
+    remove_object('exercise', instance.pk, using)
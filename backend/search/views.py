@@ -0,0 +1,53 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import patch_cache_control
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .index import KINDS, cache_key, search
+
+
+class SearchView(APIView):
+    """
+    全文搜索知识点与练习题
+    GET 参数:
+      - q: 搜索词（必填）
+      - type: knowledge / exercise，可重复传递，默认两者都搜
+      - limit: 每页数量（默认 20，最大 50）
+      - offset: 偏移量
+    返回格式:
+    {
+        "query": string,
+        "count": int,
+        "results": [{"type", "id", "score", "title", "snippet", "category"}]
+    }
+    title、snippet 已做 HTML 转义，命中的词用 <mark> 包裹
+    """
+    authentication_classes = []
+    permission_classes = []
+
+    def get(self, request):
+        query = (request.query_params.get('q') or '').strip()
+        kinds = request.query_params.getlist('type') or list(KINDS)
+        if not query:
+            return Response({"detail": "q 参数必须提供"}, status=status.HTTP_400_BAD_REQUEST)
+        if any(kind not in KINDS for kind in kinds):
+            return Response({"detail": f"type 只能是 {'/'.join(KINDS)}"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = min(max(int(request.query_params.get('limit', 20)), 1), 50)
+            offset = max(int(request.query_params.get('offset', 0)), 0)
+        except ValueError:
+            return Response({"detail": "limit 和 offset 必须是整数"}, status=status.HTTP_400_BAD_REQUEST)
+
+        # 结果缓存键带索引版本号，数据变更后自动失效
+        key = cache_key(query, kinds, limit, offset)
+        data = cache.get(key) if key else None
+        if data is None:
+            data = search(query, kinds, limit, offset)
+            if key:
+                cache.set(key, data, getattr(settings, 'SEARCH_RESULT_CACHE_TTL', 300))
+
+        response = Response(data)
+        patch_cache_control(response, public=True, max_age=getattr(settings, 'SEARCH_CACHE_MAX_AGE', 60))
+        return response
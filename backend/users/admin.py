@@ -5,6 +5,7 @@ from .models import UserProfile, LabeledExercise, ArchivedExercise
 @admin.register(UserProfile)
 class UserProfileAdmin(admin.ModelAdmin):
     list_display = ('user', 'created_at', 'updated_at')
+    list_select_related = ('user',)
     search_fields = ('user__username', 'user__email')
 
 
@@ -12,9 +13,11 @@ class UserProfileAdmin(admin.ModelAdmin):
 class LabeledExerciseAdmin(admin.ModelAdmin):
     list_display = ('profile', 'exercise', 'created_at')
     list_filter = ('created_at',)
+    list_select_related = ('profile__user', 'exercise')
 
 
 @admin.register(ArchivedExercise)
 class ArchivedExerciseAdmin(admin.ModelAdmin):
     list_display = ('profile', 'exercise', 'created_at')
     list_filter = ('created_at',)
+    list_select_related = ('profile__user', 'exercise')
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+from users.reports import run_report_worker
+
+
+class Command(BaseCommand):
+    help = "启动易错报告刷新 worker，处理标注后登记的（防抖）报告刷新请求"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=2.0,
+            help='没有到期任务时的轮询间隔（秒）'
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='处理完当前已到期的刷新请求后退出'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.WARNING("易错报告 worker 已启动"))
+        try:
+            processed = run_report_worker(
+                poll_interval=options['poll_interval'],
+                once=options['once'],
+                log=self.stdout.write,
+            )
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.WARNING("易错报告 worker 已停止"))
+            return
+        self.stdout.write(self.style.SUCCESS(f"共刷新 {processed} 份易错报告"))
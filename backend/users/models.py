@@ -41,6 +41,9 @@ class LabeledExercise(models.Model):
         verbose_name_plural = '标注记录'
         unique_together = ('profile', 'exercise')
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['profile', '-created_at'], name='labeled_profile_created_idx'),
+        ]
 
     def __str__(self):
         return f"{self.profile} - {self.exercise}"
@@ -56,6 +59,9 @@ class ArchivedExercise(models.Model):
         verbose_name_plural = '归档记录'
         unique_together = ('profile', 'exercise')
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['profile', '-created_at'], name='archived_profile_created_idx'),
+        ]
 
     def __str__(self):
         return f"{self.profile} - {self.exercise}"
@@ -65,6 +71,15 @@ class UserErrorReport(models.Model):
     profile = models.OneToOneField(UserProfile, on_delete=models.CASCADE, related_name='error_report', verbose_name='用户')
     content = models.TextField(blank=True, default='', verbose_name='易错报告（Markdown）')
     updated_at = models.DateTimeField(auto_now=True, verbose_name='更新时间')
+    # 防抖刷新：首次请求时间与计划刷新时间，refresh_due_at 非空表示有待执行的刷新
+    refresh_requested_at = models.DateTimeField(null=True, blank=True, verbose_name='刷新请求时间')
+    refresh_due_at = models.DateTimeField(null=True, blank=True, db_index=True, verbose_name='计划刷新时间')
+    # 连续生成失败的次数，决定下次重试的退避时间，成功后清零
+    refresh_failures = models.PositiveIntegerField(default=0, verbose_name='连续刷新失败次数')
+    # 生成报告所用输入的摘要；输入不变时跳过大模型调用
+    input_digest = models.CharField(max_length=64, blank=True, default='', verbose_name='输入摘要')
+    source_entries = models.JSONField(default=list, blank=True, verbose_name='已汇总的错因')
+    incremental_count = models.PositiveIntegerField(default=0, verbose_name='连续增量更新次数')
 
     class Meta:
         verbose_name = '用户易错报告'
@@ -72,3 +87,7 @@ class UserErrorReport(models.Model):
 
     def __str__(self):
         return f"ErrorReport({self.profile})"
+
+    @property
+    def refresh_pending(self) -> bool:
+        return self.refresh_due_at is not None
@@ -0,0 +1,160 @@
+"""
+易错报告的后台刷新
+标注/取消标注只登记一次刷新请求（防抖），由 run_report_worker 在静默期过后统一重新生成，
+短时间内的多次标注只触发一次大模型调用。
+生成时先比较输入摘要，未变化则跳过；只新增少量错因时把新增要点与原报告一起交给模型增量修订。
+"""
+import hashlib
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+
+from exercises.utils import generate_error_report
+from .models import LabeledExercise, UserErrorReport, UserProfile
+
+
+def request_report_refresh(profile: UserProfile) -> None:
+    """
+    登记一次刷新：计划时间推迟到 now + ERROR_REPORT_DEBOUNCE，
+    但距第一次请求不超过 ERROR_REPORT_MAX_DELAY，避免持续标注时报告一直不更新
+    """
+    debounce = getattr(settings, 'ERROR_REPORT_DEBOUNCE', 30)
+    max_delay = getattr(settings, 'ERROR_REPORT_MAX_DELAY', 300)
+    now = timezone.now()
+    report, _ = UserErrorReport.objects.get_or_create(profile=profile)
+    requested_at = report.refresh_requested_at if report.refresh_due_at else now
+    due_at = min(now + timedelta(seconds=debounce), requested_at + timedelta(seconds=max_delay))
+    # 使用 update 而不是 save，避免改动 updated_at（它表示报告内容的更新时间）
+    UserErrorReport.objects.filter(pk=report.pk).update(refresh_requested_at=requested_at, refresh_due_at=due_at)
+
+
+def entry_token(exercise_id: int, explanation: str) -> str:
+    """一条错因的内容标识：取消后重新标注同样的错因，标识不变"""
+    return f"{exercise_id}:{hashlib.sha1(explanation.encode('utf-8')).hexdigest()[:12]}"
+
+
+def inputs_digest(tokens: list[str]) -> str:
+    return hashlib.sha256('\n'.join(sorted(tokens)).encode('utf-8')).hexdigest()
+
+
+def build_report_payload(profile: UserProfile) -> list[dict]:
+    qs = LabeledExercise.objects.filter(profile=profile).exclude(explanation__isnull=True).exclude(explanation__exact='').order_by('-created_at')[:20]
+    payload = []
+    for a in qs.select_related('exercise'):
+        payload.append({
+            'question': getattr(a.exercise, 'question', ''),
+            'user_answer': a.user_answer or '',
+            'correct_answer': a.correct_answer or '',
+            'explanation': a.explanation or '',
+            'token': entry_token(a.exercise_id, a.explanation or ''),
+        })
+    return payload
+
+
+def regenerate_report(report: UserErrorReport) -> str:
+    """
+    重新生成报告，返回执行方式：
+    - skipped：输入摘要未变化（如标注了不带错因的题、取消后又重新标注），不调用大模型
+    - incremental：只把新增错因与原报告交给模型修订
+    - full：基于最近 20 条错因完整重新生成
+    - empty：已没有带错因的标注（如全部取消标注），清空报告，不调用大模型
+    """
+    payload = build_report_payload(report.profile)
+    tokens = [a['token'] for a in payload]
+    digest = inputs_digest(tokens)
+    if digest == report.input_digest:
+        return 'skipped'
+    if not payload:
+        report.content = ''
+        report.input_digest = digest
+        report.source_entries = []
+        report.incremental_count = 0
+        report.save(update_fields=['content', 'input_digest', 'source_entries', 'incremental_count', 'updated_at'])
+        return 'empty'
+
+    previous = set(report.source_entries or [])
+    new_items = [a for a in payload if a['token'] not in previous]
+    # 仍处于标注状态的全部错因；不在其中的旧错因是被取消或改写了，需要完整重新生成
+    all_tokens = {
+        entry_token(exercise_id, explanation)
+        for exercise_id, explanation in LabeledExercise.objects.filter(profile=report.profile)
+        .exclude(explanation__isnull=True).exclude(explanation__exact='').values_list('exercise_id', 'explanation')
+    }
+    incremental = (
+        bool(report.content)
+        and bool(previous)
+        and previous <= all_tokens
+        and len(new_items) <= getattr(settings, 'ERROR_REPORT_INCREMENTAL_MAX_NEW', 5)
+        and report.incremental_count < getattr(settings, 'ERROR_REPORT_MAX_INCREMENTAL', 5)
+    )
+
+    if incremental:
+        report_md = generate_error_report(new_items, previous_report=report.content) if new_items else report.content
+    else:
+        report_md = generate_error_report(payload)
+    if not report_md:
+        return 'failed'
+
+    report.content = report_md
+    report.input_digest = digest
+    report.source_entries = tokens
+    report.incremental_count = report.incremental_count + 1 if incremental else 0
+    report.save(update_fields=['content', 'input_digest', 'source_entries', 'incremental_count', 'updated_at'])
+    return 'incremental' if incremental else 'full'
+
+
+def refresh_due_reports(limit: int = 20) -> int:
+    """
+    处理已到计划时间的刷新请求，返回处理数量
+    以 “refresh_due_at 未变化才清空” 的条件更新领取任务：生成期间若又有新的标注，
+    新的计划时间会保留下来，下一轮再刷新；生成失败时按退避时间重新登记，刷新请求不会丢失
+    """
+    processed = 0
+    now = timezone.now()
+    due = UserErrorReport.objects.filter(refresh_due_at__lte=now).order_by('refresh_due_at').values_list('pk', 'refresh_due_at')[:limit]
+    for pk, due_at in due:
+        claimed = UserErrorReport.objects.filter(pk=pk, refresh_due_at=due_at).update(refresh_due_at=None, refresh_requested_at=None)
+        if not claimed:
+            continue
+        report = UserErrorReport.objects.select_related('profile').get(pk=pk)
+        try:
+            result = regenerate_report(report)
+        except Exception as e:
+            print(f"[ErrorReport Refresh Error] {e}")
+            result = 'failed'
+        if result == 'failed':
+            schedule_retry(report)
+        elif report.refresh_failures:
+            UserErrorReport.objects.filter(pk=pk).update(refresh_failures=0)
+        processed += 1
+    return processed
+
+
+def schedule_retry(report: UserErrorReport) -> None:
+    """生成失败后按指数退避重新登记刷新；期间已有新的刷新请求时保留其计划时间"""
+    failures = report.refresh_failures + 1
+    base = getattr(settings, 'ERROR_REPORT_RETRY_BASE', 60)
+    delay = min(getattr(settings, 'ERROR_REPORT_RETRY_MAX', 3600), base * 2 ** min(failures - 1, 20))
+    now = timezone.now()
+    UserErrorReport.objects.filter(pk=report.pk).update(refresh_failures=failures)
+    UserErrorReport.objects.filter(pk=report.pk, refresh_due_at__isnull=True).update(
+        refresh_requested_at=now, refresh_due_at=now + timedelta(seconds=delay),
+    )
+
+
+def run_report_worker(poll_interval: float = 2.0, once: bool = False, log=None) -> int:
+    processed = 0
+    while True:
+        close_old_connections()
+        count = refresh_due_reports()
+        processed += count
+        if count and log:
+            log(f"刷新 {count} 份易错报告，累计 {processed} 份")
+        if not count:
+            if once:
+                break
+            time.sleep(poll_interval)
+    return processed
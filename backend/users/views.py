@@ -10,6 +10,7 @@ from django.utils import timezone
 from exercises.models import Exercise
 from exercises.serializers import ExerciseSerializer
 from .models import LabeledExercise, ArchivedExercise, UserErrorReport
+from .reports import request_report_refresh
 from .serializers import (
     RegisterSerializer,
     LoginSerializer,
@@ -90,25 +91,8 @@ class ToggleLabelExerciseView(APIView):
                 analysis_saved_at=timezone.now() if any([ua, ca, ex]) else None,
             )
             action = 'labeled'
-            # 触发一次易错报告更新
-            try:
-                from exercises.utils import generate_error_report
-                qs = LabeledExercise.objects.filter(profile=profile).exclude(explanation__isnull=True).exclude(explanation__exact='').order_by('-created_at')[:20]
-                payload = []
-                for a in qs.select_related('exercise'):
-                    payload.append({
-                        'question': getattr(a.exercise, 'question', ''),
-                        'user_answer': a.user_answer or '',
-                        'correct_answer': a.correct_answer or '',
-                        'explanation': a.explanation or '',
-                    })
-                report_md = generate_error_report(payload)
-                if report_md:
-                    report, _ = UserErrorReport.objects.get_or_create(profile=profile)
-                    report.content = report_md
-                    report.save()
-            except Exception:
-                pass
+        # 登记一次易错报告刷新，由 run_report_worker 在防抖窗口结束后统一生成
+        request_report_refresh(profile)
         return Response({'status': action})
 
 
@@ -149,4 +133,8 @@ class MyErrorReportView(APIView):
     def get(self, request):
         profile = request.user.profile
         report, _ = UserErrorReport.objects.get_or_create(profile=profile)
-        return Response({'content': report.content, 'updated_at': report.updated_at})
+        return Response({
+            'content': report.content,
+            'updated_at': report.updated_at,
+            'refresh_pending': report.refresh_pending,
+        })
@@ -1,77 +1,213 @@
+"""
+用大模型为 quiz_data 中的习题标注难度、主题并生成提示，结果写入 labeled_quiz.csv
+- 并发：asyncio + 信号量限制同时进行的请求数，另有令牌桶限制每秒请求数
+- 断点续跑：每完成一题就向 labeled_quiz.jsonl 追加一行（以题目+答案的摘要为键），
+  重新运行时跳过已标注的题，中途崩溃最多丢失正在进行的请求
+- 回复按严格 JSON 解析并校验字段，格式不对的题不写入进度文件，下次运行重试
+用法：python labeling.py --concurrency 8 --rate 5
+"""
+import argparse
+import asyncio
+import csv
+import hashlib
+import json
+import re
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-import os
-from openai import OpenAI
-from dotenv import load_dotenv
-import pandas as pd
-from tqdm import tqdm
-
-load_dotenv() 
-
-folder = Path('./quiz_data')
-
-# 获取所有 .md 文件
-md_files = list(folder.glob('*.md'))
 
-quiz_lists = []
+from tqdm import tqdm
 
-for file in md_files:
-    content = file.read_text(encoding='utf-8')
-    # print(f'--- {file.name} ---')
-    # print(content)
-    quizzes = content.split('<problem>')
-    quiz_pairs = []
-    for quiz in quizzes:
-        if '<answer>' in quiz:
-            question, answer = quiz.split('<answer>')
-            question = question.strip().replace('<problem/>', '').strip()
-            answer = answer.strip().replace('<answer/>', '').strip()
-            if question and answer:
-                quiz_pairs.append((question, answer))
-                # print(f'Q: {question}\nA: {answer}\n')
-    quiz_lists.append((file.name, quiz_pairs))
+# 复用后端的大模型客户端（连接池、超时、重试与熔断）与题目解析
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'backend'))
+from exercises.llm import chat, LLMError  # noqa: E402
+from exercises.quiz_markdown import parse_file  # noqa: E402
 
+HERE = Path(__file__).resolve().parent
 
 difficulty = ['easy', 'medium', 'hard']
-topic = ['sample-space', 'probability','random-variable', 'distribution', 'expectation', 'limit-theorem', 'statistics']
-
-# api_key = 'sk-97c2df9a79734b6b9a6f193074b6feee'
-
-client = OpenAI(
-    api_key=os.getenv('DEEPSEEK_API_KEY'),
-    base_url="https://api.deepseek.com")
-
-records = []
-for quiz in tqdm(quiz_lists):
-    print(f'File: {quiz[0]}')
-    for q, a in quiz[1]:
-        response = client.chat.completions.create(
-            model="deepseek-chat",
-            messages=[
-                {   
-                    "role": "system", 
-                    "content": "You are a helpful assistant that helps to label the question with difficulty and topic."},
-                {
-                    "role": "user", 
-                    "content": f"please label the question with difficulty and topic, and add a hint for the question (corresponding to the answer). The difficulty can be {difficulty}, and the topic can be {topic}. The question is: {q} The answer is: {a}. Please only give me the result in json format like(and please don't add any other tags or characters or signs into the final strings) {{'difficulty': 'easy', 'topic': 'probability', 'hint': '解答改题目的提示（注意用中文回答，如果涉及到公式，则要符合markdown格式下Latex语法，同时注意转义字符要多加一个反斜杠）'}}"
-                }
-            ],
-            stream=False,
-        )
-        result = response.choices[0].message.content
-        if result is not None:
-            result_json = eval(result)  # Convert string representation of dict to actual dict
-            d, t, h = result_json.get('difficulty'), result_json.get('topic'), result_json.get('hint')
-            record = (q, a, d, t, h)
-            records.append(record)
-
-# 保存结果到csv文件,标题为 question, answer, difficulty, topic
-df = pd.DataFrame(records, columns=['question', 'answer', 'difficulty', 'topic', 'hint'])
-df.to_csv('labeled_quiz.csv', index=False, encoding='utf-8-sig')
-
-
-# print(response.choices[0].message.content)
-
-
-
-
-
+topic = ['sample-space', 'probability', 'random-variable', 'distribution', 'expectation', 'limit-theorem', 'statistics']
+
+_FENCE_RE = re.compile(r'```(?:json)?\s*(.*?)\s*```', re.S)
+
+
+def content_key(question: str, answer: str) -> str:
+    """进度文件的键：题目与答案任一改动都会重新标注"""
+    return hashlib.sha256(f'{question}\n<answer>\n{answer}'.encode('utf-8')).hexdigest()
+
+
+def build_messages(q: str, a: str) -> list[dict]:
+    return [
+        {
+            "role": "system",
+            "content": "You are a helpful assistant that helps to label the question with difficulty and topic."},
+        {
+            "role": "user",
+            "content": f"please label the question with difficulty and topic, and add a hint for the question (corresponding to the answer). The difficulty can be {difficulty}, and the topic can be {topic}. The question is: {q} The answer is: {a}. Please only reply with a JSON object (double-quoted keys and strings, backslashes escaped as required by JSON, no other text) like {{\"difficulty\": \"easy\", \"topic\": \"probability\", \"hint\": \"解答该题目的提示（注意用中文回答，如果涉及到公式，则要符合markdown格式下Latex语法）\"}}"
+        }
+    ]
+
+
+def parse_label(reply: str) -> dict:
+    """严格解析回复中的 JSON 并校验字段，不合法时抛出 ValueError"""
+    text = reply.strip()
+    fenced = _FENCE_RE.fullmatch(text)
+    if fenced:
+        text = fenced.group(1)
+    data = json.loads(text)
+    if not isinstance(data, dict):
+        raise ValueError(f"回复不是 JSON 对象：{text[:80]}")
+    d, t, h = data.get('difficulty'), data.get('topic'), data.get('hint')
+    if d not in difficulty:
+        raise ValueError(f"difficulty 不合法：{d!r}")
+    if t not in topic:
+        raise ValueError(f"topic 不合法：{t!r}")
+    if not isinstance(h, str) or not h.strip():
+        raise ValueError("hint 为空")
+    return {'difficulty': d, 'topic': t, 'hint': h.strip()}
+
+
+class TokenBucket:
+    """令牌桶：平均每秒 rate 个请求，允许 burst 个突发；rate <= 0 表示不限速"""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+def iter_quizzes(folder: Path):
+    """按文件名顺序逐题产出 (文件名, 题目, 答案)"""
+    for file in sorted(folder.glob('*.md')):
+        _, problems = parse_file(file)
+        for p in problems:
+            yield file.name, p.question, p.answer
+
+
+def load_checkpoint(path: Path) -> dict[str, dict]:
+    """读取进度文件；崩溃时写了一半的行会被跳过"""
+    done = {}
+    if not path.exists():
+        return done
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+                done[record['key']] = record
+            except (ValueError, KeyError):
+                continue
+    return done
+
+
+async def label_all(quizzes, done: dict, checkpoint: Path, concurrency: int, bucket: TokenBucket) -> Counter:
+    stats = Counter()
+    # asyncio.to_thread 使用默认线程池，其大小需不小于并发数
+    asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=concurrency))
+    queue = asyncio.Queue(maxsize=concurrency * 2)
+
+    # 上次写了一半的行单独留在一行里，不影响之后追加的记录
+    if checkpoint.exists() and checkpoint.stat().st_size:
+        with open(checkpoint, 'rb') as f:
+            f.seek(-1, 2)
+            needs_newline = f.read(1) != b'\n'
+    else:
+        needs_newline = False
+
+    with open(checkpoint, 'a', encoding='utf-8') as out, tqdm(unit='题') as bar:
+        if needs_newline:
+            out.write('\n')
+
+        async def worker():
+            while True:
+                item = await queue.get()
+                if item is None:
+                    return
+                key, name, q, a = item
+                await bucket.acquire()
+                try:
+                    reply = await asyncio.to_thread(chat, build_messages(q, a), response_format={'type': 'json_object'})
+                    label = parse_label(reply)
+                except LLMError as e:
+                    stats['failed'] += 1
+                    tqdm.write(f'[LLM Error] {name}: {e}')
+                except ValueError as e:
+                    stats['invalid'] += 1
+                    tqdm.write(f'[Invalid Reply] {name}: {e}')
+                else:
+                    # 单线程事件循环中依次写入，每行完整落盘后再处理下一条
+                    out.write(json.dumps({'key': key, 'file': name, **label}, ensure_ascii=False) + '\n')
+                    out.flush()
+                    stats['labeled'] += 1
+                bar.update()
+
+        workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+        for name, q, a in quizzes:
+            key = content_key(q, a)
+            if key in done:
+                stats['skipped'] += 1
+                continue
+            await queue.put((key, name, q, a))
+        for _ in workers:
+            await queue.put(None)
+        await asyncio.gather(*workers)
+    return stats
+
+
+def export_csv(folder: Path, checkpoint: Path, output: Path) -> int:
+    """按源文件顺序导出已标注的题目，列为 question, answer, difficulty, topic, hint"""
+    labels = load_checkpoint(checkpoint)
+    count = 0
+    with open(output, 'w', newline='', encoding='utf-8-sig') as f:
+        writer = csv.writer(f)
+        writer.writerow(['question', 'answer', 'difficulty', 'topic', 'hint'])
+        for _, q, a in iter_quizzes(folder):
+            label = labels.get(content_key(q, a))
+            if label:
+                writer.writerow([q, a, label['difficulty'], label['topic'], label['hint']])
+                count += 1
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description='为 quiz_data 中的习题标注难度、主题与提示')
+    parser.add_argument('--input', type=Path, default=HERE / 'quiz_data', help='Markdown 习题目录')
+    parser.add_argument('--checkpoint', type=Path, default=HERE / 'labeled_quiz.jsonl', help='进度文件（JSONL）')
+    parser.add_argument('--output', type=Path, default=HERE / 'labeled_quiz.csv', help='输出 CSV')
+    parser.add_argument('--concurrency', type=int, default=8, help='同时进行的请求数')
+    parser.add_argument('--rate', type=float, default=5, help='每秒最多发起的请求数，0 表示不限')
+    parser.add_argument('--burst', type=int, default=5, help='令牌桶容量（允许的突发请求数）')
+    args = parser.parse_args()
+
+    done = load_checkpoint(args.checkpoint)
+    started = time.monotonic()
+    stats = asyncio.run(label_all(
+        iter_quizzes(args.input), done, args.checkpoint,
+        max(1, args.concurrency), TokenBucket(args.rate, args.burst),
+    ))
+    count = export_csv(args.input, args.checkpoint, args.output)
+    print(f"本次标注 {stats['labeled']} 题，跳过已标注 {stats['skipped']} 题，"
+          f"调用失败 {stats['failed']} 题，回复不合法 {stats['invalid']} 题，用时 {time.monotonic() - started:.1f} 秒")
+    print(f"已导出 {count} 题到 {args.output}")
+    if stats['failed'] or stats['invalid']:
+        print("未完成的题目重新运行即可补齐")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,6 @@
 import React, { useEffect, useState } from 'react';
 import { useNavigate } from 'react-router-dom';
-import { Exercise, ExerciseCheckResult } from '../types';
+import { PracticeExercise, ExerciseCheckResult } from '../types';
 import { exerciseApi, userExerciseApi } from '../services/api';
 import UserButton from './UserButton';
 import MarkdownWithLatex from '@/utils/MarkdownWithLatex';
@@ -31,7 +31,7 @@ const ExerciseFeedback: React.FC = () => {
   const [activeTab, setActiveTab] = useState<'practice' | 'homework' | 'training'>('practice');
 
   // 列表 & 过滤 & 分页
-  const [exercises, setExercises] = useState<Exercise[]>([]);
+  const [exercises, setExercises] = useState<PracticeExercise[]>([]);
   const [currentPage, setCurrentPage] = useState(1);
   const [hasNext, setHasNext] = useState(false);
   const [pageInput, setPageInput] = useState('1');
@@ -46,6 +46,8 @@ const ExerciseFeedback: React.FC = () => {
   const [exerciseAnswers, setExerciseAnswers] = useState<Record<number, string>>({});
   const [exerciseFeedback, setExerciseFeedback] = useState<Record<number, ExerciseCheckResult>>({});
   const [showHints, setShowHints] = useState<Record<number, boolean>>({});
+  // 提示按需加载
+  const [hints, setHints] = useState<Record<number, string>>({});
   // 验证加载中状态（每题）
   const [checkingMap, setCheckingMap] = useState<Record<number, boolean>>({});
   // 极简：不需要 reset token，直接在输入框内置清空按钮
@@ -100,7 +102,7 @@ const ExerciseFeedback: React.FC = () => {
   const loadExercises = async () => {
     const category = selectedTopic === 'all' ? undefined : selectedTopic;
     const difficulty = selectedDifficulty === 'all' ? undefined : selectedDifficulty;
-    const resp = await exerciseApi.getByMultiplePaged({ category, difficulty, page: currentPage });
+    const resp = await exerciseApi.getPracticePaged({ category, difficulty, page: currentPage });
     setExercises(resp.results || []);
     setHasNext(Boolean(resp.next));
   };
@@ -112,7 +114,18 @@ const ExerciseFeedback: React.FC = () => {
   const handleAnswerChange = (id: number, value: string) => {
     setExerciseAnswers(prev => ({ ...prev, [id]: value }));
   };
-  const showHint = (id: number) => setShowHints(prev => ({ ...prev, [id]: !prev[id] }));
+  const showHint = async (id: number) => {
+    if (!showHints[id] && hints[id] === undefined) {
+      try {
+        const solution = await exerciseApi.getSolution(id, ['hint']);
+        setHints(prev => ({ ...prev, [id]: solution.hint || '' }));
+      } catch (e) {
+        // 加载失败时不展开，下次点击重试
+        return;
+      }
+    }
+    setShowHints(prev => ({ ...prev, [id]: !prev[id] }));
+  };
   const submitAnswer = async (id: number) => {
     const ans = exerciseAnswers[id] || '';
     try {
@@ -324,7 +337,7 @@ const ExerciseFeedback: React.FC = () => {
                     <div className="feedback-message feedback-info">
                       <div className="feedback-title">提示</div>
                       <div className="feedback-content">
-                        <MarkdownWithLatex markdownContent={exercise.hint} />
+                        <MarkdownWithLatex markdownContent={hints[exercise.id] ?? ''} />
                       </div>
                     </div>
                   )}
@@ -14,7 +14,7 @@ const UserProfile: React.FC = () => {
   const [archived, setArchived] = useState<Array<{ exercise: Exercise; created_at: string }>>([]);
   const token = typeof window !== 'undefined' ? localStorage.getItem('auth_token') : null;
   const [expanded, setExpanded] = useState<Record<number, boolean>>({});
-  const [errorReport, setErrorReport] = useState<{ content: string; updated_at: string } | null>(null);
+  const [errorReport, setErrorReport] = useState<{ content: string; updated_at: string; refresh_pending?: boolean } | null>(null);
   const [reportLoading, setReportLoading] = useState(false);
 
   const topics = [
@@ -237,6 +237,9 @@ const UserProfile: React.FC = () => {
                     {errorReport?.updated_at && (
                       <div className="text-muted small mt-2">最近更新：{formatRelativeTime(errorReport.updated_at)}</div>
                     )}
+                    {errorReport?.refresh_pending && (
+                      <div className="text-muted small">报告正在根据最新标注更新，稍后刷新即可查看。</div>
+                    )}
                   </div>
                 )}
               </div>
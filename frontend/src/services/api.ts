@@ -1,5 +1,5 @@
 import axios from 'axios';
-import { Knowledge, Course, Chapter, Exercise, ApiResponse, ExerciseCheckResult, AuthResponse, UserProfile, UserExercises } from '../types';
+import { Knowledge, Course, Chapter, Exercise, PracticeExercise, ExerciseSolution, ApiResponse, ExerciseCheckResult, AuthResponse, UserProfile, UserExercises } from '../types';
 
 const API_BASE_URL = "/api"
 // import.meta.env.VITE_API_URL || 'http://localhost:8000/api';
@@ -37,7 +37,7 @@ export const knowledgeApi = {
 
   // 搜索知识点
   search: (query: string): Promise<Knowledge[]> =>
-    api.post('/knowledge/search/', { query }).then(response => response.data),
+    api.post('/knowledge/search/', { query }).then(response => response.data.results),
 
   // AI生成知识点
   generate: (question: string): Promise<Knowledge> =>
@@ -134,6 +134,25 @@ export const exerciseApi = {
     return api.get('/exercise/search/', { params }).then(res => res.data);
   },
 
+  // 练习模式查询：只返回题面，不含答案、解释、提示
+  getPracticePaged: (options: {
+    category?: string;
+    difficulty?: string | string[];
+    page?: number;
+  }): Promise<ApiResponse<PracticeExercise>> => {
+    const params: Record<string, any> = { mode: 'practice' };
+    if (options.category && options.category !== '') params.category = options.category;
+    if (options.difficulty && options.difficulty !== '') params.difficulty = options.difficulty;
+    if (typeof options.page === 'number' && options.page > 0) params.page = options.page;
+    return api.get('/exercise/search/', { params }).then(res => res.data);
+  },
+
+  // 按需获取答案、解释、提示，fields 例如 ['hint']
+  getSolution: (id: number, fields?: Array<'answer' | 'explanation' | 'hint'>): Promise<ExerciseSolution> =>
+    api
+      .get(`/exercise/${id}/solution/`, { params: fields ? { fields: fields.join(',') } : {} })
+      .then(res => res.data),
+
   // 检查练习答案
   checkAnswer: (id: number, answer: string): Promise<ExerciseCheckResult> =>
     api
@@ -167,7 +186,7 @@ export const userExerciseApi = {
   toggleArchive: (exerciseId: number): Promise<{ status: 'archived' | 'unarchived' }> =>
     api.post(`/users/exercises/${exerciseId}/toggle-archive/`).then(res => res.data),
   myLists: (): Promise<UserExercises> => api.get('/users/me/exercises/').then(res => res.data),
-  myErrorReport: (): Promise<{ content: string; updated_at: string }> =>
+  myErrorReport: (): Promise<{ content: string; updated_at: string; refresh_pending: boolean }> =>
     api.get('/users/me/error-report/').then(res => res.data),
 };
 
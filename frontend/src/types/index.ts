@@ -52,6 +52,16 @@ export interface Exercise {
   created_at: string;
 }
 
+// 练习模式下的题目（不含答案、解释、提示，需要时通过 solution 接口获取）
+export type PracticeExercise = Omit<Exercise, 'answer' | 'explanation' | 'hint'>;
+
+export interface ExerciseSolution {
+  id: number;
+  answer?: string;
+  explanation?: string;
+  hint?: string;
+}
+
 // API响应类型
 export interface ApiResponse<T> {
   results: T[];